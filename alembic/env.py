@@ -17,8 +17,17 @@ if config.config_file_name is not None:
 # add your model's MetaData object here
 # for 'autogenerate' support
 
+from contas_a_pagar_e_receber.models.conta_a_pagar_receber_arquivada_model import ContaPagarReceberArquivada
 from contas_a_pagar_e_receber.models.conta_a_pagar_receber_model import ContaPagarReceber
+from contas_a_pagar_e_receber.models.cota_mensal_model import CotaMensal
+from contas_a_pagar_e_receber.models.evento_model import Evento
 from contas_a_pagar_e_receber.models.fornecedor_cliente_model import FornecedorCliente
+from contas_a_pagar_e_receber.models.pagamento_arquivado_model import PagamentoArquivado
+from contas_a_pagar_e_receber.models.pagamento_model import Pagamento
+from contas_a_pagar_e_receber.models.regra_recorrencia_model import RegraRecorrencia
+from contas_a_pagar_e_receber.models.resposta_idempotente_model import RespostaIdempotente
+from contas_a_pagar_e_receber.models.resumo_mensal_model import ResumoMensal
+from contas_a_pagar_e_receber.models.versao_tabela_model import VersaoTabela
 
 from shared.database import Base
 # target_metadata = mymodel.Base.metadata
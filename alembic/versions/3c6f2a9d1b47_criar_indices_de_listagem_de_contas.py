@@ -0,0 +1,31 @@
+"""criar indices de listagem de contas
+
+Revision ID: 3c6f2a9d1b47
+Revises: f90595e797f9
+Create Date: 2026-10-17 09:12:41.203518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c6f2a9d1b47'
+down_revision: Union[str, None] = 'f90595e797f9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_contas_a_pagar_e_receber_tipo_id', 'contas_a_pagar_e_receber', ['tipo', 'id'])
+    op.create_index('ix_contas_a_pagar_e_receber_esta_baixada_id', 'contas_a_pagar_e_receber', ['esta_baixada', 'id'])
+    op.create_index('ix_contas_a_pagar_e_receber_data_previsao_id', 'contas_a_pagar_e_receber', ['data_previsao', 'id'])
+    op.create_index('ix_contas_a_pagar_e_receber_fornecedor_cliente_id_id', 'contas_a_pagar_e_receber', ['fornecedor_cliente_id', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contas_a_pagar_e_receber_fornecedor_cliente_id_id', table_name='contas_a_pagar_e_receber')
+    op.drop_index('ix_contas_a_pagar_e_receber_data_previsao_id', table_name='contas_a_pagar_e_receber')
+    op.drop_index('ix_contas_a_pagar_e_receber_esta_baixada_id', table_name='contas_a_pagar_e_receber')
+    op.drop_index('ix_contas_a_pagar_e_receber_tipo_id', table_name='contas_a_pagar_e_receber')
@@ -0,0 +1,40 @@
+"""criar tabela de cota mensal
+
+Revision ID: 5f7a3b2e9c10
+Revises: c2d9e4f81a36
+Create Date: 2026-10-17 12:05:33.684120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f7a3b2e9c10'
+down_revision: Union[str, None] = 'c2d9e4f81a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('cota_mensal',
+    sa.Column('ano', sa.Integer(), nullable=False),
+    sa.Column('mes', sa.Integer(), nullable=False),
+    sa.Column('quantidade', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('ano', 'mes')
+    )
+    # em Core, para o extract sair como EXTRACT no Postgres e strftime no SQLite
+    contas = sa.table('contas_a_pagar_e_receber', sa.column('id'), sa.column('data_previsao', sa.Date()))
+    cota_mensal = sa.table('cota_mensal', sa.column('ano'), sa.column('mes'), sa.column('quantidade'))
+    ano = sa.cast(sa.extract('year', contas.c.data_previsao), sa.Integer())
+    mes = sa.cast(sa.extract('month', contas.c.data_previsao), sa.Integer())
+    op.execute(cota_mensal.insert().from_select(
+        ['ano', 'mes', 'quantidade'],
+        sa.select(ano, mes, sa.func.count(contas.c.id)).group_by(ano, mes),
+    ))
+
+
+def downgrade() -> None:
+    op.drop_table('cota_mensal')
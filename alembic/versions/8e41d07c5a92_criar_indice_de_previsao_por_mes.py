@@ -0,0 +1,25 @@
+"""criar indice de previsao por mes
+
+Revision ID: 8e41d07c5a92
+Revises: 3c6f2a9d1b47
+Create Date: 2026-10-17 10:02:17.550913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e41d07c5a92'
+down_revision: Union[str, None] = '3c6f2a9d1b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_contas_a_pagar_e_receber_tipo_data_previsao', 'contas_a_pagar_e_receber', ['tipo', 'data_previsao'], postgresql_include=['valor'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contas_a_pagar_e_receber_tipo_data_previsao', table_name='contas_a_pagar_e_receber')
@@ -0,0 +1,30 @@
+"""criar tabela de versao tabela
+
+Revision ID: a41c8e7d2f05
+Revises: 5f7a3b2e9c10
+Create Date: 2026-10-17 13:41:09.305217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41c8e7d2f05'
+down_revision: Union[str, None] = '5f7a3b2e9c10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('versao_tabela',
+    sa.Column('tabela', sa.String(length=63), nullable=False),
+    sa.Column('versao', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('tabela')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('versao_tabela')
@@ -0,0 +1,78 @@
+"""criar tabelas de arquivo de contas
+
+Revision ID: a6d2e8f4b517
+Revises: f1c7b2d9a380
+Create Date: 2026-10-17 17:02:41.508316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d2e8f4b517'
+down_revision: Union[str, None] = 'f1c7b2d9a380'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _recria_tabela_de_contas(autoincrement: bool) -> None:
+    # o SQLite so deixa de reaproveitar ids com AUTOINCREMENT, que exige recriar a tabela;
+    # as triggers da busca textual caem junto e sao criadas de novo
+    with op.batch_alter_table('contas_a_pagar_e_receber', recreate='always', table_kwargs={'sqlite_autoincrement': autoincrement}):
+        pass
+    fts = 'contas_a_pagar_e_receber_busca'
+    op.execute(f"CREATE TRIGGER {fts}_ai AFTER INSERT ON contas_a_pagar_e_receber BEGIN "
+               f"INSERT INTO {fts}(rowid, descricao) VALUES (new.id, new.descricao); END")
+    op.execute(f"CREATE TRIGGER {fts}_ad AFTER DELETE ON contas_a_pagar_e_receber BEGIN "
+               f"INSERT INTO {fts}({fts}, rowid, descricao) VALUES ('delete', old.id, old.descricao); END")
+    op.execute(f"CREATE TRIGGER {fts}_au AFTER UPDATE OF descricao ON contas_a_pagar_e_receber BEGIN "
+               f"INSERT INTO {fts}({fts}, rowid, descricao) VALUES ('delete', old.id, old.descricao); "
+               f"INSERT INTO {fts}(rowid, descricao) VALUES (new.id, new.descricao); END")
+
+
+def upgrade() -> None:
+    op.create_table('contas_a_pagar_e_receber_arquivadas',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('descricao', sa.String(length=30), nullable=True),
+    sa.Column('valor', sa.Numeric(), nullable=True),
+    sa.Column('tipo', sa.String(length=30), nullable=True),
+    sa.Column('data_previsao', sa.Date(), nullable=False),
+    sa.Column('data_baixa', sa.Date(), nullable=True),
+    sa.Column('valor_baixa', sa.Numeric(), nullable=True),
+    sa.Column('esta_baixada', sa.Boolean(), nullable=True),
+    sa.Column('fornecedor_cliente_id', sa.Integer(), nullable=True),
+    sa.Column('versao', sa.Integer(), nullable=False),
+    sa.Column('arquivada_em', sa.DateTime(), nullable=False),
+    sa.Column('excluida_em', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['fornecedor_cliente_id'], ['fornecedor_cliente.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_contas_a_pagar_e_receber_arquivadas_fornecedor_cliente_id_id', 'contas_a_pagar_e_receber_arquivadas', ['fornecedor_cliente_id', 'id'], unique=False)
+    op.create_index('ix_contas_a_pagar_e_receber_arquivadas_data_previsao_id', 'contas_a_pagar_e_receber_arquivadas', ['data_previsao', 'id'], unique=False)
+
+    op.create_table('pagamentos_arquivados',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('conta_a_pagar_e_receber_id', sa.Integer(), nullable=False),
+    sa.Column('valor', sa.Numeric(), nullable=False),
+    sa.Column('data_pagamento', sa.Date(), nullable=False),
+    sa.ForeignKeyConstraint(['conta_a_pagar_e_receber_id'], ['contas_a_pagar_e_receber_arquivadas.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_pagamentos_arquivados_conta_a_pagar_e_receber_id_id', 'pagamentos_arquivados', ['conta_a_pagar_e_receber_id', 'id'], unique=False)
+
+    if op.get_bind().dialect.name == 'sqlite':
+        _recria_tabela_de_contas(autoincrement=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        _recria_tabela_de_contas(autoincrement=False)
+
+    op.drop_index('ix_pagamentos_arquivados_conta_a_pagar_e_receber_id_id', table_name='pagamentos_arquivados')
+    op.drop_table('pagamentos_arquivados')
+    op.drop_index('ix_contas_a_pagar_e_receber_arquivadas_data_previsao_id', table_name='contas_a_pagar_e_receber_arquivadas')
+    op.drop_index('ix_contas_a_pagar_e_receber_arquivadas_fornecedor_cliente_id_id', table_name='contas_a_pagar_e_receber_arquivadas')
+    op.drop_table('contas_a_pagar_e_receber_arquivadas')
@@ -0,0 +1,53 @@
+"""criar tabela de pagamentos
+
+Revision ID: b6d1f4a8c372
+Revises: e7b3c90d4a18
+Create Date: 2026-10-17 15:41:09.204716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d1f4a8c372'
+down_revision: Union[str, None] = 'e7b3c90d4a18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('pagamentos',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('conta_a_pagar_e_receber_id', sa.Integer(), nullable=False),
+    sa.Column('valor', sa.Numeric(), nullable=False),
+    sa.Column('data_pagamento', sa.Date(), nullable=False),
+    sa.ForeignKeyConstraint(['conta_a_pagar_e_receber_id'], ['contas_a_pagar_e_receber.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_pagamentos_conta_a_pagar_e_receber_id_id', 'pagamentos', ['conta_a_pagar_e_receber_id', 'id'])
+    # as baixas feitas antes do historico viram um pagamento unico
+    op.execute("""
+        INSERT INTO pagamentos (conta_a_pagar_e_receber_id, valor, data_pagamento)
+        SELECT id, valor_baixa, COALESCE(data_baixa, data_previsao)
+        FROM contas_a_pagar_e_receber
+        WHERE valor_baixa IS NOT NULL AND valor_baixa > 0
+        ORDER BY id
+    """)
+
+    op.drop_index('ix_contas_a_pagar_e_receber_em_aberto_tipo_data_previsao', table_name='contas_a_pagar_e_receber')
+    op.create_index('ix_contas_a_pagar_e_receber_em_aberto_tipo_data_previsao', 'contas_a_pagar_e_receber', ['tipo', 'data_previsao', 'valor', 'valor_baixa'],
+                    postgresql_where=sa.text('esta_baixada = false'), sqlite_where=sa.text('esta_baixada = 0'))
+    op.create_index('ix_contas_a_pagar_e_receber_em_aberto_fornecedor_cliente_id', 'contas_a_pagar_e_receber', ['fornecedor_cliente_id', 'data_previsao', 'valor', 'valor_baixa'],
+                    postgresql_where=sa.text('esta_baixada = false'), sqlite_where=sa.text('esta_baixada = 0'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contas_a_pagar_e_receber_em_aberto_fornecedor_cliente_id', table_name='contas_a_pagar_e_receber')
+    op.drop_index('ix_contas_a_pagar_e_receber_em_aberto_tipo_data_previsao', table_name='contas_a_pagar_e_receber')
+    op.create_index('ix_contas_a_pagar_e_receber_em_aberto_tipo_data_previsao', 'contas_a_pagar_e_receber', ['tipo', 'data_previsao'],
+                    postgresql_where=sa.text('esta_baixada = false'), sqlite_where=sa.text('esta_baixada = 0'))
+    op.drop_index('ix_pagamentos_conta_a_pagar_e_receber_id_id', table_name='pagamentos')
+    op.drop_table('pagamentos')
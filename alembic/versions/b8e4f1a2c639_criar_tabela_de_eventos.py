@@ -0,0 +1,37 @@
+"""criar tabela de eventos
+
+Revision ID: b8e4f1a2c639
+Revises: a6d2e8f4b517
+Create Date: 2026-10-17 17:48:12.904137
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e4f1a2c639'
+down_revision: Union[str, None] = 'a6d2e8f4b517'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('eventos',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entidade', sa.String(length=30), nullable=False),
+    sa.Column('entidade_id', sa.Integer(), nullable=False),
+    sa.Column('operacao', sa.String(length=30), nullable=False),
+    sa.Column('dados', sa.JSON(), nullable=True),
+    sa.Column('criado_em', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+    op.create_index('ix_eventos_criado_em', 'eventos', ['criado_em'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_eventos_criado_em', table_name='eventos')
+    op.drop_table('eventos')
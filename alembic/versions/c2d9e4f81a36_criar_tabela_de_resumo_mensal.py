@@ -0,0 +1,48 @@
+"""criar tabela de resumo mensal
+
+Revision ID: c2d9e4f81a36
+Revises: 8e41d07c5a92
+Create Date: 2026-10-17 11:20:48.117402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2d9e4f81a36'
+down_revision: Union[str, None] = '8e41d07c5a92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('resumo_mensal',
+    sa.Column('ano', sa.Integer(), nullable=False),
+    sa.Column('mes', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.String(length=30), nullable=False),
+    sa.Column('quantidade', sa.Integer(), nullable=False),
+    sa.Column('valor_total', sa.Numeric(), nullable=False),
+    sa.Column('valor_baixa_total', sa.Numeric(), nullable=False),
+    sa.PrimaryKeyConstraint('ano', 'mes', 'tipo')
+    )
+    # em Core, para o extract sair como EXTRACT no Postgres e strftime no SQLite
+    contas = sa.table('contas_a_pagar_e_receber', sa.column('id'), sa.column('data_previsao', sa.Date()),
+                      sa.column('tipo'), sa.column('valor'), sa.column('valor_baixa'))
+    resumo_mensal = sa.table('resumo_mensal', sa.column('ano'), sa.column('mes'), sa.column('tipo'),
+                             sa.column('quantidade'), sa.column('valor_total'), sa.column('valor_baixa_total'))
+    ano = sa.cast(sa.extract('year', contas.c.data_previsao), sa.Integer())
+    mes = sa.cast(sa.extract('month', contas.c.data_previsao), sa.Integer())
+    op.execute(resumo_mensal.insert().from_select(
+        ['ano', 'mes', 'tipo', 'quantidade', 'valor_total', 'valor_baixa_total'],
+        sa.select(ano, mes, contas.c.tipo, sa.func.count(contas.c.id),
+                  sa.func.coalesce(sa.func.sum(contas.c.valor), 0), sa.func.coalesce(sa.func.sum(contas.c.valor_baixa), 0))
+        .where(contas.c.tipo.is_not(None))
+        .group_by(ano, mes, contas.c.tipo),
+    ))
+
+
+def downgrade() -> None:
+    op.drop_table('resumo_mensal')
@@ -0,0 +1,40 @@
+"""criar regras de recorrencia
+
+Revision ID: c2f9a4d6e871
+Revises: b8e4f1a2c639
+Create Date: 2026-10-17 18:31:27.316954
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2f9a4d6e871'
+down_revision: Union[str, None] = 'b8e4f1a2c639'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('regras_recorrencia',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('descricao', sa.String(length=30), nullable=True),
+    sa.Column('valor', sa.Numeric(), nullable=False),
+    sa.Column('tipo', sa.String(length=30), nullable=False),
+    sa.Column('fornecedor_cliente_id', sa.Integer(), nullable=True),
+    sa.Column('frequencia', sa.String(length=10), nullable=False),
+    sa.Column('intervalo', sa.Integer(), server_default=sa.text('1'), nullable=False),
+    sa.Column('data_inicio', sa.Date(), nullable=False),
+    sa.Column('data_fim', sa.Date(), nullable=True),
+    sa.ForeignKeyConstraint(['fornecedor_cliente_id'], ['fornecedor_cliente.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_regras_recorrencia_fornecedor_cliente_id_id', 'regras_recorrencia', ['fornecedor_cliente_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_regras_recorrencia_fornecedor_cliente_id_id', table_name='regras_recorrencia')
+    op.drop_table('regras_recorrencia')
@@ -0,0 +1,28 @@
+"""criar indice de aging
+
+Revision ID: c3e8a1f5d926
+Revises: b6d1f4a8c372
+Create Date: 2026-10-17 16:12:53.871034
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8a1f5d926'
+down_revision: Union[str, None] = 'b6d1f4a8c372'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_contas_a_pagar_e_receber_em_aberto_data_previsao', 'contas_a_pagar_e_receber',
+                    ['data_previsao', 'valor', 'valor_baixa', 'tipo', 'fornecedor_cliente_id'],
+                    postgresql_where=sa.text('esta_baixada = false'), sqlite_where=sa.text('esta_baixada = 0'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contas_a_pagar_e_receber_em_aberto_data_previsao', table_name='contas_a_pagar_e_receber')
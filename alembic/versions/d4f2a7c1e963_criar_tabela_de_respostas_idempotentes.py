@@ -0,0 +1,35 @@
+"""criar tabela de respostas idempotentes
+
+Revision ID: d4f2a7c1e963
+Revises: c3e8a1f5d926
+Create Date: 2026-10-17 15:32:47.918204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f2a7c1e963'
+down_revision: Union[str, None] = 'c3e8a1f5d926'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('respostas_idempotentes',
+    sa.Column('chave', sa.String(length=255), nullable=False),
+    sa.Column('impressao', sa.String(length=64), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=False),
+    sa.Column('corpo', sa.Text(), nullable=False),
+    sa.Column('expira_em', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('chave')
+    )
+    op.create_index('ix_respostas_idempotentes_expira_em', 'respostas_idempotentes', ['expira_em'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_respostas_idempotentes_expira_em', table_name='respostas_idempotentes')
+    op.drop_table('respostas_idempotentes')
@@ -0,0 +1,35 @@
+"""unir indice de aging ao de contas em aberto
+
+Revision ID: d7a1e5c3b942
+Revises: c2f9a4d6e871
+Create Date: 2026-10-17 19:04:12.583107
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a1e5c3b942'
+down_revision: Union[str, None] = 'c2f9a4d6e871'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_contas_a_pagar_e_receber_em_aberto_data_previsao', table_name='contas_a_pagar_e_receber')
+    op.drop_index('ix_contas_a_pagar_e_receber_em_aberto_tipo_data_previsao', table_name='contas_a_pagar_e_receber')
+    op.create_index('ix_contas_a_pagar_e_receber_em_aberto_tipo_data_previsao', 'contas_a_pagar_e_receber',
+                    ['tipo', 'data_previsao', 'valor', 'valor_baixa', 'fornecedor_cliente_id'],
+                    postgresql_where=sa.text('esta_baixada = false'), sqlite_where=sa.text('esta_baixada = 0'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contas_a_pagar_e_receber_em_aberto_tipo_data_previsao', table_name='contas_a_pagar_e_receber')
+    op.create_index('ix_contas_a_pagar_e_receber_em_aberto_tipo_data_previsao', 'contas_a_pagar_e_receber', ['tipo', 'data_previsao', 'valor', 'valor_baixa'],
+                    postgresql_where=sa.text('esta_baixada = false'), sqlite_where=sa.text('esta_baixada = 0'))
+    op.create_index('ix_contas_a_pagar_e_receber_em_aberto_data_previsao', 'contas_a_pagar_e_receber',
+                    ['data_previsao', 'valor', 'valor_baixa', 'tipo', 'fornecedor_cliente_id'],
+                    postgresql_where=sa.text('esta_baixada = false'), sqlite_where=sa.text('esta_baixada = 0'))
@@ -0,0 +1,40 @@
+"""trocar indices de busca por gist
+
+Revision ID: e3b8c6f2a715
+Revises: d7a1e5c3b942
+Create Date: 2026-10-17 19:27:45.916230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b8c6f2a715'
+down_revision: Union[str, None] = 'd7a1e5c3b942'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUNAS_DE_BUSCA = (
+    ('contas_a_pagar_e_receber', 'descricao'),
+    ('fornecedor_cliente', 'nome'),
+)
+
+
+def _recria_indices(metodo: str, operadores: str) -> None:
+    # so o Postgres tem indice de trigramas; no SQLite a busca continua na tabela FTS5
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for tabela, coluna in COLUNAS_DE_BUSCA:
+        op.drop_index(f'ix_{tabela}_{coluna}_trgm', table_name=tabela)
+        op.create_index(f'ix_{tabela}_{coluna}_trgm', tabela, [coluna], postgresql_using=metodo, postgresql_ops={coluna: operadores})
+
+
+def upgrade() -> None:
+    # o GiST entrega as linhas em ordem de distancia (<<->), o que o GIN nao faz
+    _recria_indices('gist', 'gist_trgm_ops')
+
+
+def downgrade() -> None:
+    _recria_indices('gin', 'gin_trgm_ops')
@@ -0,0 +1,28 @@
+"""adicionar coluna de versao
+
+Revision ID: e5a9c3b7d104
+Revises: d4f2a7c1e963
+Create Date: 2026-10-17 15:58:21.604733
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a9c3b7d104'
+down_revision: Union[str, None] = 'd4f2a7c1e963'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('contas_a_pagar_e_receber', sa.Column('versao', sa.Integer(), server_default=sa.text('1'), nullable=False))
+    op.add_column('fornecedor_cliente', sa.Column('versao', sa.Integer(), server_default=sa.text('1'), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('fornecedor_cliente', 'versao')
+    op.drop_column('contas_a_pagar_e_receber', 'versao')
@@ -0,0 +1,27 @@
+"""criar indice parcial de contas em aberto
+
+Revision ID: e7b3c90d4a18
+Revises: a41c8e7d2f05
+Create Date: 2026-10-17 15:04:42.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3c90d4a18'
+down_revision: Union[str, None] = 'a41c8e7d2f05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_contas_a_pagar_e_receber_em_aberto_tipo_data_previsao', 'contas_a_pagar_e_receber', ['tipo', 'data_previsao'],
+                    postgresql_where=sa.text('esta_baixada = false'), sqlite_where=sa.text('esta_baixada = 0'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contas_a_pagar_e_receber_em_aberto_tipo_data_previsao', table_name='contas_a_pagar_e_receber')
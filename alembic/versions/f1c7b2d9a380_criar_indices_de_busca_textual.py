@@ -0,0 +1,54 @@
+"""criar indices de busca textual
+
+Revision ID: f1c7b2d9a380
+Revises: e5a9c3b7d104
+Create Date: 2026-10-17 16:24:05.117842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c7b2d9a380'
+down_revision: Union[str, None] = 'e5a9c3b7d104'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUNAS_DE_BUSCA = (
+    ('contas_a_pagar_e_receber', 'descricao'),
+    ('fornecedor_cliente', 'nome'),
+)
+
+
+def upgrade() -> None:
+    dialeto = op.get_bind().dialect.name
+    if dialeto == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for tabela, coluna in COLUNAS_DE_BUSCA:
+            op.create_index(f'ix_{tabela}_{coluna}_trgm', tabela, [coluna], postgresql_using='gin', postgresql_ops={coluna: 'gin_trgm_ops'})
+    elif dialeto == 'sqlite':
+        for tabela, coluna in COLUNAS_DE_BUSCA:
+            fts = f'{tabela}_busca'
+            op.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({coluna}, content='{tabela}', content_rowid='id', tokenize='trigram')")
+            op.execute(f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {tabela} BEGIN "
+                       f"INSERT INTO {fts}(rowid, {coluna}) VALUES (new.id, new.{coluna}); END")
+            op.execute(f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {tabela} BEGIN "
+                       f"INSERT INTO {fts}({fts}, rowid, {coluna}) VALUES ('delete', old.id, old.{coluna}); END")
+            op.execute(f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {coluna} ON {tabela} BEGIN "
+                       f"INSERT INTO {fts}({fts}, rowid, {coluna}) VALUES ('delete', old.id, old.{coluna}); "
+                       f"INSERT INTO {fts}(rowid, {coluna}) VALUES (new.id, new.{coluna}); END")
+            # indexa as linhas que ja existem
+            op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialeto = op.get_bind().dialect.name
+    for tabela, coluna in COLUNAS_DE_BUSCA:
+        if dialeto == 'postgresql':
+            op.drop_index(f'ix_{tabela}_{coluna}_trgm', table_name=tabela)
+        elif dialeto == 'sqlite':
+            for sufixo in ('ai', 'ad', 'au'):
+                op.execute(f'DROP TRIGGER IF EXISTS {tabela}_busca_{sufixo}')
+            op.execute(f'DROP TABLE IF EXISTS {tabela}_busca')
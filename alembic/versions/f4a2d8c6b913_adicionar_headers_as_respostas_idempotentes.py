@@ -0,0 +1,26 @@
+"""adicionar headers as respostas idempotentes
+
+Revision ID: f4a2d8c6b913
+Revises: e3b8c6f2a715
+Create Date: 2026-10-17 18:04:12.381946
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4a2d8c6b913'
+down_revision: Union[str, None] = 'e3b8c6f2a715'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('respostas_idempotentes', sa.Column('headers', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('respostas_idempotentes', 'headers')
@@ -0,0 +1,84 @@
+"""Compara contas criadas/baixadas por segundo entre os endpoints unitarios e os de lote.
+
+Uso: python -m benchmarks.bench_criacao_em_lote [quantidade_de_contas] [tamanho_do_lote]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from benchmarks.dados import cria_banco, popula_banco
+
+from fastapi.testclient import TestClient
+
+from contas_a_pagar_e_receber.services import cota_mensal_service
+from main import app
+from shared.dependencies import get_db
+
+
+def gera_contas(quantidade: int) -> list[dict]:
+    inicio = date(2024, 1, 1)
+    return [
+        {
+            "descricao": f"Importada {i}",
+            "valor": 100 + i % 900,
+            "tipo": "PAGAR" if i % 3 else "RECEBER",
+            "data_previsao": (inicio + timedelta(days=i % 365)).isoformat(),
+            "fornecedor_cliente_id": 1 + i % 100,
+        }
+        for i in range(quantidade)
+    ]
+
+
+def executa(quantidade: int, tamanho_do_lote: int) -> None:
+    cota_mensal_service.LIMITE_CONTAS_POR_MES = 10 ** 9
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine, SessionLocal = cria_banco(f"sqlite:///{os.path.join(diretorio, 'bench.db')}")
+        popula_banco(engine, quantidade_fornecedores=100, quantidade_contas=0)
+
+        def override_get_db():
+            db = SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        client = TestClient(app)
+        contas = gera_contas(quantidade)
+
+        inicio = time.perf_counter()
+        ids = [client.post("/contas-a-pagar-e-receber", json=conta).json()["id"] for conta in contas]
+        unitario = quantidade / (time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        for id_da_conta in ids:
+            client.post(f"/contas-a-pagar-e-receber/{id_da_conta}/baixar")
+        baixa_unitaria = quantidade / (time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        ids = []
+        for deslocamento in range(0, quantidade, tamanho_do_lote):
+            resultados = client.post("/contas-a-pagar-e-receber/bulk", json=contas[deslocamento:deslocamento + tamanho_do_lote]).json()
+            ids.extend(resultado["conta"]["id"] for resultado in resultados)
+        em_lote = quantidade / (time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        for deslocamento in range(0, quantidade, tamanho_do_lote):
+            client.post("/contas-a-pagar-e-receber/baixar/bulk", json=ids[deslocamento:deslocamento + tamanho_do_lote])
+        baixa_em_lote = quantidade / (time.perf_counter() - inicio)
+
+        print(f"contas: {quantidade}, lote: {tamanho_do_lote}")
+        print(f"criacao unitaria: {unitario:10.1f} linhas/s")
+        print(f"criacao em lote:  {em_lote:10.1f} linhas/s ({em_lote / unitario:.1f}x)")
+        print(f"baixa unitaria:   {baixa_unitaria:10.1f} linhas/s")
+        print(f"baixa em lote:    {baixa_em_lote:10.1f} linhas/s ({baixa_em_lote / baixa_unitaria:.1f}x)")
+
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    executa(int(sys.argv[1]) if len(sys.argv) > 1 else 5000, int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
@@ -0,0 +1,83 @@
+"""Mede o pico de memoria de /contas-a-pagar-e-receber/export conforme a tabela cresce.
+
+Uso: python -m benchmarks.bench_exportacao [tamanhos...]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.dados import cria_banco, popula_banco
+
+from main import app
+from shared.dependencies import get_db
+
+
+async def _chama_app(formato: str) -> int:
+    # o TestClient acumula o corpo inteiro em memoria, entao a aplicacao
+    # ASGI e chamada diretamente contando apenas os bytes recebidos
+    recebidos = 0
+    escopo = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/contas-a-pagar-e-receber/export", "raw_path": b"/contas-a-pagar-e-receber/export",
+        "query_string": f"formato={formato}".encode(), "headers": [], "server": ("teste", 80), "client": ("teste", 1234),
+        "root_path": "",
+    }
+
+    corpo_lido = False
+    desconectado = asyncio.Event()
+
+    async def receive():
+        nonlocal corpo_lido
+        if not corpo_lido:
+            corpo_lido = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await desconectado.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(mensagem):
+        nonlocal recebidos
+        if mensagem["type"] == "http.response.body":
+            recebidos += len(mensagem.get("body", b""))
+
+    await app(escopo, receive, send)
+    return recebidos
+
+
+def mede(formato: str) -> tuple[float, float, int]:
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    recebidos = asyncio.run(_chama_app(formato))
+    duracao = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duracao, pico / 1024 / 1024, recebidos
+
+
+def executa(tamanhos: list[int]) -> None:
+    print(f"{'linhas':>10} {'formato':>8} {'tempo':>10} {'pico':>10} {'bytes':>12}")
+    for tamanho in tamanhos:
+        with tempfile.TemporaryDirectory() as diretorio:
+            engine, SessionLocal = cria_banco(f"sqlite:///{os.path.join(diretorio, 'bench.db')}")
+            popula_banco(engine, quantidade_fornecedores=100, quantidade_contas=tamanho)
+
+            def override_get_db():
+                db = SessionLocal()
+                try:
+                    yield db
+                finally:
+                    db.close()
+
+            app.dependency_overrides[get_db] = override_get_db
+            for formato in ("ndjson", "csv"):
+                duracao, pico, recebidos = mede(formato)
+                print(f"{tamanho:>10} {formato:>8} {duracao:>9.2f}s {pico:>8.2f}MB {recebidos:>12}")
+
+            app.dependency_overrides.clear()
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    executa([int(tamanho) for tamanho in sys.argv[1:]] or [10_000, 100_000])
@@ -0,0 +1,58 @@
+"""Mede a latencia de GET /contas-a-pagar-e-receber conforme a tabela cresce.
+
+Uso: python -m benchmarks.bench_listagem_paginada [tamanhos...]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.dados import cria_banco, popula_banco
+
+from fastapi.testclient import TestClient
+
+from main import app
+from shared.dependencies import get_db
+
+REPETICOES = 50
+
+
+def mede(client: TestClient, params: dict) -> float:
+    tempos = []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        response = client.get("/contas-a-pagar-e-receber", params=params)
+        tempos.append(time.perf_counter() - inicio)
+        assert response.status_code == 200
+    return statistics.median(tempos) * 1000
+
+
+def executa(tamanhos: list[int]) -> None:
+    print(f"{'linhas':>10} {'1a pagina':>12} {'meio':>12} {'filtrada':>12}")
+    for tamanho in tamanhos:
+        with tempfile.TemporaryDirectory() as diretorio:
+            engine, SessionLocal = cria_banco(f"sqlite:///{os.path.join(diretorio, 'bench.db')}")
+            popula_banco(engine, quantidade_fornecedores=100, quantidade_contas=tamanho)
+
+            def override_get_db():
+                db = SessionLocal()
+                try:
+                    yield db
+                finally:
+                    db.close()
+
+            app.dependency_overrides[get_db] = override_get_db
+            client = TestClient(app)
+
+            primeira = mede(client, {"limit": 100})
+            meio = mede(client, {"limit": 100, "after": tamanho // 2})
+            filtrada = mede(client, {"limit": 100, "tipo": "RECEBER", "esta_baixada": False, "fornecedor_cliente_id": 7})
+            print(f"{tamanho:>10} {primeira:>10.2f}ms {meio:>10.2f}ms {filtrada:>10.2f}ms")
+
+            app.dependency_overrides.clear()
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    executa([int(tamanho) for tamanho in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,88 @@
+"""Compara requisicoes por segundo entre DATABASE_MODE=sync e DATABASE_MODE=async.
+
+Sobe um uvicorn para cada modo contra o mesmo banco populado e dispara GETs
+concorrentes. Por padrao usa um SQLite temporario; para medir contra Postgres:
+
+    BENCH_DATABASE_URL=postgresql://... BENCH_ASYNC_DATABASE_URL=postgresql+asyncpg://... \\
+        python -m benchmarks.bench_modo_assincrono [concorrencia] [segundos]
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.dados import cria_banco, popula_banco
+
+PORTA = 8765
+ROTAS = [
+    "/contas-a-pagar-e-receber?limit=20",
+    "/contas-a-pagar-e-receber/previsao-gastos-do-mes?ano=2023",
+    "/fornecedor-cliente/7/contas-a-pagar-e-receber",
+]
+
+
+def sobe_servidor(modo: str, url: str, url_async: str) -> subprocess.Popen:
+    ambiente = {**os.environ, "DATABASE_MODE": modo, "SQLALCHEMY_DATABASE_URL": url, "SQLALCHEMY_ASYNC_DATABASE_URL": url_async}
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(PORTA), "--log-level", "warning"],
+        env=ambiente,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{PORTA}/")
+            return processo
+        except httpx.TransportError:
+            time.sleep(0.1)
+    processo.terminate()
+    raise RuntimeError("servidor nao subiu")
+
+
+async def gera_carga(concorrencia: int, segundos: float) -> tuple[int, int]:
+    sucesso = 0
+    erro = 0
+    fim = time.perf_counter() + segundos
+
+    async def trabalhador(client: httpx.AsyncClient, indice: int):
+        nonlocal sucesso, erro
+        while time.perf_counter() < fim:
+            response = await client.get(ROTAS[indice % len(ROTAS)])
+            if response.status_code == 200:
+                sucesso += 1
+            else:
+                erro += 1
+            indice += 1
+
+    limites = httpx.Limits(max_connections=concorrencia)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORTA}", limits=limites, timeout=30) as client:
+        await asyncio.gather(*(trabalhador(client, indice) for indice in range(concorrencia)))
+
+    return sucesso, erro
+
+
+def executa(concorrencia: int, segundos: float) -> None:
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, "bench.db")
+        url = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{caminho}")
+        url_async = os.getenv("BENCH_ASYNC_DATABASE_URL", f"sqlite+aiosqlite:///{caminho}")
+
+        engine, _ = cria_banco(url)
+        popula_banco(engine, quantidade_fornecedores=100, quantidade_contas=50_000)
+        engine.dispose()
+
+        print(f"concorrencia: {concorrencia}, duracao: {segundos}s")
+        for modo in ("sync", "async"):
+            processo = sobe_servidor(modo, url, url_async)
+            try:
+                sucesso, erro = asyncio.run(gera_carga(concorrencia, segundos))
+            finally:
+                processo.terminate()
+                processo.wait()
+            print(f"{modo:>6}: {sucesso / segundos:8.1f} req/s ({erro} erros)")
+
+
+if __name__ == "__main__":
+    executa(int(sys.argv[1]) if len(sys.argv) > 1 else 64, float(sys.argv[2]) if len(sys.argv) > 2 else 10)
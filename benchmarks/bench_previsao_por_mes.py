@@ -0,0 +1,77 @@
+"""Compara o relatorio de previsao por mes antigo (agregacao em Python), o GROUP BY no banco e o atual (resumo_mensal).
+
+Uso: python -m benchmarks.bench_previsao_por_mes [quantidade_de_contas]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from datetime import date
+
+from benchmarks.dados import cria_banco, popula_banco
+
+from sqlalchemy import extract, func
+
+from contas_a_pagar_e_receber.models.conta_a_pagar_receber_model import ContaPagarReceber
+from contas_a_pagar_e_receber.routers.contas_a_pagar_e_receber_router import ContaPagarReceberTipoEnum, relatorio_gastos_previstos_por_mes_de_um_ano
+
+REPETICOES = 5
+ANO = 2023
+
+
+def relatorio_antigo(db, year):
+    contas_do_ano = db.query(ContaPagarReceber).filter(extract('year', ContaPagarReceber.data_previsao) == year).filter(ContaPagarReceber.tipo == ContaPagarReceberTipoEnum.PAGAR).order_by(ContaPagarReceber.data_previsao).all()
+
+    valor_por_mes = OrderedDict()
+
+    for conta_do_ano in contas_do_ano:
+        mes = conta_do_ano.data_previsao.month
+        valor = conta_do_ano.valor
+
+        if valor_por_mes.get(mes) is None:
+            valor_por_mes[mes] = valor
+
+        valor_por_mes[mes] += valor
+
+    return valor_por_mes
+
+
+def relatorio_group_by(db, year):
+    mes = extract('month', ContaPagarReceber.data_previsao)
+    return db.query(mes, func.sum(ContaPagarReceber.valor)) \
+        .filter(ContaPagarReceber.data_previsao >= date(year, 1, 1)) \
+        .filter(ContaPagarReceber.data_previsao < date(year + 1, 1, 1)) \
+        .filter(ContaPagarReceber.tipo == ContaPagarReceberTipoEnum.PAGAR) \
+        .group_by(mes).all()
+
+
+def mede(SessionLocal, relatorio) -> float:
+    tempos = []
+    for _ in range(REPETICOES):
+        with SessionLocal() as db:
+            inicio = time.perf_counter()
+            relatorio(db, ANO)
+            tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1000
+
+
+def executa(quantidade_contas: int) -> None:
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine, SessionLocal = cria_banco(f"sqlite:///{os.path.join(diretorio, 'bench.db')}")
+        popula_banco(engine, quantidade_fornecedores=100, quantidade_contas=quantidade_contas)
+
+        antigo = mede(SessionLocal, relatorio_antigo)
+        group_by = mede(SessionLocal, relatorio_group_by)
+        atual = mede(SessionLocal, relatorio_gastos_previstos_por_mes_de_um_ano)
+        print(f"contas: {quantidade_contas}")
+        print(f"antigo (Python):     {antigo:10.2f}ms")
+        print(f"GROUP BY:            {group_by:10.2f}ms ({antigo / group_by:.1f}x)")
+        print(f"atual (resumo_mensal): {atual:8.2f}ms ({antigo / atual:.1f}x)")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    executa(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
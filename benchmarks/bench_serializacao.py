@@ -0,0 +1,63 @@
+"""Mede a vazao de serializacao das listagens: caminho padrao (ORM + Pydantic + jsonable_encoder)
+contra o caminho rapido (tuplas de colunas + dicts + orjson).
+
+Uso: python -m benchmarks.bench_serializacao [tamanhos...]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+from benchmarks.dados import cria_banco, popula_banco
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from sqlalchemy.orm import selectinload
+
+from contas_a_pagar_e_receber.models.conta_a_pagar_receber_model import ContaPagarReceber
+from contas_a_pagar_e_receber.routers.contas_a_pagar_e_receber_router import ContaPagarReceberResponse, consulta_contas_rapida, resposta_rapida
+
+REPETICOES = 3
+ADAPTADOR = TypeAdapter(List[ContaPagarReceberResponse])
+
+
+def caminho_padrao(db, tamanho: int) -> bytes:
+    contas = db.query(ContaPagarReceber).options(selectinload(ContaPagarReceber.fornecedor)).order_by(ContaPagarReceber.id).limit(tamanho).all()
+    validadas = ADAPTADOR.validate_python(contas, from_attributes=True)
+    return json.dumps(jsonable_encoder(validadas)).encode()
+
+
+def caminho_rapido(db, tamanho: int) -> bytes:
+    contas = consulta_contas_rapida(db).order_by(ContaPagarReceber.id).limit(tamanho).all()
+    return resposta_rapida(contas, Response()).body
+
+
+def mede(SessionLocal, caminho, tamanho: int) -> float:
+    melhor = float("inf")
+    for _ in range(REPETICOES):
+        with SessionLocal() as db:
+            inicio = time.perf_counter()
+            caminho(db, tamanho)
+            melhor = min(melhor, time.perf_counter() - inicio)
+    return tamanho / melhor
+
+
+def executa(tamanhos: list[int]) -> None:
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine, SessionLocal = cria_banco(f"sqlite:///{os.path.join(diretorio, 'bench.db')}")
+        popula_banco(engine, quantidade_fornecedores=100, quantidade_contas=max(tamanhos))
+
+        print(f"{'linhas':>8} {'padrao':>14} {'rapido':>14} {'ganho':>7}")
+        for tamanho in tamanhos:
+            padrao = mede(SessionLocal, caminho_padrao, tamanho)
+            rapido = mede(SessionLocal, caminho_rapido, tamanho)
+            print(f"{tamanho:>8} {padrao:>10.0f} l/s {rapido:>10.0f} l/s {rapido / padrao:>6.1f}x")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    executa([int(tamanho) for tamanho in sys.argv[1:]] or [1_000, 10_000, 100_000])
@@ -0,0 +1,64 @@
+import os
+import random
+from datetime import date, timedelta
+
+os.environ.setdefault('SQLALCHEMY_DATABASE_URL', 'sqlite://')
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from contas_a_pagar_e_receber.models.conta_a_pagar_receber_model import ContaPagarReceber
+from contas_a_pagar_e_receber.models.fornecedor_cliente_model import FornecedorCliente
+from contas_a_pagar_e_receber.models.pagamento_model import Pagamento
+from contas_a_pagar_e_receber.services.cota_mensal_service import reconstroi_cota_mensal
+from contas_a_pagar_e_receber.services.resumo_mensal_service import reconstroi_resumo_mensal
+from shared.database import Base
+
+TAMANHO_DO_LOTE = 10_000
+DESCRICOES = ("Aluguel", "Energia", "Agua", "Internet", "Folha", "Imposto", "Manutencao", "Frete", "Material", "Venda")
+
+
+def cria_banco(url: str):
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    engine = create_engine(url, connect_args=connect_args)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autoflush=False, bind=engine, autocommit=False)
+
+
+def popula_banco(engine, quantidade_fornecedores: int, quantidade_contas: int, ano_inicial: int = 2021, anos: int = 4, semente: int = 42,
+                 fracao_baixada: float = 0.3) -> None:
+    aleatorio = random.Random(semente)
+    inicio = date(ano_inicial, 1, 1)
+    dias = (date(ano_inicial + anos, 1, 1) - inicio).days
+
+    with engine.begin() as conexao:
+        if quantidade_fornecedores:
+            conexao.execute(insert(FornecedorCliente), [{"nome": f"Fornecedor {i}"} for i in range(quantidade_fornecedores)])
+
+        for deslocamento in range(0, quantidade_contas, TAMANHO_DO_LOTE):
+            lote = []
+            for _ in range(min(TAMANHO_DO_LOTE, quantidade_contas - deslocamento)):
+                valor = aleatorio.randint(1, 10_000)
+                esta_baixada = aleatorio.random() < fracao_baixada
+                data_previsao = inicio + timedelta(days=aleatorio.randrange(dias))
+                lote.append({
+                    "descricao": f"{aleatorio.choice(DESCRICOES)} {deslocamento + len(lote)}",
+                    "valor": valor,
+                    "tipo": "PAGAR" if aleatorio.random() < 0.6 else "RECEBER",
+                    "data_previsao": data_previsao,
+                    "data_baixa": data_previsao if esta_baixada else None,
+                    "valor_baixa": valor if esta_baixada else None,
+                    "esta_baixada": esta_baixada,
+                    "fornecedor_cliente_id": aleatorio.randint(1, quantidade_fornecedores) if quantidade_fornecedores else None,
+                })
+            conexao.execute(insert(ContaPagarReceber), lote)
+
+        conexao.execute(insert(Pagamento).from_select(
+            ["conta_a_pagar_e_receber_id", "valor", "data_pagamento"],
+            select(ContaPagarReceber.id, ContaPagarReceber.valor_baixa, ContaPagarReceber.data_baixa).where(ContaPagarReceber.esta_baixada == True),
+        ))
+
+    with Session(engine) as db:
+        reconstroi_resumo_mensal(db)
+        reconstroi_cota_mensal(db)
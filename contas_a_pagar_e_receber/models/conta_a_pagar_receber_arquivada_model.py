@@ -0,0 +1,29 @@
+from shared.database import Base
+
+from sqlalchemy import Boolean, Column, Date, DateTime, ForeignKey, Index, Integer, Numeric, String
+from sqlalchemy.orm import relationship
+
+class ContaPagarReceberArquivada(Base):
+    """Contas fora da tabela principal: baixadas antigas, movidas pelo arquivamento, e excluidas."""
+    __tablename__ = "contas_a_pagar_e_receber_arquivadas"
+
+    # o mesmo id que a conta tinha na tabela principal
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    descricao = Column(String(30))
+    valor = Column(Numeric)
+    tipo = Column(String(30))
+    data_previsao = Column(Date(), nullable = False)
+    data_baixa = Column(Date())
+    valor_baixa = Column(Numeric)
+    esta_baixada = Column(Boolean, default=False)
+    fornecedor_cliente_id = Column(Integer, ForeignKey("fornecedor_cliente.id"))
+    fornecedor = relationship("FornecedorCliente")
+    versao = Column(Integer, nullable=False)
+    arquivada_em = Column(DateTime, nullable=False)
+    # exclusao logica: a conta fica guardada, mas nenhuma leitura nem resumo a considera
+    excluida_em = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_contas_a_pagar_e_receber_arquivadas_fornecedor_cliente_id_id", "fornecedor_cliente_id", "id"),
+        Index("ix_contas_a_pagar_e_receber_arquivadas_data_previsao_id", "data_previsao", "id"),
+    )
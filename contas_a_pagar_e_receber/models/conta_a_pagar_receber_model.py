@@ -1,8 +1,11 @@
+from shared.busca_textual import indexa_para_busca
 from shared.database import Base
 
-from sqlalchemy import Boolean, Column, Date, Integer, String, Numeric, ForeignKey
+from sqlalchemy import Boolean, Column, Date, Index, Integer, String, Numeric, ForeignKey, text
 from sqlalchemy.orm import relationship
 
+from contas_a_pagar_e_receber.models.pagamento_model import Pagamento
+
 class ContaPagarReceber(Base):
     __tablename__ = "contas_a_pagar_e_receber"
 
@@ -15,4 +18,31 @@ class ContaPagarReceber(Base):
     valor_baixa = Column(Numeric)
     esta_baixada = Column(Boolean, default=False)
     fornecedor_cliente_id = Column(Integer, ForeignKey("fornecedor_cliente.id"))
-    fornecedor = relationship("FornecedorCliente")
\ No newline at end of file
+    fornecedor = relationship("FornecedorCliente")
+    # o historico fica em pagamentos; valor_baixa e esta_baixada sao mantidos aqui como resumo dele
+    pagamentos = relationship(Pagamento, cascade="all, delete-orphan", order_by=Pagamento.id)
+    # o UPDATE leva "AND versao = <lida>"; se outra requisicao gravou antes, o flush falha com StaleDataError
+    versao = Column(Integer, nullable=False, server_default=text("1"))
+
+    __table_args__ = (
+        Index("ix_contas_a_pagar_e_receber_tipo_id", "tipo", "id"),
+        Index("ix_contas_a_pagar_e_receber_esta_baixada_id", "esta_baixada", "id"),
+        Index("ix_contas_a_pagar_e_receber_data_previsao_id", "data_previsao", "id"),
+        Index("ix_contas_a_pagar_e_receber_fornecedor_cliente_id_id", "fornecedor_cliente_id", "id"),
+        Index("ix_contas_a_pagar_e_receber_tipo_data_previsao", "tipo", "data_previsao", postgresql_include=["valor"]),
+        # so as contas em aberto: menor que o indice completo quando a maior parte ja foi baixada. Com
+        # fornecedor_cliente_id no fim ele cobre tambem o aging, que busca data_previsao em cada tipo
+        Index("ix_contas_a_pagar_e_receber_em_aberto_tipo_data_previsao", "tipo", "data_previsao", "valor", "valor_baixa", "fornecedor_cliente_id",
+              postgresql_where=text("esta_baixada = false"), sqlite_where=text("esta_baixada = 0")),
+        # saldo em aberto por fornecedor (e por mes dentro dele) sem ler a tabela nem o historico de pagamentos;
+        # valor e valor_baixa vao na chave porque o SQLite nao tem INCLUDE
+        Index("ix_contas_a_pagar_e_receber_em_aberto_fornecedor_cliente_id", "fornecedor_cliente_id", "data_previsao", "valor", "valor_baixa",
+              postgresql_where=text("esta_baixada = false"), sqlite_where=text("esta_baixada = 0")),
+        # ids nao sao reaproveitados no SQLite: uma conta arquivada ou excluida continua com o seu
+        {"sqlite_autoincrement": True},
+    )
+
+    __mapper_args__ = {"version_id_col": versao}
+
+
+indexa_para_busca(ContaPagarReceber.__table__, "descricao")
@@ -0,0 +1,10 @@
+from shared.database import Base
+
+from sqlalchemy import Column, Integer
+
+class CotaMensal(Base):
+    __tablename__ = "cota_mensal"
+
+    ano = Column(Integer, primary_key=True)
+    mes = Column(Integer, primary_key=True)
+    quantidade = Column(Integer, nullable=False, default=0)
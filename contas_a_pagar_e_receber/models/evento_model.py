@@ -0,0 +1,21 @@
+from shared.database import Base
+
+from sqlalchemy import JSON, Column, DateTime, Index, Integer, String
+
+class Evento(Base):
+    """Outbox: uma linha por escrita em conta ou fornecedor, gravada na mesma transacao da escrita."""
+    __tablename__ = "eventos"
+
+    # o cursor dos consumidores; os ids seguem a ordem de commit (ver evento_service)
+    id = Column(Integer, primary_key=True)
+    entidade = Column(String(30), nullable=False)
+    entidade_id = Column(Integer, nullable=False)
+    operacao = Column(String(30), nullable=False)
+    dados = Column(JSON)
+    criado_em = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_eventos_criado_em", "criado_em"),
+        # ids nao sao reaproveitados no SQLite depois da limpeza dos eventos antigos
+        {"sqlite_autoincrement": True},
+    )
@@ -1,9 +1,16 @@
+from shared.busca_textual import indexa_para_busca
 from shared.database import Base
 
-from sqlalchemy import Column, Integer, String, Numeric
+from sqlalchemy import Column, Integer, String, Numeric, text
 
 class FornecedorCliente(Base):
     __tablename__ = "fornecedor_cliente"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    nome = Column(String(255))
\ No newline at end of file
+    nome = Column(String(255))
+    versao = Column(Integer, nullable=False, server_default=text("1"))
+
+    __mapper_args__ = {"version_id_col": versao}
+
+
+indexa_para_busca(FornecedorCliente.__table__, "nome")
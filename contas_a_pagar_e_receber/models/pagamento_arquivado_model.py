@@ -0,0 +1,15 @@
+from shared.database import Base
+
+from sqlalchemy import Column, Date, ForeignKey, Index, Integer, Numeric
+
+class PagamentoArquivado(Base):
+    __tablename__ = "pagamentos_arquivados"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    conta_a_pagar_e_receber_id = Column(Integer, ForeignKey("contas_a_pagar_e_receber_arquivadas.id", ondelete="CASCADE"), nullable=False)
+    valor = Column(Numeric, nullable=False)
+    data_pagamento = Column(Date(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_pagamentos_arquivados_conta_a_pagar_e_receber_id_id", "conta_a_pagar_e_receber_id", "id"),
+    )
@@ -0,0 +1,15 @@
+from shared.database import Base
+
+from sqlalchemy import Column, Date, ForeignKey, Index, Integer, Numeric
+
+class Pagamento(Base):
+    __tablename__ = "pagamentos"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    conta_a_pagar_e_receber_id = Column(Integer, ForeignKey("contas_a_pagar_e_receber.id", ondelete="CASCADE"), nullable=False)
+    valor = Column(Numeric, nullable=False)
+    data_pagamento = Column(Date(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_pagamentos_conta_a_pagar_e_receber_id_id", "conta_a_pagar_e_receber_id", "id"),
+    )
@@ -0,0 +1,24 @@
+from shared.database import Base
+
+from sqlalchemy import Column, Date, ForeignKey, Index, Integer, Numeric, String, text
+from sqlalchemy.orm import relationship
+
+class RegraRecorrencia(Base):
+    """Conta que se repete (aluguel, salarios). As ocorrencias nao sao gravadas nem contam na cota do mes."""
+    __tablename__ = "regras_recorrencia"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    descricao = Column(String(30))
+    valor = Column(Numeric, nullable=False)
+    tipo = Column(String(30), nullable=False)
+    fornecedor_cliente_id = Column(Integer, ForeignKey("fornecedor_cliente.id"))
+    fornecedor = relationship("FornecedorCliente")
+    # DIARIA, SEMANAL, MENSAL ou ANUAL, a cada intervalo periodos; a primeira ocorrencia e data_inicio
+    frequencia = Column(String(10), nullable=False)
+    intervalo = Column(Integer, nullable=False, server_default=text("1"))
+    data_inicio = Column(Date(), nullable=False)
+    data_fim = Column(Date())
+
+    __table_args__ = (
+        Index("ix_regras_recorrencia_fornecedor_cliente_id_id", "fornecedor_cliente_id", "id"),
+    )
@@ -0,0 +1,17 @@
+from shared.database import Base
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+
+class RespostaIdempotente(Base):
+    __tablename__ = "respostas_idempotentes"
+
+    chave = Column(String(255), primary_key=True)
+    impressao = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=False)
+    corpo = Column(Text, nullable=False)
+    headers = Column(Text)
+    expira_em = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_respostas_idempotentes_expira_em", "expira_em"),
+    )
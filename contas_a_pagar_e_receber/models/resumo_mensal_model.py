@@ -0,0 +1,13 @@
+from shared.database import Base
+
+from sqlalchemy import Column, Integer, String, Numeric
+
+class ResumoMensal(Base):
+    __tablename__ = "resumo_mensal"
+
+    ano = Column(Integer, primary_key=True)
+    mes = Column(Integer, primary_key=True)
+    tipo = Column(String(30), primary_key=True)
+    quantidade = Column(Integer, nullable=False, default=0)
+    valor_total = Column(Numeric, nullable=False, default=0)
+    valor_baixa_total = Column(Numeric, nullable=False, default=0)
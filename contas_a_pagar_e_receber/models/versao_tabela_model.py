@@ -0,0 +1,9 @@
+from shared.database import Base
+
+from sqlalchemy import Column, Integer, String
+
+class VersaoTabela(Base):
+    __tablename__ = "versao_tabela"
+
+    tabela = Column(String(63), primary_key=True)
+    versao = Column(Integer, nullable=False, default=0)
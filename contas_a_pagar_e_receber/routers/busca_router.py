@@ -0,0 +1,67 @@
+from enum import Enum
+from typing import List
+from fastapi import APIRouter, Depends, Query, Response
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from contas_a_pagar_e_receber.models.conta_a_pagar_receber_model import ContaPagarReceber
+from contas_a_pagar_e_receber.models.fornecedor_cliente_model import FornecedorCliente
+from shared.busca_textual import TAMANHO_MINIMO_DO_TERMO, consulta_busca
+from shared.dependencies import get_db
+from shared.rotas_assincronas import converte_para_async
+
+router = APIRouter(prefix="/busca")
+
+# resultados ordenados por relevancia nao tem um cursor estavel como o id,
+# entao a paginacao e por offset, limitada para nao ordenar o resultado inteiro
+OFFSET_MAXIMO = 1000
+
+
+class TipoResultadoBuscaEnum(str, Enum):
+    CONTA = 'conta'
+    FORNECEDOR = 'fornecedor'
+
+
+class ResultadoBusca(BaseModel):
+    tipo: TipoResultadoBuscaEnum
+    id: int
+    texto: str
+    relevancia: float
+
+
+COLUNAS_DE_BUSCA = {
+    TipoResultadoBuscaEnum.CONTA: (ContaPagarReceber.id, ContaPagarReceber.descricao),
+    TipoResultadoBuscaEnum.FORNECEDOR: (FornecedorCliente.id, FornecedorCliente.nome),
+}
+
+
+@router.get("", response_model=List[ResultadoBusca])
+def buscar(response: Response,
+           q: str = Query(min_length=TAMANHO_MINIMO_DO_TERMO, max_length=100),
+           tipo: TipoResultadoBuscaEnum | None = None,
+           limit: int = Query(default=20, ge=1, le=100),
+           offset: int = Query(default=0, ge=0, le=OFFSET_MAXIMO),
+           db: Session = Depends(get_db)) -> List[ResultadoBusca]:
+    resultados = busca_textual(db, q.strip(), [tipo] if tipo else list(COLUNAS_DE_BUSCA), offset + limit + 1)[offset:]
+
+    if len(resultados) > limit:
+        resultados = resultados[:limit]
+        response.headers["X-Next-Offset"] = str(offset + limit)
+
+    return resultados
+
+
+def busca_textual(db: Session, termo: str, tipos: List[TipoResultadoBuscaEnum], quantidade: int) -> List[ResultadoBusca]:
+    dialeto = db.get_bind().dialect.name
+    resultados = []
+    # cada indice devolve so os seus melhores; a mistura das duas listas e feita aqui
+    for tipo in tipos:
+        chave, coluna = COLUNAS_DE_BUSCA[tipo]
+        for linha in db.execute(consulta_busca(dialeto, chave, coluna, termo).limit(quantidade)):
+            resultados.append(ResultadoBusca(tipo=tipo, id=linha.id, texto=linha.texto, relevancia=linha.relevancia))
+
+    resultados.sort(key=lambda resultado: (-resultado.relevancia, resultado.tipo.value, resultado.id))
+    return resultados[:quantidade]
+
+
+async_router = converte_para_async(router)
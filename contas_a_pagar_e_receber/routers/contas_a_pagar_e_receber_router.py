@@ -1,20 +1,81 @@
-from datetime import date
-from typing import List, OrderedDict
-from fastapi import APIRouter, Depends, HTTPException
+import csv
+import io
+import json
+import os
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Annotated, Callable, Dict, List, NamedTuple, Sequence
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from sqlalchemy import extract
-from sqlalchemy.orm import Session
+from sqlalchemy import Numeric, case, func, insert, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
 
+from contas_a_pagar_e_receber.models.conta_a_pagar_receber_arquivada_model import ContaPagarReceberArquivada
 from contas_a_pagar_e_receber.models.conta_a_pagar_receber_model import ContaPagarReceber
 from contas_a_pagar_e_receber.models.fornecedor_cliente_model import FornecedorCliente
-from contas_a_pagar_e_receber.routers.fornecedor_cliente_router import FornecedorClienteResponse
-from shared.dependencies import get_db
+from contas_a_pagar_e_receber.models.resumo_mensal_model import ResumoMensal
+from contas_a_pagar_e_receber.routers.fornecedor_cliente_router import FornecedorClienteResponse, obtem_fornecedor_cliente, trata_fornecedor_cliente_excluido
+from contas_a_pagar_e_receber.services import arquivamento_service, cota_mensal_service, evento_service, idempotencia_service, pagamento_service, projecao_service, resumo_mensal_service, versao_tabela_service
+from shared.cache_http import etag_da_versao, verifica_if_match
+from shared.dependencies import get_async_db, get_db
 from enum import Enum
 
 from shared.exceptions import NotFound
+from shared.rotas_assincronas import converte_para_async
 
 router = APIRouter(prefix="/contas-a-pagar-e-receber")
 
+TAMANHO_DO_LOTE_EXPORTACAO = 1000
+TAMANHO_MAXIMO_DO_LOTE = 5000
+RESPOSTA_RAPIDA_PADRAO = os.getenv("RESPOSTA_RAPIDA", "false").lower() == "true"
+CACHE_CONTROL_LISTAGEM = os.getenv("CACHE_CONTROL_CONTAS", "no-cache")
+CACHE_CONTROL_PREVISAO = os.getenv("CACHE_CONTROL_PREVISAO", "no-cache")
+
+# retentativas com o mesmo Idempotency-Key devolvem a resposta guardada sem rodar o handler de novo
+IDEMPOTENCY_KEY = Header(default=None, alias="Idempotency-Key", min_length=1, max_length=255)
+# ETag da versao do registro, devolvido no GET por id; com ele a escrita falha com 409 se o registro mudou
+IF_MATCH = Header(default=None, alias="If-Match")
+
+PERIODO_PADRAO_DA_PROJECAO = timedelta(days=364)
+PERIODO_MAXIMO_DA_PROJECAO = timedelta(days=10 * 366)
+
+# (nome, dias de atraso minimos, maximos), em ordem; None deixa a ultima faixa aberta
+FAIXAS_AGING = (
+    ("0-30", 0, 30),
+    ("31-60", 31, 60),
+    ("61-90", 61, 90),
+    ("90+", 91, None),
+)
+
+COLUNAS_EXPORTACAO = (
+    ContaPagarReceber.id,
+    ContaPagarReceber.descricao,
+    ContaPagarReceber.valor,
+    ContaPagarReceber.tipo,
+    ContaPagarReceber.data_previsao,
+    ContaPagarReceber.data_baixa,
+    ContaPagarReceber.valor_baixa,
+    ContaPagarReceber.esta_baixada,
+    ContaPagarReceber.fornecedor_cliente_id,
+)
+
+COLUNAS_RESPOSTA_RAPIDA = (
+    ContaPagarReceber.id,
+    ContaPagarReceber.descricao,
+    ContaPagarReceber.valor,
+    ContaPagarReceber.tipo,
+    ContaPagarReceber.data_previsao,
+    ContaPagarReceber.data_baixa,
+    ContaPagarReceber.valor_baixa,
+    ContaPagarReceber.esta_baixada,
+    FornecedorCliente.id.label("fornecedor_id"),
+    FornecedorCliente.nome.label("fornecedor_nome"),
+)
+
 class ContaPagarReceberTipoEnum(str, Enum):
     PAGAR = 'PAGAR'
     RECEBER = 'RECEBER'
@@ -41,28 +102,131 @@ class ContaPagarReceberRequest(BaseModel):
     fornecedor_cliente_id: int | None = None
     data_previsao: date
 
+class FormatoExportacaoEnum(str, Enum):
+    NDJSON = 'ndjson'
+    CSV = 'csv'
+
 class PrevisaoPorMes(BaseModel):
     mes: int
-    valor_total: int
-
+    valor_total: float
 
-@router.get("", response_model=List[ContaPagarReceberResponse])
-def listar_contas(db: Session = Depends(get_db)) -> List[ContaPagarReceberResponse]:
-    return db.query(ContaPagarReceber).all()
+class AgrupamentoAgingEnum(str, Enum):
+    FORNECEDOR = 'fornecedor'
+    TIPO = 'tipo'
 
+class FaixaAging(BaseModel):
+    faixa: str
+    quantidade: int
+    saldo: float
 
-@router.get("/previsao-gastos-do-mes", response_model=List[PrevisaoPorMes])
-def previsao_de_gastos_por_mes(db: Session = Depends(get_db), ano = date.today().year) -> List[PrevisaoPorMes]:
-    return relatorio_gastos_previstos_por_mes_de_um_ano(db, ano)
+class LinhaAging(BaseModel):
+    fornecedor_cliente_id: int | None = None
+    tipo: str | None = None
+    faixas: List[FaixaAging]
+    saldo_total: float
+
+class DiaFluxoDeCaixa(BaseModel):
+    data: date
+    entradas: float
+    saidas: float
+    saldo: float
+
+class ResultadoItemLote(BaseModel):
+    indice: int
+    sucesso: bool
+    conta: ContaPagarReceberResponse | None = None
+    erro: str | None = None
+
+
+@router.get("", response_model=List[ContaPagarReceberResponse],
+            dependencies=[versao_tabela_service.etag_das_tabelas(versao_tabela_service.CONTAS, versao_tabela_service.FORNECEDORES, cache_control=CACHE_CONTROL_LISTAGEM)])
+def listar_contas(response: Response,
+                  limit: int = Query(default=100, ge=1, le=1000),
+                  after: int | None = None,
+                  tipo: ContaPagarReceberTipoEnum | None = None,
+                  esta_baixada: bool | None = None,
+                  data_previsao_inicio: date | None = None,
+                  data_previsao_fim: date | None = None,
+                  fornecedor_cliente_id: int | None = None,
+                  incluir_arquivadas: bool = False,
+                  rapido: bool = Query(default=RESPOSTA_RAPIDA_PADRAO, include_in_schema=False),
+                  db: Session = Depends(get_db)) -> List[ContaPagarReceberResponse]:
+    return pagina_de_contas(db, response, limit, after, rapido, incluir_arquivadas,
+                            tipo=tipo, esta_baixada=esta_baixada, data_previsao_inicio=data_previsao_inicio,
+                            data_previsao_fim=data_previsao_fim, fornecedor_cliente_id=fornecedor_cliente_id)
+
+
+@router.get("/export", response_class=StreamingResponse)
+def exportar_contas(formato: FormatoExportacaoEnum = FormatoExportacaoEnum.NDJSON,
+                    tipo: ContaPagarReceberTipoEnum | None = None,
+                    esta_baixada: bool | None = None,
+                    data_previsao_inicio: date | None = None,
+                    data_previsao_fim: date | None = None,
+                    fornecedor_cliente_id: int | None = None,
+                    incluir_arquivadas: bool = False,
+                    db: Session = Depends(get_db)) -> StreamingResponse:
+    consulta = _consulta_exportacao(tipo, esta_baixada, data_previsao_inicio, data_previsao_fim, fornecedor_cliente_id, incluir_arquivadas)
+    formatador = FORMATADORES_EXPORTACAO[formato]
+    return StreamingResponse(_gera_exportacao(consulta, db, formatador), media_type=formatador.media_type)
+
+
+async def exportar_contas_async(formato: FormatoExportacaoEnum = FormatoExportacaoEnum.NDJSON,
+                                tipo: ContaPagarReceberTipoEnum | None = None,
+                                esta_baixada: bool | None = None,
+                                data_previsao_inicio: date | None = None,
+                                data_previsao_fim: date | None = None,
+                                fornecedor_cliente_id: int | None = None,
+                                incluir_arquivadas: bool = False,
+                                db: AsyncSession = Depends(get_async_db)) -> StreamingResponse:
+    consulta = _consulta_exportacao(tipo, esta_baixada, data_previsao_inicio, data_previsao_fim, fornecedor_cliente_id, incluir_arquivadas)
+    formatador = FORMATADORES_EXPORTACAO[formato]
+    return StreamingResponse(_gera_exportacao_async(consulta, db, formatador), media_type=formatador.media_type)
+
+
+@router.get("/previsao-gastos-do-mes", response_model=List[PrevisaoPorMes],
+            dependencies=[versao_tabela_service.etag_das_tabelas(versao_tabela_service.CONTAS, cache_control=CACHE_CONTROL_PREVISAO)])
+def previsao_de_gastos_por_mes(db: Session = Depends(get_db),
+                               ano: int | None = None,
+                               tipo: ContaPagarReceberTipoEnum = ContaPagarReceberTipoEnum.PAGAR,
+                               fluxo_liquido: bool = False) -> List[PrevisaoPorMes]:
+    return relatorio_gastos_previstos_por_mes_de_um_ano(db, ano or date.today().year, tipo, fluxo_liquido)
+
+
+@router.get("/relatorios/aging", response_model=List[LinhaAging])
+def relatorio_aging(agrupar_por: List[AgrupamentoAgingEnum] = Query(default=[]),
+                    tipo: ContaPagarReceberTipoEnum | None = None,
+                    data_base: date | None = None,
+                    db: Session = Depends(get_db)) -> List[LinhaAging]:
+    return relatorio_aging_de_contas_em_aberto(db, data_base or date.today(), set(agrupar_por), tipo)
+
+
+@router.get("/projecao-fluxo-de-caixa", response_model=List[DiaFluxoDeCaixa])
+def projecao_fluxo_de_caixa(data_inicio: date | None = None,
+                            data_fim: date | None = None,
+                            saldo_inicial: int = 0,
+                            db: Session = Depends(get_db)) -> List[DiaFluxoDeCaixa]:
+    inicio = data_inicio or date.today()
+    fim = data_fim or inicio + PERIODO_PADRAO_DA_PROJECAO
+    if fim < inicio or fim - inicio > PERIODO_MAXIMO_DA_PROJECAO:
+        raise HTTPException(status_code=422, detail="O periodo da projecao deve ter entre 1 dia e 10 anos")
+
+    return projecao_service.projeta_fluxo_de_caixa(db, inicio, fim, Decimal(saldo_inicial))
 
 
 @router.get("/{id_da_conta_a_pagar_e_receber}", response_model=ContaPagarReceberResponse)
-def listar_contas_por_id(id_da_conta_a_pagar_e_receber: int ,db: Session = Depends(get_db)) -> ContaPagarReceberResponse:
-    conta_a_pagar_e_receber: ContaPagarReceber = busca_conta_por_id(id_da_conta_a_pagar_e_receber, db)
+def listar_contas_por_id(id_da_conta_a_pagar_e_receber: int, response: Response,
+                         incluir_arquivadas: bool = False,
+                         db: Session = Depends(get_db)) -> ContaPagarReceberResponse:
+    conta_a_pagar_e_receber = busca_conta_por_id(id_da_conta_a_pagar_e_receber, db, incluir_arquivadas)
+    response.headers["ETag"] = etag_da_versao(conta_a_pagar_e_receber.versao)
     return conta_a_pagar_e_receber
 
 @router.post("", response_model=ContaPagarReceberResponse, status_code=201)
-def criar_conta(conta: ContaPagarReceberRequest, db: Session = Depends(get_db)) -> ContaPagarReceberResponse:
+def criar_conta(conta: ContaPagarReceberRequest, response: Response, idempotency_key: str | None = IDEMPOTENCY_KEY, db: Session = Depends(get_db)) -> ContaPagarReceberResponse:
+    requisicao = idempotencia_service.requisicao_idempotente(idempotency_key, "criar_conta", conta)
+    repetida = idempotencia_service.resposta_guardada(db, requisicao)
+    if repetida is not None:
+        return repetida
 
     _valida_fornecedor(conta.fornecedor_cliente_id, db)
 
@@ -74,59 +238,351 @@ def criar_conta(conta: ContaPagarReceberRequest, db: Session = Depends(get_db))
 
 
     db.add(contas_a_pagar_receber)
+    resumo_mensal_service.registra_conta(db, contas_a_pagar_receber)
+    versao_tabela_service.incrementa_versao(db, versao_tabela_service.CONTAS)
+    with trata_fornecedor_cliente_excluido(conta.fornecedor_cliente_id):
+        db.flush()
+    evento_service.registra_evento(db, evento_service.CONTA, evento_service.CRIACAO, contas_a_pagar_receber.id, dados_do_evento(contas_a_pagar_receber))
+    repetida = idempotencia_service.guarda_resposta(db, requisicao, 201, ContaPagarReceberResponse.model_validate(contas_a_pagar_receber, from_attributes=True),
+                                                    {"ETag": etag_da_versao(contas_a_pagar_receber.versao)})
+    if repetida is not None:
+        return repetida
     db.commit()
     db.refresh(contas_a_pagar_receber)
+    response.headers["ETag"] = etag_da_versao(contas_a_pagar_receber.versao)
 
     return contas_a_pagar_receber
 
 def _valida_fornecedor(fornecedor_cliente_id, db):
-    if fornecedor_cliente_id is not None:
-        fornecedor = db.query(FornecedorCliente).get(fornecedor_cliente_id)
-        if fornecedor is None:
-            raise HTTPException(status_code=422, detail="Esse fornecedor não existe")
+    if fornecedor_cliente_id is not None and obtem_fornecedor_cliente(fornecedor_cliente_id, db) is None:
+        raise HTTPException(status_code=422, detail="Esse fornecedor não existe")
 
 @router.put("/{id_da_conta_a_pagar_e_receber}", response_model=ContaPagarReceberResponse, status_code=200)
-def atualizar_conta(id_da_conta_a_pagar_e_receber: int , conta: ContaPagarReceberRequest, db: Session = Depends(get_db)) -> ContaPagarReceberResponse:
+def atualizar_conta(id_da_conta_a_pagar_e_receber: int , conta: ContaPagarReceberRequest, response: Response,
+                    if_match: str | None = IF_MATCH, db: Session = Depends(get_db)) -> ContaPagarReceberResponse:
     
     _valida_fornecedor(conta.fornecedor_cliente_id, db)
     conta_a_pagar_e_receber: ContaPagarReceber = busca_conta_por_id(id_da_conta_a_pagar_e_receber, db)
+    verifica_if_match(if_match, conta_a_pagar_e_receber.versao, "conta a pagar e receber")
+    resumo_mensal_service.remove_conta(db, conta_a_pagar_e_receber)
     conta_a_pagar_e_receber.tipo = conta.tipo
     conta_a_pagar_e_receber.descricao = conta.descricao
     conta_a_pagar_e_receber.valor = conta.valor
     conta_a_pagar_e_receber.fornecedor_cliente_id = conta.fornecedor_cliente_id
+    pagamento_service.atualiza_situacao(conta_a_pagar_e_receber)
 
     db.add(conta_a_pagar_e_receber)
+    resumo_mensal_service.registra_conta(db, conta_a_pagar_e_receber)
+    versao_tabela_service.incrementa_versao(db, versao_tabela_service.CONTAS)
+    with trata_fornecedor_cliente_excluido(conta.fornecedor_cliente_id):
+        db.flush()
+    evento_service.registra_evento(db, evento_service.CONTA, evento_service.ATUALIZACAO, conta_a_pagar_e_receber.id, dados_do_evento(conta_a_pagar_e_receber))
     db.commit()
     db.refresh(conta_a_pagar_e_receber)
+    response.headers["ETag"] = etag_da_versao(conta_a_pagar_e_receber.versao)
     return conta_a_pagar_e_receber
 
 @router.delete("/{id_da_conta_a_pagar_e_receber}", status_code=204)
 def deletar_conta(id_da_conta_a_pagar_e_receber: int , db: Session = Depends(get_db)) -> None:
     
     conta = busca_conta_por_id(id_da_conta_a_pagar_e_receber, db)
-    db.delete(conta)
+    resumo_mensal_service.remove_conta(db, conta)
+    cota_mensal_service.libera_vaga(db, conta.data_previsao.year, conta.data_previsao.month)
+    # exclusao logica: a conta e os pagamentos vao para o arquivo marcados como excluidos
+    arquivamento_service.exclui_conta(db, conta)
+    versao_tabela_service.incrementa_versao(db, versao_tabela_service.CONTAS)
+    evento_service.registra_evento(db, evento_service.CONTA, evento_service.EXCLUSAO, conta.id)
     db.commit()
 
 
 @router.post("/{id_da_conta_a_pagar_e_receber}/baixar", response_model=ContaPagarReceberResponse, status_code=200)
-def baixar_conta(id_da_conta_a_pagar_e_receber: int , db: Session = Depends(get_db)) -> ContaPagarReceberResponse:
-    
+def baixar_conta(id_da_conta_a_pagar_e_receber: int , response: Response,
+                 idempotency_key: str | None = IDEMPOTENCY_KEY,
+                 if_match: str | None = IF_MATCH,
+                 db: Session = Depends(get_db)) -> ContaPagarReceberResponse:
+    requisicao = idempotencia_service.requisicao_idempotente(idempotency_key, "baixar_conta", id_da_conta_a_pagar_e_receber)
+    repetida = idempotencia_service.resposta_guardada(db, requisicao)
+    if repetida is not None:
+        return repetida
+
+    # sem FOR UPDATE: duas baixas simultaneas gravam com a mesma versao e a segunda recebe 409
     conta_a_pagar_e_receber: ContaPagarReceber = busca_conta_por_id(id_da_conta_a_pagar_e_receber, db)
-
-    if conta_a_pagar_e_receber.esta_baixada and conta_a_pagar_e_receber.valor == conta_a_pagar_e_receber.valor_baixa:
-        return
-    
-    conta_a_pagar_e_receber.data_baixa = date.today()
-    conta_a_pagar_e_receber.esta_baixada = True
-    conta_a_pagar_e_receber.valor_baixa = conta_a_pagar_e_receber.valor
-
-    db.add(conta_a_pagar_e_receber)
+    verifica_if_match(if_match, conta_a_pagar_e_receber.versao, "conta a pagar e receber")
+    response.headers["ETag"] = etag_da_versao(conta_a_pagar_e_receber.versao)
+
+    if pagamento_service.saldo(conta_a_pagar_e_receber) <= 0:
+        return conta_a_pagar_e_receber
+
+    # baixar e pagar o saldo restante de uma vez
+    pagamento_service.registra_pagamento(db, conta_a_pagar_e_receber, pagamento_service.saldo(conta_a_pagar_e_receber), date.today())
+    versao_tabela_service.incrementa_versao(db, versao_tabela_service.CONTAS)
+    db.flush()
+    evento_service.registra_evento(db, evento_service.CONTA, evento_service.BAIXA, conta_a_pagar_e_receber.id, dados_do_evento(conta_a_pagar_e_receber))
+    repetida = idempotencia_service.guarda_resposta(db, requisicao, 200, ContaPagarReceberResponse.model_validate(conta_a_pagar_e_receber, from_attributes=True),
+                                                    {"ETag": etag_da_versao(conta_a_pagar_e_receber.versao)})
+    if repetida is not None:
+        return repetida
     db.commit()
     db.refresh(conta_a_pagar_e_receber)
+    response.headers["ETag"] = etag_da_versao(conta_a_pagar_e_receber.versao)
     return conta_a_pagar_e_receber
 
-def busca_conta_por_id(id_da_conta_a_pagar_e_receber: int, db: Session) -> ContaPagarReceber:
-    conta_a_pagar_e_receber = db.query(ContaPagarReceber).get(id_da_conta_a_pagar_e_receber)
+@router.post("/bulk", response_model=List[ResultadoItemLote], status_code=200)
+def criar_contas_em_lote(contas: Annotated[List[ContaPagarReceberRequest], Body(max_length=TAMANHO_MAXIMO_DO_LOTE)],
+                         idempotency_key: str | None = IDEMPOTENCY_KEY,
+                         db: Session = Depends(get_db)) -> List[ResultadoItemLote]:
+    requisicao = idempotencia_service.requisicao_idempotente(idempotency_key, "criar_contas_em_lote", contas)
+    repetida = idempotencia_service.resposta_guardada(db, requisicao)
+    if repetida is not None:
+        return repetida
+
+    resultados: List[ResultadoItemLote | None] = [None] * len(contas)
+
+    # mantem os fornecedores referenciados no identity map da sessao: a serializacao
+    # de conta.fornecedor passa a ser resolvida sem uma nova consulta por conta
+    fornecedores = _busca_fornecedores({conta.fornecedor_cliente_id for conta in contas if conta.fornecedor_cliente_id is not None}, db)
+
+    validas = []
+    for indice, conta in enumerate(contas):
+        if conta.fornecedor_cliente_id is not None and conta.fornecedor_cliente_id not in fornecedores:
+            resultados[indice] = ResultadoItemLote(indice=indice, sucesso=False, erro="Esse fornecedor não existe")
+        else:
+            validas.append((indice, conta))
+
+    vagas = cota_mensal_service.reserva_vagas(db, Counter((conta.data_previsao.year, conta.data_previsao.month) for _, conta in validas))
+
+    aceitas = []
+    for indice, conta in validas:
+        mes = (conta.data_previsao.year, conta.data_previsao.month)
+        if vagas.get(mes, 0) > 0:
+            vagas[mes] -= 1
+            aceitas.append((indice, conta))
+        else:
+            resultados[indice] = ResultadoItemLote(indice=indice, sucesso=False, erro="Voce nao pode mais cadastrar contas")
+
+    if aceitas:
+        # como na criacao unitaria: um fornecedor excluido depois da consulta acima barra o lote na chave estrangeira
+        with trata_fornecedor_cliente_excluido(*fornecedores):
+            criadas = db.scalars(
+                insert(ContaPagarReceber).returning(ContaPagarReceber, sort_by_parameter_order=True),
+                [conta.model_dump() for _, conta in aceitas],
+            ).all()
+        resumo_mensal_service.registra_contas(db, criadas)
+
+        for (indice, _), conta_criada in zip(aceitas, criadas):
+            resultados[indice] = ResultadoItemLote(indice=indice, sucesso=True, conta=ContaPagarReceberResponse.model_validate(conta_criada, from_attributes=True))
+
+    versao_tabela_service.incrementa_versao(db, versao_tabela_service.CONTAS)
+    if aceitas:
+        evento_service.registra_eventos(db, evento_service.CONTA, evento_service.CRIACAO, [(conta.id, dados_do_evento(conta)) for conta in criadas])
+    repetida = idempotencia_service.guarda_resposta(db, requisicao, 200, resultados)
+    if repetida is not None:
+        return repetida
+    db.commit()
+    return resultados
+
+
+@router.post("/baixar/bulk", response_model=List[ResultadoItemLote], status_code=200)
+def baixar_contas_em_lote(ids_das_contas: Annotated[List[int], Body(max_length=TAMANHO_MAXIMO_DO_LOTE)],
+                          idempotency_key: str | None = IDEMPOTENCY_KEY,
+                          db: Session = Depends(get_db)) -> List[ResultadoItemLote]:
+    requisicao = idempotencia_service.requisicao_idempotente(idempotency_key, "baixar_contas_em_lote", ids_das_contas)
+    repetida = idempotencia_service.resposta_guardada(db, requisicao)
+    if repetida is not None:
+        return repetida
+
+    contas = {
+        conta.id: conta
+        for conta in db.query(ContaPagarReceber)
+                       .options(joinedload(ContaPagarReceber.fornecedor))
+                       .filter(ContaPagarReceber.id.in_(set(ids_das_contas)))
+                       .with_for_update(of=ContaPagarReceber)
+    }
+
+    a_baixar = [
+        conta for conta in (contas[id_da_conta] for id_da_conta in dict.fromkeys(ids_das_contas) if id_da_conta in contas)
+        if pagamento_service.saldo(conta) > 0
+    ]
+
+    pagamento_service.registra_pagamentos(db, [(conta, pagamento_service.saldo(conta), date.today()) for conta in a_baixar])
+
+    # o flush agrupa os UPDATEs das contas e os INSERTs dos pagamentos em um executemany cada
+    db.flush()
+
+    resultados = [
+        ResultadoItemLote(indice=indice, sucesso=True, conta=ContaPagarReceberResponse.model_validate(contas[id_da_conta], from_attributes=True))
+        if id_da_conta in contas else
+        ResultadoItemLote(indice=indice, sucesso=False, erro="conta a pagar e receber not found")
+        for indice, id_da_conta in enumerate(ids_das_contas)
+    ]
+
+    versao_tabela_service.incrementa_versao(db, versao_tabela_service.CONTAS)
+    evento_service.registra_eventos(db, evento_service.CONTA, evento_service.BAIXA, [(conta.id, dados_do_evento(conta)) for conta in a_baixar])
+    repetida = idempotencia_service.guarda_resposta(db, requisicao, 200, resultados)
+    if repetida is not None:
+        return repetida
+    db.commit()
+    return resultados
+
+
+def dados_do_evento(conta: ContaPagarReceber) -> dict:
+    # so colunas: conta.fornecedor ainda pode ser o fornecedor anterior antes do commit
+    dados = {coluna.key: getattr(conta, coluna.key) for coluna in COLUNAS_EXPORTACAO}
+    return jsonable_encoder({**dados, "versao": conta.versao})
+
+
+def _busca_fornecedores(ids_dos_fornecedores, db: Session) -> Dict[int, FornecedorCliente]:
+    if not ids_dos_fornecedores:
+        return {}
+    return {fornecedor.id: fornecedor for fornecedor in db.query(FornecedorCliente).filter(FornecedorCliente.id.in_(ids_dos_fornecedores))}
+
+
+def pagina_de_contas(db: Session, response: Response, limit: int, after: int | None, rapido: bool, incluir_arquivadas: bool, **filtros):
+    # a resposta rapida so le a tabela principal
+    rapido = rapido and not incluir_arquivadas
+    contas = []
+    for modelo in _modelos_de_conta(incluir_arquivadas):
+        consulta = consulta_contas_rapida(db) if rapido else db.query(modelo).options(selectinload(modelo.fornecedor))
+        consulta = _filtra_contas(consulta, modelo=modelo, **filtros)
+
+        if after is not None:
+            consulta = consulta.filter(modelo.id > after)
+
+        # busca um registro a mais so para saber se existe proxima pagina
+        contas += consulta.order_by(modelo.id).limit(limit + 1).all()
+
+    # as duas tabelas nao repetem ids: as paginas juntadas pelo id continuam servindo de cursor
+    contas.sort(key=lambda conta: conta.id)
+
+    if len(contas) > limit:
+        contas = contas[:limit]
+        response.headers["X-Next-Cursor"] = str(contas[-1].id)
+
+    if rapido:
+        return resposta_rapida(contas, response)
+
+    return contas
+
+
+def _modelos_de_conta(incluir_arquivadas: bool):
+    return (ContaPagarReceber, ContaPagarReceberArquivada) if incluir_arquivadas else (ContaPagarReceber,)
+
+
+def consulta_contas_rapida(db: Session):
+    return db.query(*COLUNAS_RESPOSTA_RAPIDA).outerjoin(ContaPagarReceber.fornecedor)
+
+
+# monta o mesmo formato de ContaPagarReceberResponse direto das tuplas, sem
+# instanciar objetos do ORM nem validar cada linha com o Pydantic
+def resposta_rapida(linhas, response: Response) -> ORJSONResponse:
+    conteudo = [
+        {
+            "id": linha.id,
+            "descricao": linha.descricao,
+            "valor": int(linha.valor),
+            "tipo": linha.tipo,
+            "data_previsao": linha.data_previsao,
+            "fornecedor": {"id": linha.fornecedor_id, "nome": linha.fornecedor_nome} if linha.fornecedor_id is not None else None,
+            "data_baixa": linha.data_baixa,
+            "valor_baixa": int(linha.valor_baixa) if linha.valor_baixa is not None else None,
+            "esta_baixada": linha.esta_baixada,
+        }
+        for linha in linhas
+    ]
+    # headers definidos pelas dependencias (ETag, cursor, cookies) nao sao copiados quando a rota devolve
+    # uma Response; raw_headers preserva os repetidos, como varios set-cookie
+    resposta = ORJSONResponse(conteudo)
+    resposta.raw_headers.extend(response.raw_headers)
+    return resposta
+
+
+def _filtra_contas(consulta, tipo=None, esta_baixada=None, data_previsao_inicio=None, data_previsao_fim=None, fornecedor_cliente_id=None, modelo=ContaPagarReceber):
+    if modelo is ContaPagarReceberArquivada:
+        # contas excluidas ficam no arquivo so como registro, nenhuma leitura as devolve
+        consulta = consulta.filter(ContaPagarReceberArquivada.excluida_em.is_(None))
+    if tipo is not None:
+        consulta = consulta.filter(modelo.tipo == tipo)
+    if esta_baixada is not None:
+        consulta = consulta.filter(modelo.esta_baixada == esta_baixada)
+    if data_previsao_inicio is not None:
+        consulta = consulta.filter(modelo.data_previsao >= data_previsao_inicio)
+    if data_previsao_fim is not None:
+        consulta = consulta.filter(modelo.data_previsao <= data_previsao_fim)
+    if fornecedor_cliente_id is not None:
+        consulta = consulta.filter(modelo.fornecedor_cliente_id == fornecedor_cliente_id)
+
+    return consulta
+
+
+def _serializa_valor(valor):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, date):
+        return valor.isoformat()
+    raise TypeError(f"tipo nao serializavel: {type(valor)}")
+
+
+def _formata_ndjson(linhas) -> str:
+    return "".join(json.dumps(linha._asdict(), default=_serializa_valor) + "\n" for linha in linhas)
+
+
+def _formata_csv(linhas) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(linhas)
+    return buffer.getvalue()
+
+
+class FormatadorExportacao(NamedTuple):
+    media_type: str
+    cabecalho: str
+    formata: Callable[[Sequence], str]
+
+
+FORMATADORES_EXPORTACAO = {
+    FormatoExportacaoEnum.NDJSON: FormatadorExportacao("application/x-ndjson", "", _formata_ndjson),
+    FormatoExportacaoEnum.CSV: FormatadorExportacao("text/csv", _formata_csv([[coluna.key for coluna in COLUNAS_EXPORTACAO]]), _formata_csv),
+}
+
+
+def _consulta_exportacao(tipo, esta_baixada, data_previsao_inicio, data_previsao_fim, fornecedor_cliente_id, incluir_arquivadas=False):
+    consultas = [
+        _filtra_contas(select(*[getattr(modelo, coluna.key) for coluna in COLUNAS_EXPORTACAO]),
+                       tipo, esta_baixada, data_previsao_inicio, data_previsao_fim, fornecedor_cliente_id, modelo=modelo)
+        for modelo in _modelos_de_conta(incluir_arquivadas)
+    ]
+    contas = union_all(*consultas).subquery() if len(consultas) > 1 else consultas[0].subquery()
+    return select(contas).order_by(contas.c.id).execution_options(yield_per=TAMANHO_DO_LOTE_EXPORTACAO)
+
+
+# a sessao do get_db ja foi fechada quando o corpo comeca a ser enviado,
+# entao os geradores fecham a conexao que reabrem ao iterar a consulta
+def _gera_exportacao(consulta, db: Session, formatador: FormatadorExportacao):
+    try:
+        if formatador.cabecalho:
+            yield formatador.cabecalho
+        for linhas in db.execute(consulta).partitions():
+            yield formatador.formata(linhas)
+    finally:
+        db.close()
+
+
+async def _gera_exportacao_async(consulta, db: AsyncSession, formatador: FormatadorExportacao):
+    try:
+        if formatador.cabecalho:
+            yield formatador.cabecalho
+        resultado = await db.stream(consulta)
+        async for linhas in resultado.partitions():
+            yield formatador.formata(linhas)
+    finally:
+        await db.close()
+
+
+def busca_conta_por_id(id_da_conta_a_pagar_e_receber: int, db: Session, incluir_arquivadas: bool = False) -> ContaPagarReceber | ContaPagarReceberArquivada:
+    conta_a_pagar_e_receber = db.get(ContaPagarReceber, id_da_conta_a_pagar_e_receber, options=[joinedload(ContaPagarReceber.fornecedor)])
+    if conta_a_pagar_e_receber is None and incluir_arquivadas:
+        conta_a_pagar_e_receber = db.get(ContaPagarReceberArquivada, id_da_conta_a_pagar_e_receber, options=[joinedload(ContaPagarReceberArquivada.fornecedor)])
+        if conta_a_pagar_e_receber is not None and conta_a_pagar_e_receber.excluida_em is not None:
+            conta_a_pagar_e_receber = None
     if conta_a_pagar_e_receber is None:
         raise NotFound("conta a pagar e receber")
     
@@ -134,35 +590,69 @@ def busca_conta_por_id(id_da_conta_a_pagar_e_receber: int, db: Session) -> Conta
 
 
 def lanca_excecao_ultrapassa_registros(conta: ContaPagarReceberRequest, db: Session) -> None:
-    if (valida_se_pode_registrar_novas_contas(db, conta.data_previsao.year, conta.data_previsao.month)):
+    if not cota_mensal_service.reserva_vaga(db, conta.data_previsao.year, conta.data_previsao.month):
+        db.rollback()
         raise HTTPException(status_code=422, detail="Voce nao pode mais cadastrar contas")
 
 
-def valida_se_pode_registrar_novas_contas(db, year, month) -> bool:
-    if recupera_numero_registros(db, year, month) >= 100:
-        return True
-    
-    return False
+def relatorio_gastos_previstos_por_mes_de_um_ano(db, year, tipo: ContaPagarReceberTipoEnum = ContaPagarReceberTipoEnum.PAGAR, fluxo_liquido: bool = False) -> List[PrevisaoPorMes]:
+    if fluxo_liquido:
+        valor = case((ResumoMensal.tipo == ContaPagarReceberTipoEnum.RECEBER, ResumoMensal.valor_total), else_=-ResumoMensal.valor_total)
+    else:
+        valor = ResumoMensal.valor_total
+
+    consulta = db.query(ResumoMensal.mes, func.sum(valor, type_=Numeric).label('valor_total')) \
+        .filter(ResumoMensal.ano == year) \
+        .filter(ResumoMensal.quantidade > 0)
+
+    if not fluxo_liquido:
+        consulta = consulta.filter(ResumoMensal.tipo == tipo)
+
+    valor_por_mes = consulta.group_by(ResumoMensal.mes).order_by(ResumoMensal.mes).all()
 
+    return [PrevisaoPorMes(mes=linha.mes, valor_total=linha.valor_total) for linha in valor_por_mes]
 
-def recupera_numero_registros(db, year, month) -> int:
-    quantidade_registro = db.query(ContaPagarReceber).filter(extract('year', ContaPagarReceber.data_previsao) == year).filter(extract('month', ContaPagarReceber.data_previsao) == month).count()
-    return quantidade_registro
 
+# uma unica agregacao para todas as faixas: cada conta cai em uma faixa pelo CASE e o GROUP BY
+# soma as faixas de uma vez; os limites sao datas calculadas aqui, entao o filtro usa o
+# indice parcial de contas em aberto
+def consulta_aging(data_base: date, colunas_do_grupo, tipo: ContaPagarReceberTipoEnum | None = None):
+    faixa = case(
+        *[
+            (ContaPagarReceber.data_previsao >= data_base - timedelta(days=dias_maximos), nome)
+            for nome, _, dias_maximos in FAIXAS_AGING if dias_maximos is not None
+        ],
+        else_=FAIXAS_AGING[-1][0],
+    ).label("faixa")
 
+    consulta = select(*colunas_do_grupo, faixa, func.count(ContaPagarReceber.id).label("quantidade"), func.sum(pagamento_service.SALDO_DA_CONTA).label("saldo")) \
+        .where(ContaPagarReceber.esta_baixada == False, ContaPagarReceber.data_previsao <= data_base)
+    if tipo is not None:
+        consulta = consulta.where(ContaPagarReceber.tipo == tipo)
+    return consulta.group_by(*colunas_do_grupo, faixa).order_by(*colunas_do_grupo)
 
-def relatorio_gastos_previstos_por_mes_de_um_ano(db, year) -> List[PrevisaoPorMes]:
-    contas_do_ano = db.query(ContaPagarReceber).filter(extract('year', ContaPagarReceber.data_previsao) == year).filter(ContaPagarReceber.tipo == ContaPagarReceberTipoEnum.PAGAR).order_by(ContaPagarReceber.data_previsao).all()
 
-    valor_por_mes = OrderedDict()
+def relatorio_aging_de_contas_em_aberto(db: Session, data_base: date, agrupar_por, tipo: ContaPagarReceberTipoEnum | None = None) -> List[LinhaAging]:
+    colunas_do_grupo = []
+    if AgrupamentoAgingEnum.FORNECEDOR in agrupar_por:
+        colunas_do_grupo.append(ContaPagarReceber.fornecedor_cliente_id)
+    if AgrupamentoAgingEnum.TIPO in agrupar_por:
+        colunas_do_grupo.append(ContaPagarReceber.tipo)
 
-    for conta_do_ano in contas_do_ano:
-        mes = conta_do_ano.data_previsao.month
-        valor = conta_do_ano.valor
+    faixas_por_grupo: Dict[tuple, Dict[str, FaixaAging]] = {}
+    # sem agrupamento e sem contas vencidas ainda ha uma linha, so que zerada
+    if not colunas_do_grupo:
+        faixas_por_grupo[()] = {}
+    for linha in db.execute(consulta_aging(data_base, colunas_do_grupo, tipo)):
+        grupo = tuple(linha[:len(colunas_do_grupo)])
+        faixas_por_grupo.setdefault(grupo, {})[linha.faixa] = FaixaAging(faixa=linha.faixa, quantidade=linha.quantidade, saldo=linha.saldo or 0)
 
-        if valor_por_mes.get(mes) is None:
-            valor_por_mes[mes] = valor
+    linhas = []
+    for grupo, faixas_encontradas in faixas_por_grupo.items():
+        valores_do_grupo = dict(zip((coluna.key for coluna in colunas_do_grupo), grupo))
+        faixas = [faixas_encontradas.get(nome) or FaixaAging(faixa=nome, quantidade=0, saldo=0) for nome, _, _ in FAIXAS_AGING]
+        linhas.append(LinhaAging(**valores_do_grupo, faixas=faixas, saldo_total=sum(faixa.saldo for faixa in faixas)))
+    return linhas
 
-        valor_por_mes[mes] +=valor
 
-    return [PrevisaoPorMes(mes=k, valor_total=v) for k, v in valor_por_mes.items()]
\ No newline at end of file
+async_router = converte_para_async(router, {exportar_contas: exportar_contas_async})
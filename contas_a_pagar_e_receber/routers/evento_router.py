@@ -0,0 +1,129 @@
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any, List
+from fastapi import APIRouter, Depends, Header, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from contas_a_pagar_e_receber.services import evento_service
+from shared.dependencies import get_async_db_primario, get_db_primario
+from shared.rotas_assincronas import converte_para_async
+
+# sempre no primario: numa replica o cursor poderia passar de um evento ainda nao replicado.
+# Mesmo no modo sincrono os handlers sao async: long-poll e SSE esperam no event loop, e so as
+# consultas ocupam o threadpool
+router = APIRouter(prefix="/eventos")
+
+ESPERA_MAXIMA_S = 30
+# comentario SSE enviado sem eventos, para proxies nao fecharem a conexao parada
+INTERVALO_KEEPALIVE_S = 15
+
+
+class EntidadeEventoEnum(str, Enum):
+    CONTA = evento_service.CONTA
+    FORNECEDOR = evento_service.FORNECEDOR
+    RECORRENCIA = evento_service.RECORRENCIA
+
+
+class EventoResponse(BaseModel):
+    id: int
+    entidade: str
+    entidade_id: int
+    operacao: str
+    dados: Any | None = None
+    criado_em: datetime
+
+    class Config:
+        orm_mode = True
+
+
+@router.get("", response_model=List[EventoResponse])
+async def listar_eventos(response: Response,
+                   after: int | None = None,
+                   limit: int = Query(default=100, ge=1, le=1000),
+                   espera: float = Query(default=0, ge=0, le=ESPERA_MAXIMA_S),
+                   entidade: EntidadeEventoEnum | None = None,
+                   db: Session = Depends(get_db_primario)) -> List[EventoResponse]:
+    eventos = await evento_service.aguarda_eventos(db, after, limit, espera, entidade)
+    _define_cursor(response, eventos, after)
+    return eventos
+
+
+async def listar_eventos_async(response: Response,
+                               after: int | None = None,
+                               limit: int = Query(default=100, ge=1, le=1000),
+                               espera: float = Query(default=0, ge=0, le=ESPERA_MAXIMA_S),
+                               entidade: EntidadeEventoEnum | None = None,
+                               db: AsyncSession = Depends(get_async_db_primario)) -> List[EventoResponse]:
+    eventos = await evento_service.aguarda_eventos_async(db, after, limit, espera, entidade)
+    _define_cursor(response, eventos, after)
+    return eventos
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def acompanhar_eventos(after: int | None = None,
+                       entidade: EntidadeEventoEnum | None = None,
+                       last_event_id: int | None = Header(default=None, alias="Last-Event-ID"),
+                       db: Session = Depends(get_db_primario)) -> StreamingResponse:
+    # o EventSource reconecta sozinho com Last-Event-ID, que vale mais que o after da URL original
+    cursor = last_event_id if last_event_id is not None else after
+    return StreamingResponse(_gera_stream(db, cursor, entidade), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+async def acompanhar_eventos_async(after: int | None = None,
+                                   entidade: EntidadeEventoEnum | None = None,
+                                   last_event_id: int | None = Header(default=None, alias="Last-Event-ID"),
+                                   db: AsyncSession = Depends(get_async_db_primario)) -> StreamingResponse:
+    cursor = last_event_id if last_event_id is not None else after
+    return StreamingResponse(_gera_stream_async(db, cursor, entidade), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+def _define_cursor(response: Response, eventos, after: int | None) -> None:
+    # diferente das listagens, o cursor vem sempre: e com ele que o consumidor continua de onde parou
+    response.headers["X-Next-Cursor"] = str(eventos[-1].id if eventos else after or 0)
+
+
+def _formata_sse(evento) -> str:
+    dados = json.dumps(jsonable_encoder(EventoResponse.model_validate(evento, from_attributes=True)))
+    return f"id: {evento.id}\nevent: {evento.entidade}.{evento.operacao}\ndata: {dados}\n\n"
+
+
+# como na exportacao, a sessao do get_db ja foi fechada quando o corpo comeca a ser enviado;
+# cada consulta reabre a conexao e a espera entre elas a devolve ao pool
+async def _gera_stream(db: Session, cursor: int | None, entidade: str | None):
+    try:
+        while True:
+            eventos = await evento_service.aguarda_eventos(db, cursor, 100, INTERVALO_KEEPALIVE_S, entidade)
+            if not eventos:
+                yield ": keepalive\n\n"
+                continue
+            cursor = eventos[-1].id
+            # formata antes do rollback, que expira os objetos lidos
+            mensagens = "".join(_formata_sse(evento) for evento in eventos)
+            await run_in_threadpool(db.rollback)
+            yield mensagens
+    finally:
+        await run_in_threadpool(db.close)
+
+
+async def _gera_stream_async(db: AsyncSession, cursor: int | None, entidade: str | None):
+    try:
+        while True:
+            eventos = await evento_service.aguarda_eventos_async(db, cursor, 100, INTERVALO_KEEPALIVE_S, entidade)
+            if not eventos:
+                yield ": keepalive\n\n"
+                continue
+            cursor = eventos[-1].id
+            mensagens = "".join(_formata_sse(evento) for evento in eventos)
+            await db.rollback()
+            yield mensagens
+    finally:
+        await db.close()
+
+
+async_router = converte_para_async(router, {listar_eventos: listar_eventos_async, acompanhar_eventos: acompanhar_eventos_async})
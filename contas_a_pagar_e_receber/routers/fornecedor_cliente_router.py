@@ -1,14 +1,30 @@
-from typing import List
-from fastapi import APIRouter, Depends
+import os
+from contextlib import contextmanager
+from typing import Iterator, List
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from pydantic import BaseModel, Field
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from contas_a_pagar_e_receber.models.fornecedor_cliente_model import FornecedorCliente
+from contas_a_pagar_e_receber.services import evento_service, versao_tabela_service
+from shared.cache import CacheLRU
+from shared.cache_http import etag_da_versao, verifica_if_match
+from shared.database import backend_invalidacao
 from shared.dependencies import get_db
+from shared.rotas_assincronas import converte_para_async
 from shared.exceptions import NotFound
 
 router = APIRouter(prefix="/fornecedor-cliente")
 
+cache_fornecedores = CacheLRU(
+    "fornecedor_cliente",
+    tamanho_maximo=int(os.getenv("FORNECEDOR_CACHE_TAMANHO", "10000")),
+    ttl_segundos=float(os.getenv("FORNECEDOR_CACHE_TTL_SEGUNDOS", "300")),
+    # sem DATABASE_CACHE_INVALIDATION cada worker so ve as proprias invalidacoes ate o TTL
+    backend=backend_invalidacao,
+)
+
 
 class FornecedorClienteResponse(BaseModel):
     id: int
@@ -17,18 +33,28 @@ class FornecedorClienteResponse(BaseModel):
     class Config:
         orm_mode = True
 
+# o cache guarda a versao para o ETag do GET por id; a resposta continua so com id e nome
+class FornecedorClienteEmCache(FornecedorClienteResponse):
+    versao: int
+
 class FornecedorClienteRequest(BaseModel):
     nome: str = Field(min_length=3, max_length=255)
 
 
-@router.get("", response_model=List[FornecedorClienteResponse])
+@router.get("", response_model=List[FornecedorClienteResponse],
+            dependencies=[versao_tabela_service.etag_das_tabelas(versao_tabela_service.FORNECEDORES, cache_control=os.getenv("CACHE_CONTROL_FORNECEDORES", "no-cache"))])
 def listar_fornecedor_cliente(db: Session = Depends(get_db)) -> List[FornecedorClienteResponse]:
     return db.query(FornecedorCliente).all()
 
 
 @router.get("/{id_fornecedor_cliente}", response_model=FornecedorClienteResponse)
-def listar_fornecedor_cliente_por_id(id_fornecedor_cliente: int ,db: Session = Depends(get_db)) -> FornecedorClienteResponse:
-    fornecedor_cliente: FornecedorCliente = busca_fornecedor_cliente_por_id(id_fornecedor_cliente, db)
+def listar_fornecedor_cliente_por_id(id_fornecedor_cliente: int, response: Response, db: Session = Depends(get_db)) -> FornecedorClienteResponse:
+    fornecedor_cliente = obtem_fornecedor_cliente(id_fornecedor_cliente, db)
+    if fornecedor_cliente is None:
+        raise NotFound("fornecedor cliente")
+
+    response.headers["ETag"] = etag_da_versao(fornecedor_cliente.versao)
+
     return fornecedor_cliente
 
 
@@ -39,20 +65,31 @@ def criar_fornecedor_cliente(fornecedor_cliente: FornecedorClienteRequest, db: S
     )
 
     db.add(fornecedor_cliente)
+    versao_tabela_service.incrementa_versao(db, versao_tabela_service.FORNECEDORES)
+    db.flush()
+    evento_service.registra_evento(db, evento_service.FORNECEDOR, evento_service.CRIACAO, fornecedor_cliente.id, dados_do_evento(fornecedor_cliente))
     db.commit()
     db.refresh(fornecedor_cliente)
 
     return fornecedor_cliente
 
 @router.put("/{id_fornecedor_cliente}", response_model=FornecedorClienteResponse, status_code=200)
-def atualizar_fornecedor_cliente(id_fornecedor_cliente: int , fornecedor_cliente_request: FornecedorClienteRequest, db: Session = Depends(get_db)) -> FornecedorClienteResponse:
+def atualizar_fornecedor_cliente(id_fornecedor_cliente: int , fornecedor_cliente_request: FornecedorClienteRequest, response: Response,
+                                 if_match: str | None = Header(default=None, alias="If-Match"),
+                                 db: Session = Depends(get_db)) -> FornecedorClienteResponse:
     
     fornecedor_cliente: FornecedorCliente = busca_fornecedor_cliente_por_id(id_fornecedor_cliente, db)
+    verifica_if_match(if_match, fornecedor_cliente.versao, "fornecedor cliente")
     fornecedor_cliente.nome = fornecedor_cliente_request.nome
 
     db.add(fornecedor_cliente)
+    versao_tabela_service.incrementa_versao(db, versao_tabela_service.FORNECEDORES)
+    db.flush()
+    evento_service.registra_evento(db, evento_service.FORNECEDOR, evento_service.ATUALIZACAO, fornecedor_cliente.id, dados_do_evento(fornecedor_cliente))
     db.commit()
+    cache_fornecedores.invalida(id_fornecedor_cliente)
     db.refresh(fornecedor_cliente)
+    response.headers["ETag"] = etag_da_versao(fornecedor_cliente.versao)
     return fornecedor_cliente
 
 @router.delete("/{id_fornecedor_cliente}", status_code=204)
@@ -60,11 +97,45 @@ def deletar_fornecedor_cliente(id_fornecedor_cliente: int , db: Session = Depend
     
     fornecedor_cliente = busca_fornecedor_cliente_por_id(id_fornecedor_cliente, db)
     db.delete(fornecedor_cliente)
+    versao_tabela_service.incrementa_versao(db, versao_tabela_service.FORNECEDORES)
+    evento_service.registra_evento(db, evento_service.FORNECEDOR, evento_service.EXCLUSAO, id_fornecedor_cliente)
     db.commit()
+    cache_fornecedores.invalida(id_fornecedor_cliente)
+
+def obtem_fornecedor_cliente(id_fornecedor_cliente: int, db: Session) -> FornecedorClienteEmCache | None:
+    def carrega():
+        fornecedor_cliente = db.get(FornecedorCliente, id_fornecedor_cliente)
+        return FornecedorClienteEmCache.model_validate(fornecedor_cliente, from_attributes=True) if fornecedor_cliente else None
+
+    return cache_fornecedores.obtem(id_fornecedor_cliente, carrega)
+
+@contextmanager
+def trata_fornecedor_cliente_excluido(*ids_fornecedores_cliente: int | None) -> Iterator[None]:
+    # as escritas validam o fornecedor pelo cache, que em outro worker pode ainda ter um fornecedor
+    # ja excluido; a chave estrangeira barra o insert e a resposta fica igual a da validacao
+    try:
+        yield
+    except IntegrityError as erro:
+        if not _viola_chave_estrangeira(erro):
+            raise
+        for id_fornecedor_cliente in ids_fornecedores_cliente:
+            if id_fornecedor_cliente is not None:
+                cache_fornecedores.invalida(id_fornecedor_cliente)
+        raise HTTPException(status_code=422, detail="Esse fornecedor não existe")
+
+def _viola_chave_estrangeira(erro: IntegrityError) -> bool:
+    # 23503 e o foreign_key_violation do Postgres; o SQLite so informa na mensagem
+    return getattr(erro.orig, "pgcode", None) == "23503" or "FOREIGN KEY" in str(erro.orig)
+
+def dados_do_evento(fornecedor_cliente: FornecedorCliente) -> dict:
+    return FornecedorClienteEmCache.model_validate(fornecedor_cliente, from_attributes=True).model_dump()
 
 def busca_fornecedor_cliente_por_id(id_fornecedor_cliente: int, db: Session) -> FornecedorCliente:
     fornecedor_cliente = db.query(FornecedorCliente).get(id_fornecedor_cliente)
     if fornecedor_cliente is None:
         raise NotFound("fornecedor cliente")
     
-    return fornecedor_cliente
\ No newline at end of file
+    return fornecedor_cliente
+
+
+async_router = converte_para_async(router)
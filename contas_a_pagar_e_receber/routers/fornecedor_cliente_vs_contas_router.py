@@ -1,13 +1,110 @@
-from typing import List
-from fastapi import APIRouter, Depends
+from typing import Annotated, List
+from fastapi import APIRouter, Depends, Query, Response
+from pydantic import BaseModel
+from sqlalchemy import Integer, cast, extract, func, select
 from sqlalchemy.orm import Session
 
-from contas_a_pagar_e_receber.models.conta_a_pagar_receber_model import ContaPagarReceber
-from contas_a_pagar_e_receber.routers.contas_a_pagar_e_receber_router import ContaPagarReceberResponse
+from contas_a_pagar_e_receber.models.fornecedor_cliente_model import FornecedorCliente
+from contas_a_pagar_e_receber.routers.contas_a_pagar_e_receber_router import RESPOSTA_RAPIDA_PADRAO, ContaPagarReceberResponse, pagina_de_contas
+from contas_a_pagar_e_receber.routers.fornecedor_cliente_router import obtem_fornecedor_cliente
+from contas_a_pagar_e_receber.services.pagamento_service import saldo_da_conta
+from contas_a_pagar_e_receber.services.resumo_mensal_service import contas_vigentes
 from shared.dependencies import get_db
+from shared.exceptions import NotFound
+from shared.rotas_assincronas import converte_para_async
 
 router = APIRouter(prefix="/fornecedor-cliente")
 
+TAMANHO_MAXIMO_DO_LOTE_DE_FORNECEDORES = 500
+
+
+class ResumoMensalFornecedorCliente(BaseModel):
+    ano: int
+    mes: int
+    tipo: str
+    quantidade_em_aberto: int
+    valor_em_aberto: float
+    quantidade_baixada: int
+    valor_baixado: float
+
+
+class ResumoFornecedorCliente(BaseModel):
+    fornecedor_cliente_id: int
+    meses: List[ResumoMensalFornecedorCliente]
+
+
+@router.get("/contas-a-pagar-e-receber/resumo", response_model=List[ResumoFornecedorCliente])
+def obter_resumo_de_varios_fornecedores_cliente(ids: Annotated[List[int], Query(min_length=1, max_length=TAMANHO_MAXIMO_DO_LOTE_DE_FORNECEDORES)],
+                                                ano: int | None = None,
+                                                db: Session = Depends(get_db)) -> List[ResumoFornecedorCliente]:
+    # ids inexistentes ficam de fora da resposta em vez de derrubar o lote inteiro
+    existentes = db.scalars(select(FornecedorCliente.id).where(FornecedorCliente.id.in_(set(ids))).order_by(FornecedorCliente.id)).all()
+    return resumo_de_fornecedores_cliente(db, existentes, ano)
+
+
 @router.get("/{id_fornecedor_cliente}/contas-a-pagar-e-receber", response_model=List[ContaPagarReceberResponse])
-def obter_contas_a_pagar_de_um_fornecedor_cliente(id_fornecedor_cliente: int ,db: Session = Depends(get_db)) -> List[ContaPagarReceberResponse]:
-    return db.query(ContaPagarReceber).filter_by(fornecedor_cliente_id = id_fornecedor_cliente).all()
\ No newline at end of file
+def obter_contas_a_pagar_de_um_fornecedor_cliente(id_fornecedor_cliente: int ,
+                                                  response: Response,
+                                                  limit: int = Query(default=100, ge=1, le=1000),
+                                                  after: int | None = None,
+                                                  incluir_arquivadas: bool = False,
+                                                  rapido: bool = Query(default=RESPOSTA_RAPIDA_PADRAO, include_in_schema=False),
+                                                  db: Session = Depends(get_db)) -> List[ContaPagarReceberResponse]:
+    lanca_excecao_fornecedor_cliente_inexistente(id_fornecedor_cliente, db)
+
+    # mesmo esquema da listagem: um registro a mais indica que existe proxima pagina
+    return pagina_de_contas(db, response, limit, after, rapido, incluir_arquivadas, fornecedor_cliente_id=id_fornecedor_cliente)
+
+
+@router.get("/{id_fornecedor_cliente}/contas-a-pagar-e-receber/resumo", response_model=ResumoFornecedorCliente)
+def obter_resumo_de_um_fornecedor_cliente(id_fornecedor_cliente: int,
+                                          ano: int | None = None,
+                                          db: Session = Depends(get_db)) -> ResumoFornecedorCliente:
+    lanca_excecao_fornecedor_cliente_inexistente(id_fornecedor_cliente, db)
+
+    return resumo_de_fornecedores_cliente(db, [id_fornecedor_cliente], ano)[0]
+
+
+def lanca_excecao_fornecedor_cliente_inexistente(id_fornecedor_cliente: int, db: Session) -> None:
+    if obtem_fornecedor_cliente(id_fornecedor_cliente, db) is None:
+        raise NotFound("fornecedor cliente")
+
+
+def resumo_de_fornecedores_cliente(db: Session, ids_fornecedores_cliente: List[int], ano: int | None) -> List[ResumoFornecedorCliente]:
+    if not ids_fornecedores_cliente:
+        return []
+
+    # as contas baixadas arquivadas continuam contando no baixado
+    contas = contas_vigentes(ano, ids_fornecedores_cliente)
+    ano_da_conta = cast(extract('year', contas.c.data_previsao), Integer)
+    mes_da_conta = cast(extract('month', contas.c.data_previsao), Integer)
+    em_aberto = contas.c.esta_baixada.is_not(True)
+    consulta = select(
+        contas.c.fornecedor_cliente_id,
+        ano_da_conta.label("ano"),
+        mes_da_conta.label("mes"),
+        contas.c.tipo,
+        func.count(contas.c.id).filter(em_aberto).label("quantidade_em_aberto"),
+        # com pagamentos parciais o aberto e o saldo, como em /saldos, e o pago inclui o que ja foi pago das contas em aberto
+        func.coalesce(func.sum(saldo_da_conta(contas.c)).filter(em_aberto), 0).label("valor_em_aberto"),
+        func.count(contas.c.id).filter(~em_aberto).label("quantidade_baixada"),
+        func.coalesce(func.sum(func.coalesce(contas.c.valor_baixa, 0)), 0).label("valor_baixado"),
+    ).group_by(contas.c.fornecedor_cliente_id, ano_da_conta, mes_da_conta, contas.c.tipo)
+
+    meses_por_fornecedor = {id_fornecedor_cliente: [] for id_fornecedor_cliente in ids_fornecedores_cliente}
+    for linha in db.execute(consulta.order_by(contas.c.fornecedor_cliente_id, ano_da_conta, mes_da_conta, contas.c.tipo)):
+        meses_por_fornecedor[linha.fornecedor_cliente_id].append(ResumoMensalFornecedorCliente(
+            ano=linha.ano,
+            mes=linha.mes,
+            tipo=linha.tipo,
+            quantidade_em_aberto=linha.quantidade_em_aberto,
+            valor_em_aberto=linha.valor_em_aberto,
+            quantidade_baixada=linha.quantidade_baixada,
+            valor_baixado=linha.valor_baixado,
+        ))
+
+    return [ResumoFornecedorCliente(fornecedor_cliente_id=id_fornecedor_cliente, meses=meses)
+            for id_fornecedor_cliente, meses in meses_por_fornecedor.items()]
+
+
+async_router = converte_para_async(router)
@@ -0,0 +1,131 @@
+from datetime import date
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from sqlalchemy import Integer, cast, extract, func, select
+from sqlalchemy.orm import Session
+
+from contas_a_pagar_e_receber.models.conta_a_pagar_receber_arquivada_model import ContaPagarReceberArquivada
+from contas_a_pagar_e_receber.models.conta_a_pagar_receber_model import ContaPagarReceber
+from contas_a_pagar_e_receber.models.pagamento_arquivado_model import PagamentoArquivado
+from contas_a_pagar_e_receber.models.pagamento_model import Pagamento
+from contas_a_pagar_e_receber.routers.contas_a_pagar_e_receber_router import IDEMPOTENCY_KEY, ContaPagarReceberTipoEnum, busca_conta_por_id, dados_do_evento
+from contas_a_pagar_e_receber.services import evento_service, idempotencia_service, pagamento_service, versao_tabela_service
+from contas_a_pagar_e_receber.services.resumo_mensal_service import filtro_do_ano
+from shared.dependencies import get_db
+from shared.rotas_assincronas import converte_para_async
+
+router = APIRouter(prefix="/contas-a-pagar-e-receber")
+
+
+class PagamentoResponse(BaseModel):
+    id: int
+    conta_a_pagar_e_receber_id: int
+    valor: int
+    data_pagamento: date
+
+    class Config:
+        orm_mode = True
+
+class PagamentoRequest(BaseModel):
+    valor: int = Field(gt=0)
+    data_pagamento: date | None = None
+
+class SaldoPorFornecedor(BaseModel):
+    fornecedor_cliente_id: int | None
+    quantidade: int
+    saldo: float
+
+class SaldoPorMes(BaseModel):
+    ano: int
+    mes: int
+    tipo: str
+    quantidade: int
+    saldo: float
+
+
+# as consultas de saldo filtram esta_baixada = false com literal, o que casa com os
+# indices parciais de contas em aberto; o historico de pagamentos nao e lido.
+# So a tabela principal entra: o arquivo guarda apenas contas baixadas (saldo zero) ou
+# excluidas, entao nenhuma conta arquivada tem saldo em aberto a somar
+SALDO_EM_ABERTO = func.coalesce(func.sum(pagamento_service.SALDO_DA_CONTA), 0)
+
+
+@router.get("/saldos/por-fornecedor", response_model=List[SaldoPorFornecedor])
+def saldos_por_fornecedor(tipo: ContaPagarReceberTipoEnum = ContaPagarReceberTipoEnum.PAGAR,
+                          data_previsao_fim: date | None = None,
+                          db: Session = Depends(get_db)) -> List[SaldoPorFornecedor]:
+    consulta = select(
+        ContaPagarReceber.fornecedor_cliente_id,
+        func.count(ContaPagarReceber.id).label("quantidade"),
+        SALDO_EM_ABERTO.label("saldo"),
+    ).where(ContaPagarReceber.esta_baixada == False, ContaPagarReceber.tipo == tipo)
+    if data_previsao_fim is not None:
+        consulta = consulta.where(ContaPagarReceber.data_previsao <= data_previsao_fim)
+
+    consulta = consulta.group_by(ContaPagarReceber.fornecedor_cliente_id).order_by(ContaPagarReceber.fornecedor_cliente_id)
+    return [SaldoPorFornecedor(**linha._asdict()) for linha in db.execute(consulta)]
+
+
+@router.get("/saldos/por-mes", response_model=List[SaldoPorMes])
+def saldos_por_mes(ano: int | None = None,
+                   tipo: ContaPagarReceberTipoEnum = ContaPagarReceberTipoEnum.PAGAR,
+                   fornecedor_cliente_id: int | None = None,
+                   db: Session = Depends(get_db)) -> List[SaldoPorMes]:
+    ano_da_conta = cast(extract('year', ContaPagarReceber.data_previsao), Integer)
+    mes_da_conta = cast(extract('month', ContaPagarReceber.data_previsao), Integer)
+    consulta = select(
+        ano_da_conta.label("ano"),
+        mes_da_conta.label("mes"),
+        ContaPagarReceber.tipo,
+        func.count(ContaPagarReceber.id).label("quantidade"),
+        SALDO_EM_ABERTO.label("saldo"),
+    ).where(ContaPagarReceber.esta_baixada == False, ContaPagarReceber.tipo == tipo)
+    if ano is not None:
+        consulta = consulta.where(filtro_do_ano(ano))
+    if fornecedor_cliente_id is not None:
+        consulta = consulta.where(ContaPagarReceber.fornecedor_cliente_id == fornecedor_cliente_id)
+
+    consulta = consulta.group_by(ano_da_conta, mes_da_conta, ContaPagarReceber.tipo).order_by(ano_da_conta, mes_da_conta)
+    return [SaldoPorMes(**linha._asdict()) for linha in db.execute(consulta)]
+
+
+@router.get("/{id_da_conta_a_pagar_e_receber}/pagamentos", response_model=List[PagamentoResponse])
+def listar_pagamentos(id_da_conta_a_pagar_e_receber: int,
+                      incluir_arquivadas: bool = False,
+                      db: Session = Depends(get_db)) -> List[PagamentoResponse]:
+    conta = busca_conta_por_id(id_da_conta_a_pagar_e_receber, db, incluir_arquivadas)
+    modelo = PagamentoArquivado if isinstance(conta, ContaPagarReceberArquivada) else Pagamento
+    return db.query(modelo).filter(modelo.conta_a_pagar_e_receber_id == id_da_conta_a_pagar_e_receber).order_by(modelo.id).all()
+
+
+@router.post("/{id_da_conta_a_pagar_e_receber}/pagamentos", response_model=PagamentoResponse, status_code=201)
+def registrar_pagamento(id_da_conta_a_pagar_e_receber: int, pagamento: PagamentoRequest,
+                        idempotency_key: str | None = IDEMPOTENCY_KEY,
+                        db: Session = Depends(get_db)) -> PagamentoResponse:
+    requisicao = idempotencia_service.requisicao_idempotente(idempotency_key, "registrar_pagamento", id_da_conta_a_pagar_e_receber, pagamento)
+    repetida = idempotencia_service.resposta_guardada(db, requisicao)
+    if repetida is not None:
+        return repetida
+
+    # a versao da conta impede que dois pagamentos simultaneos passem do saldo
+    conta = busca_conta_por_id(id_da_conta_a_pagar_e_receber, db)
+
+    if pagamento.valor > pagamento_service.saldo(conta):
+        db.rollback()
+        raise HTTPException(status_code=422, detail="Esse pagamento ultrapassa o saldo da conta")
+
+    lancamento = pagamento_service.registra_pagamento(db, conta, pagamento.valor, pagamento.data_pagamento or date.today())
+    versao_tabela_service.incrementa_versao(db, versao_tabela_service.CONTAS)
+    db.flush()
+    evento_service.registra_evento(db, evento_service.CONTA, evento_service.PAGAMENTO, conta.id,
+                                   {**dados_do_evento(conta), "pagamento": PagamentoResponse.model_validate(lancamento, from_attributes=True).model_dump(mode="json")})
+    repetida = idempotencia_service.guarda_resposta(db, requisicao, 201, PagamentoResponse.model_validate(lancamento, from_attributes=True))
+    if repetida is not None:
+        return repetida
+    db.commit()
+    db.refresh(lancamento)
+    return lancamento
+
+
+async_router = converte_para_async(router)
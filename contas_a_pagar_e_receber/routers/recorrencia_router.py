@@ -0,0 +1,140 @@
+from datetime import date
+from enum import Enum
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from contas_a_pagar_e_receber.models.regra_recorrencia_model import RegraRecorrencia
+from contas_a_pagar_e_receber.routers.contas_a_pagar_e_receber_router import ContaPagarReceberTipoEnum
+from contas_a_pagar_e_receber.routers.fornecedor_cliente_router import FornecedorClienteResponse, obtem_fornecedor_cliente, trata_fornecedor_cliente_excluido
+from contas_a_pagar_e_receber.services import evento_service, versao_tabela_service
+from shared.dependencies import get_db
+from shared.exceptions import NotFound
+from shared.rotas_assincronas import converte_para_async
+
+router = APIRouter(prefix="/recorrencias")
+
+
+class FrequenciaRecorrenciaEnum(str, Enum):
+    DIARIA = 'DIARIA'
+    SEMANAL = 'SEMANAL'
+    MENSAL = 'MENSAL'
+    ANUAL = 'ANUAL'
+
+
+class RegraRecorrenciaResponse(BaseModel):
+    id: int
+    descricao: str
+    valor: int
+    tipo: str
+    fornecedor: FornecedorClienteResponse | None = None
+    frequencia: str
+    intervalo: int
+    data_inicio: date
+    data_fim: date | None = None
+
+    class Config:
+        orm_mode = True
+
+class RegraRecorrenciaRequest(BaseModel):
+    descricao: str = Field(min_length=3, max_length=30)
+    valor: int = Field(gt=0)
+    tipo: ContaPagarReceberTipoEnum
+    fornecedor_cliente_id: int | None = None
+    frequencia: FrequenciaRecorrenciaEnum
+    intervalo: int = Field(default=1, ge=1, le=366)
+    data_inicio: date
+    data_fim: date | None = None
+
+
+@router.get("", response_model=List[RegraRecorrenciaResponse],
+            dependencies=[versao_tabela_service.etag_das_tabelas(versao_tabela_service.RECORRENCIAS, versao_tabela_service.FORNECEDORES)])
+def listar_regras_recorrencia(response: Response,
+                              limit: int = Query(default=100, ge=1, le=1000),
+                              after: int | None = None,
+                              db: Session = Depends(get_db)) -> List[RegraRecorrenciaResponse]:
+    consulta = db.query(RegraRecorrencia).options(selectinload(RegraRecorrencia.fornecedor))
+    if after is not None:
+        consulta = consulta.filter(RegraRecorrencia.id > after)
+
+    # mesmo esquema da listagem de contas: um registro a mais indica que existe proxima pagina
+    regras = consulta.order_by(RegraRecorrencia.id).limit(limit + 1).all()
+
+    if len(regras) > limit:
+        regras = regras[:limit]
+        response.headers["X-Next-Cursor"] = str(regras[-1].id)
+
+    return regras
+
+
+@router.get("/{id_da_regra}", response_model=RegraRecorrenciaResponse)
+def listar_regra_recorrencia_por_id(id_da_regra: int, db: Session = Depends(get_db)) -> RegraRecorrenciaResponse:
+    return busca_regra_por_id(id_da_regra, db)
+
+
+@router.post("", response_model=RegraRecorrenciaResponse, status_code=201)
+def criar_regra_recorrencia(regra: RegraRecorrenciaRequest, db: Session = Depends(get_db)) -> RegraRecorrenciaResponse:
+    _valida_regra(regra, db)
+
+    regra_recorrencia = RegraRecorrencia(**regra.model_dump())
+
+    db.add(regra_recorrencia)
+    versao_tabela_service.incrementa_versao(db, versao_tabela_service.RECORRENCIAS)
+    with trata_fornecedor_cliente_excluido(regra.fornecedor_cliente_id):
+        db.flush()
+    evento_service.registra_evento(db, evento_service.RECORRENCIA, evento_service.CRIACAO, regra_recorrencia.id, dados_do_evento(regra_recorrencia))
+    db.commit()
+    db.refresh(regra_recorrencia)
+
+    return regra_recorrencia
+
+
+@router.put("/{id_da_regra}", response_model=RegraRecorrenciaResponse, status_code=200)
+def atualizar_regra_recorrencia(id_da_regra: int, regra: RegraRecorrenciaRequest, db: Session = Depends(get_db)) -> RegraRecorrenciaResponse:
+    _valida_regra(regra, db)
+    regra_recorrencia = busca_regra_por_id(id_da_regra, db)
+    for campo, valor in regra.model_dump(exclude_unset=True).items():
+        setattr(regra_recorrencia, campo, valor)
+
+    db.add(regra_recorrencia)
+    versao_tabela_service.incrementa_versao(db, versao_tabela_service.RECORRENCIAS)
+    with trata_fornecedor_cliente_excluido(regra.fornecedor_cliente_id):
+        db.flush()
+    evento_service.registra_evento(db, evento_service.RECORRENCIA, evento_service.ATUALIZACAO, regra_recorrencia.id, dados_do_evento(regra_recorrencia))
+    db.commit()
+    db.refresh(regra_recorrencia)
+
+    return regra_recorrencia
+
+
+@router.delete("/{id_da_regra}", status_code=204)
+def deletar_regra_recorrencia(id_da_regra: int, db: Session = Depends(get_db)) -> None:
+    regra_recorrencia = busca_regra_por_id(id_da_regra, db)
+    db.delete(regra_recorrencia)
+    versao_tabela_service.incrementa_versao(db, versao_tabela_service.RECORRENCIAS)
+    evento_service.registra_evento(db, evento_service.RECORRENCIA, evento_service.EXCLUSAO, id_da_regra)
+    db.commit()
+
+
+def _valida_regra(regra: RegraRecorrenciaRequest, db: Session) -> None:
+    if regra.data_fim is not None and regra.data_fim < regra.data_inicio:
+        raise HTTPException(status_code=422, detail="A data final da recorrencia e anterior a data inicial")
+    if regra.fornecedor_cliente_id is not None and obtem_fornecedor_cliente(regra.fornecedor_cliente_id, db) is None:
+        raise HTTPException(status_code=422, detail="Esse fornecedor não existe")
+
+
+def dados_do_evento(regra_recorrencia: RegraRecorrencia) -> dict:
+    return jsonable_encoder({coluna.key: getattr(regra_recorrencia, coluna.key) for coluna in RegraRecorrencia.__table__.columns})
+
+
+def busca_regra_por_id(id_da_regra: int, db: Session) -> RegraRecorrencia:
+    regra_recorrencia = db.get(RegraRecorrencia, id_da_regra, options=[joinedload(RegraRecorrencia.fornecedor)])
+    if regra_recorrencia is None:
+        raise NotFound("regra de recorrencia")
+
+    return regra_recorrencia
+
+
+async_router = converte_para_async(router)
@@ -0,0 +1,82 @@
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+from typing import List
+
+from sqlalchemy import DateTime, delete, insert, literal, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from contas_a_pagar_e_receber.models.conta_a_pagar_receber_arquivada_model import ContaPagarReceberArquivada
+from contas_a_pagar_e_receber.models.conta_a_pagar_receber_model import ContaPagarReceber
+from contas_a_pagar_e_receber.models.pagamento_arquivado_model import PagamentoArquivado
+from contas_a_pagar_e_receber.models.pagamento_model import Pagamento
+from contas_a_pagar_e_receber.services import versao_tabela_service
+
+IDADE_MINIMA_PARA_ARQUIVAR = timedelta(days=int(os.getenv("ARQUIVAMENTO_IDADE_DIAS", "365")))
+TAMANHO_DO_LOTE = 1000
+
+COLUNAS_DA_CONTA = [coluna.name for coluna in ContaPagarReceber.__table__.columns]
+COLUNAS_DO_PAGAMENTO = [coluna.name for coluna in Pagamento.__table__.columns]
+
+
+def _agora() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _move_para_o_arquivo(db: Session, filtro_das_contas, excluida_em: datetime | None = None) -> int:
+    """Copia as contas do filtro e os pagamentos delas para o arquivo e as apaga da tabela principal.
+
+    Devolve quantas contas sairam da tabela principal; o INSERT e o DELETE usam o mesmo filtro
+    na mesma transacao, entao as duas contagens batem.
+    """
+    contas = select(*[ContaPagarReceber.__table__.c[coluna] for coluna in COLUNAS_DA_CONTA],
+                    literal(_agora(), DateTime), literal(excluida_em, DateTime)).where(filtro_das_contas)
+    db.execute(insert(ContaPagarReceberArquivada).from_select(COLUNAS_DA_CONTA + ["arquivada_em", "excluida_em"], contas))
+
+    ids_das_contas = select(ContaPagarReceber.id).where(filtro_das_contas)
+    pagamentos = select(*[Pagamento.__table__.c[coluna] for coluna in COLUNAS_DO_PAGAMENTO]) \
+        .where(Pagamento.conta_a_pagar_e_receber_id.in_(ids_das_contas))
+    db.execute(insert(PagamentoArquivado).from_select(COLUNAS_DO_PAGAMENTO, pagamentos))
+    # o ON DELETE CASCADE nao vale no SQLite sem PRAGMA foreign_keys
+    db.execute(delete(Pagamento).where(Pagamento.conta_a_pagar_e_receber_id.in_(ids_das_contas)))
+    return db.execute(delete(ContaPagarReceber).where(filtro_das_contas)).rowcount
+
+
+def exclui_conta(db: Session, conta: ContaPagarReceber) -> None:
+    # so sai a versao que foi lida: uma escrita concorrente faz a exclusao falhar com 409
+    removidas = _move_para_o_arquivo(db, (ContaPagarReceber.id == conta.id) & (ContaPagarReceber.versao == conta.versao), excluida_em=_agora())
+    if removidas != 1:
+        raise StaleDataError(f"conta {conta.id} foi alterada por outra transacao")
+    db.expunge(conta)
+
+
+def arquiva_contas_baixadas(db: Session, idade_minima: timedelta = IDADE_MINIMA_PARA_ARQUIVAR, hoje: date | None = None) -> int:
+    """Move para o arquivo, em lotes com commit proprio, as contas baixadas previstas antes de hoje - idade_minima.
+
+    O resumo mensal e a cota do mes nao mudam: contas arquivadas continuam contando neles.
+    """
+    corte = (hoje or date.today()) - idade_minima
+    arquivadas = 0
+    while True:
+        ids: List[int] = db.scalars(
+            select(ContaPagarReceber.id)
+            .where(ContaPagarReceber.esta_baixada == True, ContaPagarReceber.data_previsao < corte)
+            .order_by(ContaPagarReceber.id)
+            .limit(TAMANHO_DO_LOTE)
+        ).all()
+        if not ids:
+            return arquivadas
+
+        # a condicao e repetida: uma conta reaberta desde o SELECT fica onde esta
+        arquivadas += _move_para_o_arquivo(db, ContaPagarReceber.id.in_(ids) & (ContaPagarReceber.esta_baixada == True))
+        versao_tabela_service.incrementa_versao(db, versao_tabela_service.CONTAS)
+        db.commit()
+
+
+if __name__ == "__main__":
+    from shared.database import SessionLocal
+
+    idade_minima = timedelta(days=int(sys.argv[1])) if len(sys.argv) > 1 else IDADE_MINIMA_PARA_ARQUIVAR
+    with SessionLocal() as db:
+        print(f"{arquiva_contas_baixadas(db, idade_minima)} conta(s) arquivada(s)")
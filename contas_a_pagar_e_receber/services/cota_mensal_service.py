@@ -0,0 +1,86 @@
+import os
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import Integer, cast, delete, extract, func, insert, tuple_, update
+from sqlalchemy.orm import Session
+
+from contas_a_pagar_e_receber.models.cota_mensal_model import CotaMensal
+from contas_a_pagar_e_receber.services.resumo_mensal_service import INSERTS_COM_UPSERT, contas_vigentes
+
+LIMITE_CONTAS_POR_MES = int(os.getenv("LIMITE_CONTAS_POR_MES", "100"))
+
+
+def reserva_vaga(db: Session, ano: int, mes: int) -> bool:
+    _garante_contador(db, ano, mes)
+
+    # o UPDATE condicional trava a linha do contador ate o commit, entao
+    # requisicoes concorrentes do mesmo mes sao serializadas pelo banco
+    resultado = db.execute(
+        update(CotaMensal)
+        .where(CotaMensal.ano == ano, CotaMensal.mes == mes, CotaMensal.quantidade < LIMITE_CONTAS_POR_MES)
+        .values(quantidade=CotaMensal.quantidade + 1)
+    )
+    return resultado.rowcount == 1
+
+
+def libera_vaga(db: Session, ano: int, mes: int) -> None:
+    db.execute(
+        update(CotaMensal)
+        .where(CotaMensal.ano == ano, CotaMensal.mes == mes, CotaMensal.quantidade > 0)
+        .values(quantidade=CotaMensal.quantidade - 1)
+    )
+
+
+def reserva_vagas(db: Session, pedidos: Dict[Tuple[int, int], int]) -> Dict[Tuple[int, int], int]:
+    if not pedidos:
+        return {}
+
+    _garante_contadores(db, pedidos.keys())
+
+    # as linhas sao travadas sempre em ordem de (ano, mes): dois lotes com os mesmos meses em
+    # ordens diferentes esperam um pelo outro em vez de entrar em deadlock
+    contadores = db.query(CotaMensal) \
+        .filter(tuple_(CotaMensal.ano, CotaMensal.mes).in_(list(pedidos))) \
+        .order_by(CotaMensal.ano, CotaMensal.mes) \
+        .with_for_update() \
+        .all()
+
+    concedidas = {}
+    for contador in contadores:
+        chave = (contador.ano, contador.mes)
+        concedidas[chave] = max(0, min(pedidos[chave], LIMITE_CONTAS_POR_MES - contador.quantidade))
+        contador.quantidade += concedidas[chave]
+
+    db.flush()
+    return concedidas
+
+
+def _garante_contador(db: Session, ano: int, mes: int) -> None:
+    _garante_contadores(db, [(ano, mes)])
+
+
+def _garante_contadores(db: Session, chaves: Iterable[Tuple[int, int]]) -> None:
+    parametros = [{"ano": ano, "mes": mes, "quantidade": 0} for ano, mes in sorted(chaves)]
+
+    insert_com_upsert = INSERTS_COM_UPSERT.get(db.get_bind().dialect.name)
+    if insert_com_upsert is None:
+        for parametro in parametros:
+            if db.get(CotaMensal, {"ano": parametro["ano"], "mes": parametro["mes"]}) is None:
+                db.add(CotaMensal(**parametro))
+        db.flush()
+        return
+
+    db.execute(insert_com_upsert(CotaMensal).on_conflict_do_nothing(), parametros)
+
+
+def reconstroi_cota_mensal(db: Session) -> None:
+    contas = contas_vigentes()
+    ano = cast(extract('year', contas.c.data_previsao), Integer)
+    mes = cast(extract('month', contas.c.data_previsao), Integer)
+
+    db.execute(delete(CotaMensal))
+    db.execute(insert(CotaMensal).from_select(
+        ["ano", "mes", "quantidade"],
+        db.query(ano, mes, func.count(contas.c.id)).group_by(ano, mes).statement,
+    ))
+    db.commit()
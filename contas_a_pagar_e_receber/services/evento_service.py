@@ -0,0 +1,165 @@
+"""Outbox transacional das escritas em contas e fornecedores.
+
+Cada handler de escrita registra o seu evento na mesma transacao da escrita, entao um evento
+existe se, e somente se, a escrita foi confirmada. Os eventos so sao inseridos no commit,
+depois de travar a linha "eventos" de versao_tabela: os ids saem na ordem de commit e um
+consumidor que le "id > cursor" nunca pula um evento confirmado depois com id menor. A trava
+fica com cada escritor so durante a confirmacao, e nao durante a escrita inteira.
+
+A leitura e sempre no primario: uma replica pode ja ter um commit e ainda nao ter o anterior.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Tuple
+
+from sqlalchemy import delete, event, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from contas_a_pagar_e_receber.models.evento_model import Evento
+from contas_a_pagar_e_receber.services import versao_tabela_service
+
+CONTA = "conta_a_pagar_e_receber"
+FORNECEDOR = "fornecedor_cliente"
+RECORRENCIA = "regra_recorrencia"
+
+CRIACAO = "criacao"
+ATUALIZACAO = "atualizacao"
+BAIXA = "baixa"
+PAGAMENTO = "pagamento"
+EXCLUSAO = "exclusao"
+
+RETENCAO_EVENTOS = timedelta(days=int(os.getenv("EVENTOS_RETENCAO_DIAS", "7")))
+# commits de outros processos nao acordam quem espera aqui; eles sao vistos na proxima consulta
+INTERVALO_DE_CONSULTA = float(os.getenv("EVENTOS_INTERVALO_CONSULTA_S", "1"))
+
+# incrementada a cada commit com eventos; quem espera guarda o proprio Event e o loop dele, e o
+# commit, que pode rodar no threadpool, acorda cada um com call_soon_threadsafe
+_geracao = 0
+_aguardando = set()
+_lock_geracao = threading.Lock()
+
+
+def _agora() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def registra_evento(db: Session, entidade: str, operacao: str, entidade_id: int, dados: dict | None = None) -> None:
+    registra_eventos(db, entidade, operacao, [(entidade_id, dados)])
+
+
+def registra_eventos(db: Session, entidade: str, operacao: str, eventos: Iterable[Tuple[int, dict | None]]) -> None:
+    db.info.setdefault("eventos_a_gravar", []).extend(
+        {"entidade": entidade, "entidade_id": entidade_id, "operacao": operacao, "dados": dados}
+        for entidade_id, dados in eventos
+    )
+
+
+# registrado depois do listener de versao_tabela_service (importado acima): toda transacao trava
+# as versoes das tabelas antes da linha "eventos", sempre na mesma ordem
+@event.listens_for(Session, "before_commit")
+def _grava_eventos(db: Session) -> None:
+    linhas = db.info.pop("eventos_a_gravar", None)
+    if not linhas:
+        return
+    db.flush()
+    versao_tabela_service.grava_incrementos(db, [versao_tabela_service.EVENTOS])
+    agora = _agora()
+    db.execute(insert(Evento), [{**linha, "criado_em": agora} for linha in linhas])
+    db.info["eventos_pendentes"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _acorda_consumidores(db: Session) -> None:
+    global _geracao
+    if not db.info.pop("eventos_pendentes", False):
+        return
+    with _lock_geracao:
+        _geracao += 1
+        aguardando = list(_aguardando)
+    for loop, acordado in aguardando:
+        try:
+            loop.call_soon_threadsafe(acordado.set)
+        except RuntimeError:
+            # o loop do consumidor ja foi fechado
+            pass
+
+
+@event.listens_for(Session, "after_rollback")
+def _descarta_pendentes(db: Session) -> None:
+    db.info.pop("eventos_a_gravar", None)
+    db.info.pop("eventos_pendentes", None)
+
+
+def busca_eventos(db: Session, after: int | None, limit: int, entidade: str | None = None) -> List[Evento]:
+    consulta = select(Evento)
+    if after is not None:
+        consulta = consulta.where(Evento.id > after)
+    if entidade is not None:
+        consulta = consulta.where(Evento.entidade == entidade)
+    return db.scalars(consulta.order_by(Evento.id).limit(limit)).all()
+
+
+async def _espera_nova_geracao(geracao: int, segundos: float) -> None:
+    espera = (asyncio.get_running_loop(), asyncio.Event())
+    with _lock_geracao:
+        # um commit entre a consulta e este ponto ja conta: nao ha o que esperar
+        if _geracao != geracao:
+            return
+        _aguardando.add(espera)
+    try:
+        await asyncio.wait_for(espera[1].wait(), segundos)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        with _lock_geracao:
+            _aguardando.discard(espera)
+
+
+async def aguarda_eventos(db: Session, after: int | None, limit: int, espera: float, entidade: str | None = None) -> List[Evento]:
+    """Long-poll: devolve assim que houver eventos depois de after, ou vazio depois de espera segundos.
+
+    So as consultas passam pelo threadpool; a espera fica no event loop, entao um consumidor
+    parado nao segura um worker que as rotas sincronas precisam.
+    """
+    limite = time.monotonic() + espera
+    while True:
+        geracao = _geracao
+        eventos = await run_in_threadpool(busca_eventos, db, after, limit, entidade)
+        restante = limite - time.monotonic()
+        if eventos or restante <= 0:
+            return eventos
+        # devolve a conexao ao pool durante a espera; a proxima consulta ve um snapshot novo
+        await run_in_threadpool(db.rollback)
+        await _espera_nova_geracao(geracao, min(restante, INTERVALO_DE_CONSULTA))
+
+
+async def aguarda_eventos_async(db: AsyncSession, after: int | None, limit: int, espera: float, entidade: str | None = None) -> List[Evento]:
+    limite = time.monotonic() + espera
+    while True:
+        geracao = _geracao
+        eventos = await db.run_sync(busca_eventos, after, limit, entidade)
+        restante = limite - time.monotonic()
+        if eventos or restante <= 0:
+            return eventos
+        await db.rollback()
+        await _espera_nova_geracao(geracao, min(restante, INTERVALO_DE_CONSULTA))
+
+
+def remove_antigos(db: Session, retencao: timedelta = RETENCAO_EVENTOS) -> int:
+    removidos = db.execute(delete(Evento).where(Evento.criado_em < _agora() - retencao)).rowcount
+    db.commit()
+    return removidos
+
+
+if __name__ == "__main__":
+    from shared.database import SessionLocal
+
+    with SessionLocal() as db:
+        print(f"{remove_antigos(db)} evento(s) removido(s)")
+    sys.exit(0)
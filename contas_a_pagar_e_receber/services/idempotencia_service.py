@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Dict, NamedTuple
+
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from contas_a_pagar_e_receber.models.resposta_idempotente_model import RespostaIdempotente
+
+TTL_RESPOSTAS = timedelta(hours=int(os.getenv("IDEMPOTENCIA_TTL_HORAS", "24")))
+
+
+class RequisicaoIdempotente(NamedTuple):
+    chave: str
+    impressao: str
+
+
+def _agora() -> datetime:
+    # gravado sem fuso: o SQLite nao guarda o fuso e a comparacao tem que funcionar nos dois bancos
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def requisicao_idempotente(chave: str | None, operacao: str, *argumentos) -> RequisicaoIdempotente | None:
+    if chave is None:
+        return None
+    # a mesma chave reenviada com outra operacao ou outro corpo nao e uma repeticao
+    conteudo = json.dumps([operacao, jsonable_encoder(argumentos)], sort_keys=True, separators=(",", ":"))
+    return RequisicaoIdempotente(chave, hashlib.sha256(conteudo.encode()).hexdigest())
+
+
+def _resposta(guardada: RespostaIdempotente) -> Response:
+    headers = json.loads(guardada.headers) if guardada.headers else {}
+    return Response(content=guardada.corpo, status_code=guardada.status_code, media_type="application/json",
+                    headers={**headers, "Idempotent-Replayed": "true"})
+
+
+def resposta_guardada(db: Session, requisicao: RequisicaoIdempotente | None) -> Response | None:
+    if requisicao is None:
+        return None
+
+    guardada = db.get(RespostaIdempotente, requisicao.chave)
+    if guardada is None:
+        return None
+    if guardada.expira_em <= _agora():
+        db.delete(guardada)
+        db.flush()
+        return None
+    if guardada.impressao != requisicao.impressao:
+        raise HTTPException(status_code=422, detail="Essa Idempotency-Key ja foi usada em outra requisicao")
+
+    return _resposta(guardada)
+
+
+def guarda_resposta(db: Session, requisicao: RequisicaoIdempotente | None, status_code: int, conteudo,
+                    headers: Dict[str, str] | None = None) -> Response | None:
+    """Grava a resposta na mesma transacao da escrita, antes do commit do handler.
+
+    headers sao os que a resposta original leva alem do corpo (ex.: ETag), repetidos junto com ele.
+
+    Se uma requisicao concorrente com a mesma chave gravou primeiro, desfaz a escrita
+    e devolve a resposta dela.
+    """
+    if requisicao is None:
+        return None
+
+    db.add(RespostaIdempotente(
+        chave=requisicao.chave,
+        impressao=requisicao.impressao,
+        status_code=status_code,
+        corpo=json.dumps(jsonable_encoder(conteudo)),
+        headers=json.dumps(headers) if headers else None,
+        expira_em=_agora() + TTL_RESPOSTAS,
+    ))
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        return resposta_guardada(db, requisicao)
+    return None
+
+
+def remove_expiradas(db: Session) -> int:
+    removidas = db.execute(delete(RespostaIdempotente).where(RespostaIdempotente.expira_em <= _agora())).rowcount
+    db.commit()
+    return removidas
+
+
+if __name__ == "__main__":
+    from shared.database import SessionLocal
+
+    with SessionLocal() as db:
+        print(f"{remove_expiradas(db)} resposta(s) expirada(s) removida(s)")
+    sys.exit(0)
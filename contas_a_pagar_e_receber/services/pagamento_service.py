@@ -0,0 +1,47 @@
+from datetime import date
+from decimal import Decimal
+from typing import List, Sequence, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from contas_a_pagar_e_receber.models.conta_a_pagar_receber_model import ContaPagarReceber
+from contas_a_pagar_e_receber.models.pagamento_model import Pagamento
+from contas_a_pagar_e_receber.services import resumo_mensal_service
+
+def saldo_da_conta(colunas=ContaPagarReceber):
+    # o mesmo saldo de saldo(conta), para somar no banco; aceita o modelo ou as colunas de uma subquery
+    return colunas.valor - func.coalesce(colunas.valor_baixa, 0)
+
+
+SALDO_DA_CONTA = saldo_da_conta()
+
+
+def saldo(conta: ContaPagarReceber) -> Decimal:
+    return Decimal(conta.valor or 0) - Decimal(conta.valor_baixa or 0)
+
+
+def atualiza_situacao(conta: ContaPagarReceber) -> None:
+    conta.esta_baixada = conta.valor_baixa is not None and saldo(conta) <= 0
+
+
+def registra_pagamento(db: Session, conta: ContaPagarReceber, valor: Decimal, data_pagamento: date) -> Pagamento:
+    return registra_pagamentos(db, [(conta, valor, data_pagamento)])[0]
+
+
+# grava os lancamentos e atualiza valor_baixa/esta_baixada das contas na mesma transacao;
+# pagamentos concorrentes na mesma conta sao barrados pela versao dela (ou por FOR UPDATE, no lote)
+def registra_pagamentos(db: Session, pagamentos: Sequence[Tuple[ContaPagarReceber, Decimal, date]]) -> List[Pagamento]:
+    contas = [conta for conta, _, _ in pagamentos]
+    resumo_mensal_service.remove_contas(db, contas)
+
+    lancamentos = []
+    for conta, valor, data_pagamento in pagamentos:
+        conta.valor_baixa = Decimal(conta.valor_baixa or 0) + Decimal(valor)
+        conta.data_baixa = data_pagamento
+        atualiza_situacao(conta)
+        lancamentos.append(Pagamento(conta_a_pagar_e_receber_id=conta.id, valor=valor, data_pagamento=data_pagamento))
+
+    db.add_all(lancamentos)
+    resumo_mensal_service.registra_contas(db, contas)
+    return lancamentos
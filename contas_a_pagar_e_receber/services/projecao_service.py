@@ -0,0 +1,134 @@
+"""Projecao do fluxo de caixa dia a dia: contas em aberto mais as ocorrencias das regras de recorrencia.
+
+As ocorrencias nunca viram linhas. As regras sao lidas em lotes e somadas em vetores de diferencas,
+um por tipo e passo (em dias, ou em meses e dia do mes): cada regra soma o valor na posicao da sua
+primeira ocorrencia na janela e subtrai depois da ultima, e uma soma acumulada com o passo do vetor
+repete o valor em todas as ocorrencias. O custo fica em O(regras + dias x passos distintos), nao no
+numero de ocorrencias; as contas gravadas chegam ja somadas por dia pelo banco.
+"""
+import calendar
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Tuple
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from contas_a_pagar_e_receber.models.conta_a_pagar_receber_model import ContaPagarReceber
+from contas_a_pagar_e_receber.models.regra_recorrencia_model import RegraRecorrencia
+from contas_a_pagar_e_receber.services.pagamento_service import SALDO_DA_CONTA
+
+PASSO_EM_DIAS = {"DIARIA": 1, "SEMANAL": 7}
+PASSO_EM_MESES = {"MENSAL": 1, "ANUAL": 12}
+TIPO_ENTRADA = "RECEBER"
+TAMANHO_DO_LOTE = 1000
+ZERO = Decimal(0)
+
+
+class DiaProjetado(NamedTuple):
+    data: date
+    entradas: Decimal
+    saidas: Decimal
+    saldo: Decimal
+
+
+def _indice_do_mes(dia: date) -> int:
+    return dia.year * 12 + dia.month - 1
+
+
+def _dia_no_mes(indice_do_mes: int, dia_do_mes: int) -> date:
+    # dia 31 cai no ultimo dia dos meses mais curtos, 29/02 no dia 28 fora dos anos bissextos
+    ano, mes = divmod(indice_do_mes, 12)
+    return date(ano, mes + 1, min(dia_do_mes, calendar.monthrange(ano, mes + 1)[1]))
+
+
+def _primeira_e_ultima(inicio_da_regra: int, passo: int, primeira_permitida: int, ultima_permitida: int) -> Tuple[int, int] | None:
+    # posicoes (em dias ou meses) da primeira e da ultima ocorrencia dentro do intervalo permitido
+    primeira = max(inicio_da_regra, inicio_da_regra + -(-(primeira_permitida - inicio_da_regra) // passo) * passo)
+    if primeira > ultima_permitida:
+        return None
+    return primeira, primeira + (ultima_permitida - primeira) // passo * passo
+
+
+def _marca(diferencas: List[Decimal], primeira: int, ultima: int, passo: int, valor: Decimal) -> None:
+    diferencas[primeira] += valor
+    if ultima + passo < len(diferencas):
+        diferencas[ultima + passo] -= valor
+
+
+def _acumula(diferencas: List[Decimal], passo: int) -> List[Decimal]:
+    for posicao in range(passo, len(diferencas)):
+        diferencas[posicao] += diferencas[posicao - passo]
+    return diferencas
+
+
+def projeta_fluxo_de_caixa(db: Session, inicio: date, fim: date, saldo_inicial: Decimal = ZERO) -> List[DiaProjetado]:
+    dias = (fim - inicio).days + 1
+    primeiro_mes = _indice_do_mes(inicio)
+    meses = _indice_do_mes(fim) - primeiro_mes + 1
+
+    por_passo_em_dias: Dict[Tuple[str, int], List[Decimal]] = defaultdict(lambda: [ZERO] * dias)
+    por_passo_em_meses: Dict[Tuple[str, int, int], List[Decimal]] = defaultdict(lambda: [ZERO] * meses)
+
+    regras = select(RegraRecorrencia.tipo, RegraRecorrencia.valor, RegraRecorrencia.frequencia, RegraRecorrencia.intervalo,
+                    RegraRecorrencia.data_inicio, RegraRecorrencia.data_fim) \
+        .where(RegraRecorrencia.data_inicio <= fim, or_(RegraRecorrencia.data_fim.is_(None), RegraRecorrencia.data_fim >= inicio))
+
+    dia_inicial = inicio.toordinal()
+    for tipo, valor, frequencia, intervalo, data_inicio, data_fim in db.execute(regras.execution_options(yield_per=TAMANHO_DO_LOTE)):
+        limite = min(fim, data_fim or fim)
+
+        if frequencia in PASSO_EM_DIAS:
+            passo = PASSO_EM_DIAS[frequencia] * intervalo
+            ocorrencias = _primeira_e_ultima(data_inicio.toordinal(), passo, dia_inicial, limite.toordinal())
+            if ocorrencias is not None:
+                primeira, ultima = ocorrencias
+                _marca(por_passo_em_dias[(tipo, passo)], primeira - dia_inicial, ultima - dia_inicial, passo, Decimal(valor))
+            continue
+
+        passo = PASSO_EM_MESES[frequencia] * intervalo
+        ultimo_mes = _indice_do_mes(limite)
+        if _dia_no_mes(ultimo_mes, data_inicio.day) > limite:
+            ultimo_mes -= 1
+        # a ocorrencia do primeiro mes pode cair antes de inicio; ela e descartada ao espalhar por dia
+        ocorrencias = _primeira_e_ultima(_indice_do_mes(data_inicio), passo, primeiro_mes, ultimo_mes)
+        if ocorrencias is not None:
+            primeira, ultima = ocorrencias
+            _marca(por_passo_em_meses[(tipo, passo, data_inicio.day)], primeira - primeiro_mes, ultima - primeiro_mes, passo, Decimal(valor))
+
+    por_tipo: Dict[bool, List[Decimal]] = {True: [ZERO] * dias, False: [ZERO] * dias}
+
+    for (tipo, passo), diferencas in por_passo_em_dias.items():
+        destino = por_tipo[tipo == TIPO_ENTRADA]
+        for posicao, valor in enumerate(_acumula(diferencas, passo)):
+            destino[posicao] += valor
+
+    # posicao na janela do dia 1 de cada mes e quantos dias o mes tem, calculados uma vez so
+    inicio_dos_meses, dias_dos_meses = [], []
+    for mes in range(primeiro_mes, primeiro_mes + meses):
+        primeiro_dia = _dia_no_mes(mes, 1)
+        inicio_dos_meses.append((primeiro_dia - inicio).days)
+        dias_dos_meses.append(calendar.monthrange(primeiro_dia.year, primeiro_dia.month)[1])
+
+    for (tipo, passo, dia_do_mes), diferencas in por_passo_em_meses.items():
+        destino = por_tipo[tipo == TIPO_ENTRADA]
+        for mes, valor in enumerate(_acumula(diferencas, passo)):
+            if valor:
+                posicao = inicio_dos_meses[mes] + min(dia_do_mes, dias_dos_meses[mes]) - 1
+                if 0 <= posicao < dias:
+                    destino[posicao] += valor
+
+    # esta_baixada = false com literal: a soma vem do indice parcial de contas em aberto
+    contas = select(ContaPagarReceber.data_previsao, ContaPagarReceber.tipo, func.sum(SALDO_DA_CONTA).label("saldo")) \
+        .where(ContaPagarReceber.esta_baixada == False, ContaPagarReceber.data_previsao >= inicio, ContaPagarReceber.data_previsao <= fim) \
+        .group_by(ContaPagarReceber.data_previsao, ContaPagarReceber.tipo)
+    for linha in db.execute(contas):
+        por_tipo[linha.tipo == TIPO_ENTRADA][(linha.data_previsao - inicio).days] += Decimal(linha.saldo)
+
+    projecao = []
+    saldo = saldo_inicial
+    for posicao, (entradas, saidas) in enumerate(zip(por_tipo[True], por_tipo[False])):
+        saldo += entradas - saidas
+        projecao.append(DiaProjetado(date.fromordinal(dia_inicial + posicao), entradas, saidas, saldo))
+    return projecao
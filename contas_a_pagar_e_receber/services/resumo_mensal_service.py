@@ -0,0 +1,164 @@
+import sys
+from datetime import date
+from decimal import Decimal
+from collections import defaultdict
+from typing import Iterable, List
+
+from sqlalchemy import Integer, cast, delete, extract, func, insert, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from contas_a_pagar_e_receber.models.conta_a_pagar_receber_arquivada_model import ContaPagarReceberArquivada
+from contas_a_pagar_e_receber.models.conta_a_pagar_receber_model import ContaPagarReceber
+from contas_a_pagar_e_receber.models.resumo_mensal_model import ResumoMensal
+
+INSERTS_COM_UPSERT = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+COLUNAS_ACUMULADAS = ("quantidade", "valor_total", "valor_baixa_total")
+
+
+def registra_conta(db: Session, conta: ContaPagarReceber) -> None:
+    registra_contas(db, [conta])
+
+
+def remove_conta(db: Session, conta: ContaPagarReceber) -> None:
+    remove_contas(db, [conta])
+
+
+def registra_contas(db: Session, contas: Iterable[ContaPagarReceber]) -> None:
+    _aplica_deltas(db, contas, 1)
+
+
+def remove_contas(db: Session, contas: Iterable[ContaPagarReceber]) -> None:
+    _aplica_deltas(db, contas, -1)
+
+
+def _aplica_deltas(db: Session, contas: Iterable[ContaPagarReceber], sinal: int) -> None:
+    deltas = defaultdict(lambda: dict.fromkeys(COLUNAS_ACUMULADAS, 0))
+    for conta in contas:
+        delta = deltas[(conta.data_previsao.year, conta.data_previsao.month, conta.tipo)]
+        delta["quantidade"] += sinal
+        delta["valor_total"] += sinal * Decimal(conta.valor or 0)
+        delta["valor_baixa_total"] += sinal * Decimal(conta.valor_baixa or 0)
+
+    if not deltas:
+        return
+
+    # as linhas sao travadas sempre em ordem de (ano, mes, tipo): dois lotes com as mesmas chaves em
+    # ordens diferentes esperam um pelo outro em vez de entrar em deadlock
+    parametros = [{"ano": ano, "mes": mes, "tipo": tipo, **delta} for (ano, mes, tipo), delta in sorted(deltas.items())]
+
+    insert_com_upsert = INSERTS_COM_UPSERT.get(db.get_bind().dialect.name)
+    if insert_com_upsert is None:
+        for parametro in parametros:
+            chave = {coluna: parametro[coluna] for coluna in ("ano", "mes", "tipo")}
+            resumo = db.get(ResumoMensal, chave, with_for_update=True) or ResumoMensal(**chave, quantidade=0, valor_total=0, valor_baixa_total=0)
+            for coluna in COLUNAS_ACUMULADAS:
+                setattr(resumo, coluna, getattr(resumo, coluna) + parametro[coluna])
+            db.add(resumo)
+        return
+
+    # uma unica instrucao (executemany) por lote, qualquer que seja o numero de contas
+    comando = insert_com_upsert(ResumoMensal)
+    comando = comando.on_conflict_do_update(
+        index_elements=[ResumoMensal.ano, ResumoMensal.mes, ResumoMensal.tipo],
+        set_={coluna: getattr(ResumoMensal, coluna) + getattr(comando.excluded, coluna) for coluna in COLUNAS_ACUMULADAS},
+    )
+    db.execute(comando, parametros)
+
+
+def filtro_do_ano(ano: int, data_previsao=ContaPagarReceber.data_previsao):
+    # intervalo em data_previsao em vez de extract('year', ...) = ano, para o filtro usar os indices
+    return (data_previsao >= date(ano, 1, 1)) & (data_previsao < date(ano + 1, 1, 1))
+
+
+def contas_vigentes(ano_filtrado: int | None = None, fornecedores_cliente: Iterable[int] | None = None):
+    """Subquery com as contas da tabela principal e as arquivadas que nao foram excluidas.
+
+    E o universo do resumo mensal, da cota e do resumo por fornecedor: arquivar nao altera nenhum deles.
+    """
+    consultas = []
+    for modelo in (ContaPagarReceber, ContaPagarReceberArquivada):
+        consulta = select(modelo.id, modelo.data_previsao, modelo.tipo, modelo.valor, modelo.valor_baixa,
+                          modelo.esta_baixada, modelo.fornecedor_cliente_id)
+        if modelo is ContaPagarReceberArquivada:
+            consulta = consulta.where(modelo.excluida_em.is_(None))
+        if ano_filtrado is not None:
+            consulta = consulta.where(filtro_do_ano(ano_filtrado, modelo.data_previsao))
+        # os filtros vao em cada lado do union para cada tabela usar os proprios indices
+        if fornecedores_cliente is not None:
+            consulta = consulta.where(modelo.fornecedor_cliente_id.in_(fornecedores_cliente))
+        consultas.append(consulta)
+    return union_all(*consultas).subquery("contas_vigentes")
+
+
+def _consulta_resumo_calculado(db: Session, ano_filtrado: int | None = None):
+    contas = contas_vigentes(ano_filtrado)
+    ano = cast(extract('year', contas.c.data_previsao), Integer)
+    mes = cast(extract('month', contas.c.data_previsao), Integer)
+    consulta = db.query(
+        ano.label("ano"),
+        mes.label("mes"),
+        contas.c.tipo.label("tipo"),
+        func.count(contas.c.id).label("quantidade"),
+        func.coalesce(func.sum(contas.c.valor), 0).label("valor_total"),
+        func.coalesce(func.sum(contas.c.valor_baixa), 0).label("valor_baixa_total"),
+    )
+    return consulta.group_by(ano, mes, contas.c.tipo)
+
+
+def reconstroi_resumo_mensal(db: Session, ano: int | None = None) -> None:
+    remocao = delete(ResumoMensal)
+    if ano is not None:
+        remocao = remocao.where(ResumoMensal.ano == ano)
+    db.execute(remocao)
+    db.execute(insert(ResumoMensal).from_select(
+        ["ano", "mes", "tipo", "quantidade", "valor_total", "valor_baixa_total"],
+        _consulta_resumo_calculado(db, ano).statement,
+    ))
+    # import local: versao_tabela_service importa este modulo
+    from contas_a_pagar_e_receber.services import versao_tabela_service
+    # a previsao tira o ETag da versao de contas: sem o incremento, clientes continuariam com 304 e os totais antigos
+    versao_tabela_service.incrementa_versao(db, versao_tabela_service.CONTAS)
+    db.commit()
+
+
+def verifica_divergencias(db: Session, ano: int | None = None) -> List[str]:
+    calculado = {(linha.ano, linha.mes, linha.tipo): linha for linha in _consulta_resumo_calculado(db, ano)}
+    armazenados = db.query(ResumoMensal)
+    if ano is not None:
+        armazenados = armazenados.filter(ResumoMensal.ano == ano)
+    armazenado = {(linha.ano, linha.mes, linha.tipo): linha for linha in armazenados}
+
+    divergencias = []
+    for chave in sorted(calculado.keys() | armazenado.keys(), key=str):
+        esperado = calculado.get(chave)
+        atual = armazenado.get(chave)
+        for coluna in COLUNAS_ACUMULADAS:
+            valor_esperado = getattr(esperado, coluna) if esperado else 0
+            valor_atual = getattr(atual, coluna) if atual else 0
+            if Decimal(valor_esperado) != Decimal(valor_atual):
+                divergencias.append(f"{chave} {coluna}: esperado {valor_esperado}, armazenado {valor_atual}")
+
+    return divergencias
+
+
+if __name__ == "__main__":
+    from shared.database import SessionLocal
+
+    comando = sys.argv[1] if len(sys.argv) > 1 else "verificar"
+    ano = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    with SessionLocal() as db:
+        if comando == "reconstruir":
+            reconstroi_resumo_mensal(db, ano)
+
+        divergencias = verifica_divergencias(db, ano)
+        for divergencia in divergencias:
+            print(divergencia)
+        print(f"{len(divergencias)} divergencia(s) encontrada(s)")
+
+    sys.exit(1 if divergencias else 0)
@@ -0,0 +1,64 @@
+"""Versoes das tabelas usadas nos ETags das listagens.
+
+A escrita so marca a tabela como alterada; o incremento e a ultima instrucao antes do COMMIT,
+na mesma transacao, entao a linha de versao fica travada so durante a confirmacao e a versao
+nunca diverge dos dados.
+"""
+from typing import Dict, Iterable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from contas_a_pagar_e_receber.models.versao_tabela_model import VersaoTabela
+from contas_a_pagar_e_receber.services.resumo_mensal_service import INSERTS_COM_UPSERT
+from shared.cache_http import etag_condicional
+
+CONTAS = "contas_a_pagar_e_receber"
+FORNECEDORES = "fornecedor_cliente"
+RECORRENCIAS = "regras_recorrencia"
+# nao e uma tabela de dados: a linha serve de trava para os ids do outbox seguirem a ordem de commit
+EVENTOS = "eventos"
+
+
+def incrementa_versao(db: Session, tabela: str) -> None:
+    db.info.setdefault("tabelas_alteradas", set()).add(tabela)
+
+
+def grava_incrementos(db: Session, tabelas: Iterable[str]) -> None:
+    insert_com_upsert = INSERTS_COM_UPSERT.get(db.get_bind().dialect.name)
+    # ordem fixa para dois commits simultaneos nao travarem as linhas em ordens opostas
+    for tabela in sorted(tabelas):
+        if insert_com_upsert is None:
+            versao = db.get(VersaoTabela, tabela, with_for_update=True) or VersaoTabela(tabela=tabela, versao=0)
+            versao.versao += 1
+            db.add(versao)
+            db.flush()
+            continue
+
+        comando = insert_com_upsert(VersaoTabela).values(tabela=tabela, versao=1)
+        db.execute(comando.on_conflict_do_update(index_elements=[VersaoTabela.tabela], set_={"versao": VersaoTabela.versao + 1}))
+
+
+@event.listens_for(Session, "before_commit")
+def _grava_versoes(db: Session) -> None:
+    tabelas = db.info.pop("tabelas_alteradas", None)
+    if tabelas:
+        # o flush vem antes para o incremento ser a ultima instrucao da transacao
+        db.flush()
+        grava_incrementos(db, tabelas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descarta_alteradas(db: Session) -> None:
+    db.info.pop("tabelas_alteradas", None)
+
+
+def obtem_versoes(db: Session, tabelas: Iterable[str]) -> Dict[str, int]:
+    tabelas = list(tabelas)
+    versoes = dict.fromkeys(tabelas, 0)
+    versoes.update(db.query(VersaoTabela.tabela, VersaoTabela.versao).filter(VersaoTabela.tabela.in_(tabelas)).all())
+    return versoes
+
+
+def etag_das_tabelas(*tabelas: str, cache_control: str | None = None):
+    return etag_condicional(lambda db: obtem_versoes(db, tabelas), cache_control)
@@ -1,19 +1,28 @@
 from fastapi import FastAPI
-from contas_a_pagar_e_receber.routers import contas_a_pagar_e_receber_router, fornecedor_cliente_router, fornecedor_cliente_vs_contas_router
-from shared.exceptions import NotFound
-from shared.exceptions_handler import not_found_exception_handler
+from contas_a_pagar_e_receber.routers import busca_router, contas_a_pagar_e_receber_router, evento_router, fornecedor_cliente_router, fornecedor_cliente_vs_contas_router, pagamento_router, recorrencia_router
+from shared import metricas
+from shared.database import settings
+from sqlalchemy.orm.exc import StaleDataError
+from shared.exceptions import Conflito, NaoModificado, NotFound
+from shared.exceptions_handler import conflito_exception_handler, nao_modificado_exception_handler, not_found_exception_handler, versao_desatualizada_exception_handler
+from shared.instrumentacao import MetricasMiddleware
 
 app = FastAPI()
+app.add_middleware(MetricasMiddleware)
 
 @app.get("/")
 def oi_eu_sou_programador():
     return "OLA MUNDO!"
 
-app.include_router(contas_a_pagar_e_receber_router.router)
-app.include_router(fornecedor_cliente_router.router)
-app.include_router(fornecedor_cliente_vs_contas_router.router)
+for modulo_router in (contas_a_pagar_e_receber_router, fornecedor_cliente_router, fornecedor_cliente_vs_contas_router, pagamento_router, busca_router, evento_router, recorrencia_router):
+    app.include_router(modulo_router.async_router if settings.mode == "async" else modulo_router.router)
+
+app.include_router(metricas.router)
 
 app.add_exception_handler(NotFound, not_found_exception_handler)
+app.add_exception_handler(NaoModificado, nao_modificado_exception_handler)
+app.add_exception_handler(Conflito, conflito_exception_handler)
+app.add_exception_handler(StaleDataError, versao_desatualizada_exception_handler)
 
 
 
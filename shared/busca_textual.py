@@ -0,0 +1,97 @@
+"""Busca por trecho de texto em uma coluna.
+
+No Postgres a coluna ganha um indice GiST de trigramas (pg_trgm), que atende ILIKE '%termo%'
+e devolve as linhas ja em ordem de word_similarity (busca KNN pelo operador <<->). No SQLite
+uma tabela FTS5 com tokenizer trigram espelha a coluna por triggers e ordena pelo bm25 (rank).
+Os dois so encontram termos com 3 ou mais caracteres.
+
+A ordenacao por relevancia fica na propria consulta ao indice e so depois vem o limite de
+CANDIDATOS_MAXIMOS: um termo presente em boa parte da tabela (ex.: "aluguel") nao descarta
+os melhores resultados, so os que ficariam depois do candidato de numero CANDIDATOS_MAXIMOS.
+"""
+from typing import Callable, Dict, List
+
+from sqlalchemy import DDL, Column, Float, Table, column, event, literal, select, table
+
+TAMANHO_MINIMO_DO_TERMO = 3
+CANDIDATOS_MAXIMOS = 2000
+
+
+def nome_da_tabela_fts(tabela: Table) -> str:
+    return f"{tabela.name}_busca"
+
+
+def nome_do_indice_trigram(tabela: Table, coluna: str) -> str:
+    return f"ix_{tabela.name}_{coluna}_trgm"
+
+
+def ddl_postgres(tabela: Table, coluna: str) -> List[str]:
+    return [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        f"CREATE INDEX {nome_do_indice_trigram(tabela, coluna)} ON {tabela.name} USING gist ({coluna} gist_trgm_ops)",
+    ]
+
+
+def ddl_sqlite(tabela: Table, coluna: str) -> List[str]:
+    fts = nome_da_tabela_fts(tabela)
+    chave = tabela.primary_key.columns.values()[0].name
+    # external content: o FTS guarda so o indice e le o texto da propria tabela pelo rowid
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({coluna}, content='{tabela.name}', content_rowid='{chave}', tokenize='trigram')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {tabela.name} BEGIN "
+        f"INSERT INTO {fts}(rowid, {coluna}) VALUES (new.{chave}, new.{coluna}); END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {tabela.name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {coluna}) VALUES ('delete', old.{chave}, old.{coluna}); END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {coluna} ON {tabela.name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {coluna}) VALUES ('delete', old.{chave}, old.{coluna}); "
+        f"INSERT INTO {fts}(rowid, {coluna}) VALUES (new.{chave}, new.{coluna}); END",
+    ]
+
+
+def indexa_para_busca(tabela: Table, coluna: str) -> None:
+    for comando in ddl_postgres(tabela, coluna):
+        event.listen(tabela, "after_create", DDL(comando).execute_if(dialect="postgresql"))
+    for comando in ddl_sqlite(tabela, coluna):
+        event.listen(tabela, "after_create", DDL(comando).execute_if(dialect="sqlite"))
+    # as triggers caem junto com a tabela, a tabela FTS nao
+    event.listen(tabela, "before_drop", DDL(f"DROP TABLE IF EXISTS {nome_da_tabela_fts(tabela)}").execute_if(dialect="sqlite"))
+
+
+def _escapa_like(termo: str) -> str:
+    return termo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _consulta_postgres(chave: Column, coluna: Column, termo: str):
+    # 1 - word_similarity; o GiST entrega as linhas nessa ordem sem calcular a distancia de todas
+    distancia = literal(termo).op("<<->", return_type=Float)(coluna)
+    return select(chave.label("id"), coluna.label("texto"), (1 - distancia).label("relevancia")) \
+        .where(coluna.ilike(f"%{_escapa_like(termo)}%", escape="\\")) \
+        .order_by(distancia)
+
+
+def _consulta_sqlite(chave: Column, coluna: Column, termo: str):
+    fts = table(nome_da_tabela_fts(coluna.table), column("rowid"), column(coluna.name), column("rank", Float))
+    # o termo vira uma frase: aspas e operadores digitados nao sao interpretados pelo FTS5
+    frase = '"' + termo.replace('"', '""') + '"'
+    return select(fts.c.rowid.label("id"), fts.c[coluna.name].label("texto"), (-fts.c.rank).label("relevancia")) \
+        .where(column(fts.name).op("MATCH")(frase)) \
+        .order_by(fts.c.rank)
+
+
+def _consulta_generica(chave: Column, coluna: Column, termo: str):
+    return select(chave.label("id"), coluna.label("texto"), literal(1.0, Float).label("relevancia")) \
+        .where(coluna.ilike(f"%{_escapa_like(termo)}%", escape="\\")) \
+        .order_by(chave)
+
+
+CONSULTAS_DE_BUSCA: Dict[str, Callable] = {
+    "postgresql": _consulta_postgres,
+    "sqlite": _consulta_sqlite,
+}
+
+
+def consulta_busca(dialeto: str, chave: Column, coluna: Column, termo: str):
+    """Select de (id, texto, relevancia) das linhas que contem o termo, as mais relevantes primeiro."""
+    # cada consulta ja vem ordenada por relevancia, entao o limite corta so os piores candidatos
+    candidatos = CONSULTAS_DE_BUSCA.get(dialeto, _consulta_generica)(chave, coluna, termo).limit(CANDIDATOS_MAXIMOS).subquery()
+    return select(candidatos).order_by(candidatos.c.relevancia.desc(), candidatos.c.id)
@@ -0,0 +1,174 @@
+import json
+import logging
+import select
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from shared import metricas
+
+logger = logging.getLogger(__name__)
+
+
+class BackendInvalidacao(ABC):
+    """Canal por onde os workers avisam uns aos outros que uma chave mudou (ex.: Redis pub/sub)."""
+
+    @abstractmethod
+    def publica(self, canal: str, chave: Hashable) -> None:
+        ...
+
+    @abstractmethod
+    def assina(self, canal: str, callback: Callable[[Hashable], None]) -> None:
+        ...
+
+
+class BackendInvalidacaoLocal(BackendInvalidacao):
+    def __init__(self):
+        self._assinantes: Dict[str, List[Callable[[Hashable], None]]] = {}
+
+    def publica(self, canal: str, chave: Hashable) -> None:
+        for callback in self._assinantes.get(canal, []):
+            callback(chave)
+
+    def assina(self, canal: str, callback: Callable[[Hashable], None]) -> None:
+        self._assinantes.setdefault(canal, []).append(callback)
+
+
+class BackendInvalidacaoPostgres(BackendInvalidacao):
+    """LISTEN/NOTIFY no banco primario: cada processo escuta os canais em uma conexao propria.
+
+    As chaves trafegam como JSON, entao precisam ser ints ou strings. Avisos enviados enquanto a
+    conexao de escuta estava caida se perdem; nesse caso o TTL do cache limita o atraso.
+    """
+
+    def __init__(self, engine: Engine, intervalo_s: float = 1.0):
+        self._engine = engine
+        self._intervalo_s = intervalo_s
+        self._assinantes: Dict[str, List[Callable[[Hashable], None]]] = {}
+        self._lock = threading.Lock()
+        self._conexao = None
+        self._escutando = False
+
+    def publica(self, canal: str, chave: Hashable) -> None:
+        with self._engine.connect() as conexao:
+            conexao.execute(text("SELECT pg_notify(:canal, :chave)"), {"canal": canal, "chave": json.dumps(chave)})
+            conexao.commit()
+
+    def assina(self, canal: str, callback: Callable[[Hashable], None]) -> None:
+        with self._lock:
+            novo_canal = canal not in self._assinantes
+            self._assinantes.setdefault(canal, []).append(callback)
+            if not self._escutando:
+                self._escutando = True
+                threading.Thread(target=self._escuta, daemon=True).start()
+            elif novo_canal and self._conexao is not None:
+                self._executa_listen(self._conexao, [canal])
+
+    def _conecta(self):
+        # fora do pool: a conexao fica presa na escuta enquanto o processo viver
+        cargs, cparams = self._engine.dialect.create_connect_args(self._engine.url)
+        conexao = self._engine.dialect.connect(*cargs, **cparams)
+        conexao.autocommit = True
+        with self._lock:
+            self._executa_listen(conexao, list(self._assinantes))
+            self._conexao = conexao
+        return conexao
+
+    @staticmethod
+    def _executa_listen(conexao, canais: List[str]) -> None:
+        with conexao.cursor() as cursor:
+            for canal in canais:
+                cursor.execute(f'LISTEN "{canal}"')
+
+    def _escuta(self) -> None:
+        while True:
+            try:
+                conexao = self._conecta()
+                while True:
+                    if select.select([conexao], [], [], self._intervalo_s) == ([], [], []):
+                        continue
+                    conexao.poll()
+                    while conexao.notifies:
+                        aviso = conexao.notifies.pop(0)
+                        for callback in list(self._assinantes.get(aviso.channel, [])):
+                            callback(json.loads(aviso.payload))
+            except Exception:
+                logger.exception("conexao de escuta das invalidacoes de cache caiu; reconectando")
+                with self._lock:
+                    self._conexao = None
+                time.sleep(self._intervalo_s)
+
+
+class CacheLRU:
+    def __init__(self, nome: str, tamanho_maximo: int = 1024, ttl_segundos: float = 60,
+                 backend: BackendInvalidacao | None = None, relogio: Callable[[], float] = time.monotonic):
+        self.nome = nome
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl_segundos = ttl_segundos
+        self.acertos = 0
+        self.falhas = 0
+        self._relogio = relogio
+        self._itens: OrderedDict = OrderedDict()
+        # incrementado a cada invalidacao; um valor carregado antes dela nao volta para o cache
+        self._invalidacoes = 0
+        self._lock = threading.Lock()
+        self._backend = None
+        if backend is not None:
+            self.conecta_backend(backend)
+        metricas.registro.registra_coletor(self._amostras)
+
+    def conecta_backend(self, backend: BackendInvalidacao) -> None:
+        self._backend = backend
+        backend.assina(self.nome, self._remove)
+
+    def obtem(self, chave: Hashable, carregador: Callable[[], Any]) -> Any:
+        agora = self._relogio()
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None and item[1] > agora:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return item[0]
+            self.falhas += 1
+            invalidacoes = self._invalidacoes
+
+        valor = carregador()
+        # valores ausentes nao sao guardados: um registro criado depois precisa aparecer
+        if valor is not None:
+            with self._lock:
+                if self._invalidacoes != invalidacoes:
+                    # uma invalidacao chegou durante o carregamento: o valor pode ser o anterior a ela
+                    return valor
+                self._itens[chave] = (valor, agora + self.ttl_segundos)
+                self._itens.move_to_end(chave)
+                while len(self._itens) > self.tamanho_maximo:
+                    self._itens.popitem(last=False)
+        return valor
+
+    def invalida(self, chave: Hashable) -> None:
+        self._remove(chave)
+        if self._backend is not None:
+            self._backend.publica(self.nome, chave)
+
+    def limpa(self) -> None:
+        with self._lock:
+            self._invalidacoes += 1
+            self._itens.clear()
+
+    def _remove(self, chave: Hashable) -> None:
+        with self._lock:
+            self._invalidacoes += 1
+            self._itens.pop(chave, None)
+
+    def _amostras(self) -> List[metricas.Amostra]:
+        rotulos = {"cache": self.nome}
+        return [
+            metricas.Amostra("cache_hits_total", "counter", rotulos, self.acertos),
+            metricas.Amostra("cache_misses_total", "counter", rotulos, self.falhas),
+            metricas.Amostra("cache_size", "gauge", rotulos, len(self._itens)),
+        ]
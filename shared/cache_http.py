@@ -0,0 +1,55 @@
+import hashlib
+from typing import Callable, Dict
+
+from fastapi import Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from shared.dependencies import get_async_db, get_db
+from shared.exceptions import Conflito, NaoModificado
+
+
+def calcula_etag(request: Request, versoes: Dict[str, int]) -> str:
+    conteudo = f"{request.url.path}?{request.url.query}|" + ",".join(f"{tabela}={versao}" for tabela, versao in sorted(versoes.items()))
+    return '"' + hashlib.sha1(conteudo.encode()).hexdigest() + '"'
+
+
+def _corresponde(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidatas = [candidata.strip() for candidata in if_none_match.split(",")]
+    return "*" in candidatas or etag in candidatas
+
+
+def verifica_etag(request: Request, response: Response, versoes: Dict[str, int], cache_control: str | None) -> None:
+    etag = calcula_etag(request, versoes)
+    headers = {"ETag": etag}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+
+    if _corresponde(request.headers.get("if-none-match"), etag):
+        raise NaoModificado(headers)
+
+    response.headers.update(headers)
+
+
+def etag_da_versao(versao: int) -> str:
+    return f'"{versao}"'
+
+
+def verifica_if_match(if_match: str | None, versao: int, nome: str) -> None:
+    # sem If-Match a escrita ainda e protegida pela versao lida na propria requisicao
+    if if_match is not None and not _corresponde(if_match, etag_da_versao(versao)):
+        raise Conflito(nome)
+
+
+def etag_condicional(carrega_versoes: Callable[[Session], Dict[str, int]], cache_control: str | None = None):
+    # responde 304 antes do handler rodar, entao nada do ORM e tocado quando o cliente ja tem a versao atual
+    def dependencia(request: Request, response: Response, db: Session = Depends(get_db)) -> None:
+        verifica_etag(request, response, carrega_versoes(db), cache_control)
+
+    async def dependencia_async(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)) -> None:
+        verifica_etag(request, response, await db.run_sync(carrega_versoes), cache_control)
+
+    dependencia.equivalente_async = dependencia_async
+    return Depends(dependencia)
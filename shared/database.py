@@ -1,14 +1,91 @@
-import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from shared import metricas
+from shared.cache import BackendInvalidacaoPostgres
+from shared.instrumentacao import instrumenta_consultas
+from shared.replicas import RoteadorDeLeitura
+from shared.settings import DatabaseSettings
 
 # SQLALCHEMY_DATABASE_URL = "sqlite:///./sql_app.db"
-SQLALCHEMY_DATABASE_URL = os.getenv('SQLALCHEMY_DATABASE_URL')
+settings = DatabaseSettings.from_env()
+
+
+def argumentos_do_engine(settings: DatabaseSettings, url: str) -> dict:
+    url = make_url(url)
+    argumentos = {"pool_pre_ping": settings.pool_pre_ping}
+    connect_args = {}
+
+    if settings.pool_mode == "null":
+        argumentos["poolclass"] = NullPool
+        if url.get_driver_name() == "asyncpg":
+            # o pgbouncer em modo transaction nao suporta prepared statements nomeados
+            connect_args["statement_cache_size"] = 0
+    elif url.get_backend_name() != "sqlite":
+        argumentos.update(
+            pool_size=settings.pool_size,
+            max_overflow=settings.max_overflow,
+            pool_timeout=settings.pool_timeout,
+            pool_recycle=settings.pool_recycle,
+        )
+
+    if settings.statement_timeout_ms is not None and url.get_backend_name() == "postgresql":
+        if url.get_driver_name() == "asyncpg":
+            connect_args["server_settings"] = {"statement_timeout": str(settings.statement_timeout_ms)}
+        else:
+            connect_args["options"] = f"-c statement_timeout={settings.statement_timeout_ms}"
+
+    if connect_args:
+        argumentos["connect_args"] = connect_args
+    return argumentos
+
+
+def instrumenta_pool(engine, nome: str) -> None:
+    rotulos = {"engine": nome}
+    event.listen(engine, "connect", lambda *_: metricas.registro.incrementa("db_pool_connections_created_total", **rotulos))
+    event.listen(engine, "checkout", lambda *_: metricas.registro.incrementa("db_pool_checkouts_total", **rotulos))
+    event.listen(engine, "checkin", lambda *_: metricas.registro.incrementa("db_pool_checkins_total", **rotulos))
+    metricas.registro.registra_coletor(lambda: metricas.estatisticas_do_pool(engine.pool, rotulos))
+
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL
+    settings.url, **argumentos_do_engine(settings, settings.url)
 )
+instrumenta_pool(engine, "sync")
+instrumenta_consultas(engine, settings.slow_query_ms)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+backend_invalidacao = BackendInvalidacaoPostgres(engine) if settings.cache_invalidation else None
+
+replica_engines = []
+for indice, replica_url in enumerate(settings.replica_urls):
+    replica_engine = create_engine(replica_url, **argumentos_do_engine(settings, replica_url))
+    instrumenta_pool(replica_engine, f"replica_{indice}")
+    instrumenta_consultas(replica_engine, settings.slow_query_ms)
+    replica_engines.append(replica_engine)
+roteador = RoteadorDeLeitura(
+    engine,
+    replica_engines,
+    janela_leitura_s=settings.read_your_writes_ms / 1000 if settings.read_your_writes_ms else None,
+    intervalo_verificacao_s=settings.replica_health_check_s,
+)
+if replica_engines:
+    metricas.registro.registra_coletor(roteador.amostras)
+
+async_engine = create_async_engine(settings.async_url, **argumentos_do_engine(settings, settings.async_url)) if settings.async_url else None
+if async_engine is not None:
+    instrumenta_pool(async_engine.sync_engine, "async")
+    instrumenta_consultas(async_engine.sync_engine, settings.slow_query_ms)
+    async_replica_engines = []
+    for indice, replica_url in enumerate(settings.async_replica_urls):
+        replica_engine = create_async_engine(replica_url, **argumentos_do_engine(settings, replica_url))
+        instrumenta_pool(replica_engine.sync_engine, f"async_replica_{indice}")
+        instrumenta_consultas(replica_engine.sync_engine, settings.slow_query_ms)
+        async_replica_engines.append(replica_engine)
+    roteador.usa_engines_async(async_engine, async_replica_engines)
+AsyncSessionLocal = async_sessionmaker(autocommit=False, autoflush=False, bind=async_engine)
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
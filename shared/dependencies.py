@@ -1,8 +1,38 @@
-from shared.database import SessionLocal
+from fastapi import Request, Response
 
-def get_db():
-    db = SessionLocal()
+from shared.database import AsyncSessionLocal, SessionLocal, roteador
+
+def get_db(request: Request, response: Response):
+    db = SessionLocal(bind=roteador.engine_para(request, response))
     try:
         yield db
     finally:
         db.close()
+
+
+def get_db_primario():
+    # para leituras que nao podem ver um snapshot atrasado de replica (ex.: o cursor do outbox)
+    db = SessionLocal(bind=roteador.primario)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db(request: Request, response: Response):
+    # mesmo roteamento de get_db; sem async_url configurada fica o bind padrao da fabrica
+    engine = roteador.async_engine_para(request, response)
+    db = AsyncSessionLocal() if engine is None else AsyncSessionLocal(bind=engine)
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+async def get_async_db_primario():
+    # o bind padrao da fabrica async e o primario
+    db = AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
@@ -2,3 +2,12 @@ class NotFound(Exception):
     def __init__(self, name: str):
         self.name = name
 
+
+class Conflito(Exception):
+    def __init__(self, name: str):
+        self.name = name
+
+
+class NaoModificado(Exception):
+    def __init__(self, headers: dict):
+        self.headers = headers
@@ -1,9 +1,26 @@
-from fastapi import Request
+from fastapi import Request, Response
 from fastapi.responses import JSONResponse
-from shared.exceptions import NotFound
+from sqlalchemy.orm.exc import StaleDataError
+from shared.exceptions import Conflito, NaoModificado, NotFound
 
 async def not_found_exception_handler(_: Request, exc: NotFound):
     return JSONResponse(
         status_code=404,
         content={'message': f"OOPS! {exc.name} not found"}
-    )
\ No newline at end of file
+    )
+
+async def conflito_exception_handler(_: Request, exc: Conflito):
+    return JSONResponse(
+        status_code=409,
+        content={'message': f"OOPS! {exc.name} was modified by another request"}
+    )
+
+# o UPDATE com a versao lida nao encontrou a linha: outra requisicao gravou no meio do caminho
+async def versao_desatualizada_exception_handler(_: Request, exc: StaleDataError):
+    return JSONResponse(
+        status_code=409,
+        content={'message': "OOPS! record was modified by another request"}
+    )
+
+async def nao_modificado_exception_handler(_: Request, exc: NaoModificado):
+    return Response(status_code=304, headers=exc.headers)
@@ -0,0 +1,106 @@
+import contextvars
+import logging
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+
+from shared import metricas
+
+logger_consultas_lentas = logging.getLogger("contas.consultas_lentas")
+
+ROTA_DESCONHECIDA = "desconhecida"
+
+
+@dataclass
+class EstatisticasRequisicao:
+    scope: dict = field(default_factory=dict)
+    consultas: int = 0
+    tempo_db: float = 0.0
+    linhas: int = 0
+
+    @property
+    def rota(self) -> str:
+        # o router do starlette preenche o scope compartilhado com a rota escolhida
+        rota = self.scope.get("route")
+        return getattr(rota, "path", ROTA_DESCONHECIDA)
+
+
+requisicao_atual: contextvars.ContextVar[EstatisticasRequisicao | None] = contextvars.ContextVar("requisicao_atual", default=None)
+
+
+def instrumenta_consultas(engine, limite_consulta_lenta_ms: int | None) -> None:
+    if event.contains(engine, "before_cursor_execute", _antes_da_consulta):
+        return
+    event.listen(engine, "before_cursor_execute", _antes_da_consulta)
+    event.listen(
+        engine,
+        "after_cursor_execute",
+        lambda conn, cursor, statement, *_: _depois_da_consulta(conn, cursor, statement, limite_consulta_lenta_ms),
+    )
+    event.listen(engine, "handle_error", _consulta_com_erro)
+
+
+def _antes_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("inicio_das_consultas", []).append(time.perf_counter())
+
+
+def _consulta_com_erro(contexto_da_excecao):
+    inicios = contexto_da_excecao.connection.info.get("inicio_das_consultas") if contexto_da_excecao.connection is not None else None
+    if inicios:
+        inicios.pop()
+
+
+def _depois_da_consulta(conn, cursor, statement, limite_consulta_lenta_ms):
+    duracao = time.perf_counter() - conn.info["inicio_das_consultas"].pop()
+    estatisticas = requisicao_atual.get()
+    rota = estatisticas.rota if estatisticas is not None else None
+
+    if estatisticas is not None:
+        estatisticas.consultas += 1
+        estatisticas.tempo_db += duracao
+        # drivers como o sqlite3 devolvem -1 em SELECT, so o que o driver informa entra na conta
+        if cursor.rowcount is not None and cursor.rowcount > 0:
+            estatisticas.linhas += cursor.rowcount
+
+    if limite_consulta_lenta_ms is not None and duracao * 1000 >= limite_consulta_lenta_ms:
+        metricas.registro.incrementa("db_slow_queries_total", rota=rota or ROTA_DESCONHECIDA)
+        logger_consultas_lentas.warning("consulta lenta (%.1f ms) na rota %s: %s", duracao * 1000, rota or "-", statement)
+
+
+class MetricasMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        estatisticas = EstatisticasRequisicao(scope)
+        token = requisicao_atual.set(estatisticas)
+        resposta = {"status": 500, "tamanho": 0}
+
+        async def envia(mensagem):
+            if mensagem["type"] == "http.response.start":
+                resposta["status"] = mensagem["status"]
+            elif mensagem["type"] == "http.response.body":
+                resposta["tamanho"] += len(mensagem.get("body", b""))
+            await send(mensagem)
+
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, envia)
+        finally:
+            requisicao_atual.reset(token)
+            _registra_requisicao(estatisticas, scope["method"], resposta["status"], time.perf_counter() - inicio, resposta["tamanho"])
+
+
+def _registra_requisicao(estatisticas: EstatisticasRequisicao, metodo: str, status: int, duracao: float, tamanho: int) -> None:
+    rotulos = {"rota": estatisticas.rota, "metodo": metodo}
+    registro = metricas.registro
+    registro.observa("http_request_duration_seconds", duracao, **rotulos, status=str(status))
+    registro.observa("http_request_db_duration_seconds", estatisticas.tempo_db, **rotulos)
+    registro.observa("http_request_db_queries", estatisticas.consultas, metricas.BUCKETS_QUANTIDADE, **rotulos)
+    registro.observa("http_request_db_rows", estatisticas.linhas, metricas.BUCKETS_QUANTIDADE, **rotulos)
+    registro.observa("http_response_size_bytes", tamanho, metricas.BUCKETS_BYTES, **rotulos)
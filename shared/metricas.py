@@ -0,0 +1,124 @@
+import bisect
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+router = APIRouter()
+
+BUCKETS_DURACAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_QUANTIDADE = (1, 2, 5, 10, 25, 50, 100, 250, 1000, 10000)
+BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Amostra(NamedTuple):
+    nome: str
+    tipo: str
+    rotulos: Dict[str, str]
+    valor: float
+    # nome da metrica no "# TYPE", quando difere do nome da amostra (_bucket, _sum e _count dos histogramas)
+    familia: str = ""
+
+
+class Histograma:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self.contagens = [0] * len(self.buckets)
+        self.soma = 0.0
+        self.total = 0
+
+    def observa(self, valor: float) -> None:
+        indice = bisect.bisect_left(self.buckets, valor)
+        if indice < len(self.contagens):
+            self.contagens[indice] += 1
+        self.soma += valor
+        self.total += 1
+
+    def amostras(self, nome: str, rotulos: Dict[str, str]) -> List[Amostra]:
+        amostras = []
+        acumulado = 0
+        for limite, contagem in zip(self.buckets, self.contagens):
+            acumulado += contagem
+            amostras.append(Amostra(f"{nome}_bucket", "histogram", {**rotulos, "le": f"{limite:g}"}, acumulado, nome))
+        amostras.append(Amostra(f"{nome}_bucket", "histogram", {**rotulos, "le": "+Inf"}, self.total, nome))
+        amostras.append(Amostra(f"{nome}_sum", "histogram", rotulos, self.soma, nome))
+        amostras.append(Amostra(f"{nome}_count", "histogram", rotulos, self.total, nome))
+        return amostras
+
+
+class Registro:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contadores: Dict[Tuple[str, Tuple], float] = defaultdict(float)
+        self._histogramas: Dict[Tuple[str, Tuple], Histograma] = {}
+        self._coletores: List[Callable[[], Iterable[Amostra]]] = []
+
+    def incrementa(self, nome: str, valor: float = 1, **rotulos) -> None:
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            self._contadores[chave] += valor
+
+    def observa(self, nome: str, valor: float, buckets: Sequence[float] = BUCKETS_DURACAO, **rotulos) -> None:
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            histograma = self._histogramas.get(chave)
+            if histograma is None:
+                histograma = self._histogramas[chave] = Histograma(buckets)
+            histograma.observa(valor)
+
+    def registra_coletor(self, coletor: Callable[[], Iterable[Amostra]]) -> None:
+        self._coletores.append(coletor)
+
+    def amostras(self) -> List[Amostra]:
+        with self._lock:
+            amostras = [Amostra(nome, "counter", dict(rotulos), valor) for (nome, rotulos), valor in self._contadores.items()]
+            for (nome, rotulos), histograma in self._histogramas.items():
+                amostras.extend(histograma.amostras(nome, dict(rotulos)))
+        for coletor in self._coletores:
+            amostras.extend(coletor())
+        return amostras
+
+    def renderiza(self) -> str:
+        por_nome: Dict[str, List[Amostra]] = defaultdict(list)
+        for amostra in self.amostras():
+            por_nome[amostra.familia or amostra.nome].append(amostra)
+
+        linhas = []
+        for nome in sorted(por_nome):
+            linhas.append(f"# TYPE {nome} {por_nome[nome][0].tipo}")
+            for amostra in por_nome[nome]:
+                linhas.append(f"{amostra.nome}{_formata_rotulos(amostra.rotulos)} {amostra.valor:g}")
+        return "\n".join(linhas) + "\n"
+
+
+def _formata_rotulos(rotulos: Dict[str, str]) -> str:
+    if not rotulos:
+        return ""
+    conteudo = ",".join(f'{chave}="{_escapa(str(valor))}"' for chave, valor in sorted(rotulos.items()))
+    return "{" + conteudo + "}"
+
+
+def _escapa(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def estatisticas_do_pool(pool, rotulos: Dict[str, str]) -> List[Amostra]:
+    # NullPool e os pools do SQLite nao mantem conexoes, entao so o QueuePool tem esses numeros
+    if not all(hasattr(pool, metodo) for metodo in ("size", "checkedout", "checkedin", "overflow")):
+        return []
+    return [
+        Amostra("db_pool_size", "gauge", rotulos, pool.size()),
+        Amostra("db_pool_checked_out", "gauge", rotulos, pool.checkedout()),
+        Amostra("db_pool_checked_in", "gauge", rotulos, pool.checkedin()),
+        Amostra("db_pool_overflow", "gauge", rotulos, pool.overflow()),
+    ]
+
+
+registro = Registro()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def exportar_metricas() -> PlainTextResponse:
+    return PlainTextResponse(registro.renderiza(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,118 @@
+import itertools
+import math
+import threading
+import time
+from typing import Dict, List, Sequence
+
+from fastapi import Request, Response
+from sqlalchemy import event, exc, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from shared import metricas
+
+METODOS_DE_LEITURA = frozenset({"GET", "HEAD", "OPTIONS"})
+COOKIE_ULTIMA_ESCRITA = "ultima_escrita"
+
+
+class RoteadorDeLeitura:
+    """Escolhe o engine de cada requisicao: leituras vao para uma replica, o resto para o primario.
+
+    Depois de uma escrita o cliente recebe um cookie e, durante janela_leitura_s, as leituras
+    dele tambem vao para o primario (read-your-writes). Replica que falha ao conectar ou em uma
+    consulta sai da rotacao ate a proxima verificacao, feita em segundo plano a cada
+    intervalo_verificacao_s; sem replica saudavel, tudo vai para o primario.
+
+    No modo assincrono cada engine tem um equivalente async (usa_engines_async): a escolha e a
+    mesma, feita sobre os engines sincronos, que tambem fazem a verificacao de saude.
+    """
+
+    def __init__(self, primario: Engine, replicas: Sequence[Engine], janela_leitura_s: float | None = None, intervalo_verificacao_s: float = 10):
+        self.primario = primario
+        self.replicas = list(replicas)
+        self.janela_leitura_s = janela_leitura_s
+        self.intervalo_verificacao_s = intervalo_verificacao_s
+        self._saudaveis: List[Engine] = list(self.replicas)
+        self._proxima = itertools.count()
+        self._verificando = threading.Lock()
+        self._proxima_verificacao = time.monotonic() + intervalo_verificacao_s
+        self._equivalentes_async: Dict[Engine, AsyncEngine] = {}
+
+        for replica in self.replicas:
+            event.listen(replica, "handle_error", self._ao_falhar(replica))
+
+    def usa_engines_async(self, primario: AsyncEngine, replicas: Sequence[AsyncEngine] = ()) -> None:
+        # sem replicas async as leituras do modo assincrono ficam no primario
+        if replicas and len(replicas) != len(self.replicas):
+            raise ValueError("informe uma replica async para cada replica")
+        self._equivalentes_async = {self.primario: primario, **dict(zip(self.replicas, replicas))}
+        for replica, replica_async in zip(self.replicas, replicas):
+            event.listen(replica_async.sync_engine, "handle_error", self._ao_falhar(replica))
+
+    def engine_para(self, request: Request, response: Response) -> Engine:
+        if request.method not in METODOS_DE_LEITURA:
+            self._marca_escrita(response)
+            return self.primario
+        if self._escreveu_recentemente(request):
+            return self.primario
+        return self.replica_saudavel() or self.primario
+
+    def async_engine_para(self, request: Request, response: Response) -> AsyncEngine | None:
+        if not self._equivalentes_async:
+            return None
+        engine = self.engine_para(request, response)
+        return self._equivalentes_async.get(engine, self._equivalentes_async[self.primario])
+
+    def replica_saudavel(self) -> Engine | None:
+        if self.replicas and time.monotonic() >= self._proxima_verificacao and self._verificando.acquire(blocking=False):
+            # a verificacao pode esperar o timeout de conexao de uma replica fora do ar; a requisicao nao
+            threading.Thread(target=self._verifica_em_segundo_plano, daemon=True).start()
+
+        saudaveis = self._saudaveis
+        if not saudaveis:
+            return None
+        return saudaveis[next(self._proxima) % len(saudaveis)]
+
+    def verifica_replicas(self) -> None:
+        saudaveis = []
+        for replica in self.replicas:
+            try:
+                with replica.connect() as conexao:
+                    conexao.execute(text("SELECT 1"))
+            except exc.DBAPIError:
+                continue
+            saudaveis.append(replica)
+        self._saudaveis = saudaveis
+        self._proxima_verificacao = time.monotonic() + self.intervalo_verificacao_s
+
+    def amostras(self) -> List[metricas.Amostra]:
+        return [
+            metricas.Amostra("db_replicas", "gauge", {}, len(self.replicas)),
+            metricas.Amostra("db_replicas_saudaveis", "gauge", {}, len(self._saudaveis)),
+        ]
+
+    def _verifica_em_segundo_plano(self) -> None:
+        try:
+            self.verifica_replicas()
+        finally:
+            self._verificando.release()
+
+    def _ao_falhar(self, replica: Engine):
+        def remove_da_rotacao(contexto) -> None:
+            if contexto.is_disconnect or isinstance(contexto.sqlalchemy_exception, exc.OperationalError):
+                self._saudaveis = [saudavel for saudavel in self._saudaveis if saudavel is not replica]
+                metricas.registro.incrementa("db_replica_failures_total", replica=replica.url.render_as_string(hide_password=True))
+        return remove_da_rotacao
+
+    def _marca_escrita(self, response: Response) -> None:
+        if self.replicas and self.janela_leitura_s:
+            response.set_cookie(COOKIE_ULTIMA_ESCRITA, f"{time.time():.3f}", max_age=math.ceil(self.janela_leitura_s), httponly=True)
+
+    def _escreveu_recentemente(self, request: Request) -> bool:
+        if not self.janela_leitura_s:
+            return False
+        try:
+            ultima_escrita = float(request.cookies.get(COOKIE_ULTIMA_ESCRITA, ""))
+        except ValueError:
+            return False
+        return time.time() - ultima_escrita < self.janela_leitura_s
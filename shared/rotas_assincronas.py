@@ -0,0 +1,65 @@
+import functools
+import inspect
+from typing import Callable, Dict
+
+from fastapi import APIRouter, Depends, Response
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.dependencies import get_async_db
+
+
+def converte_para_async(router: APIRouter, substituicoes: Dict[Callable, Callable] | None = None) -> APIRouter:
+    """Gera um router com a versao async de cada rota do router sincrono.
+
+    O handler sincrono roda dentro de AsyncSession.run_sync, entao o I/O com o banco
+    acontece no driver async sem ocupar um worker do threadpool. Rotas que precisam de
+    uma implementacao propria (ex.: streaming) sao informadas em substituicoes, e
+    dependencias da rota com um atributo equivalente_async sao trocadas por ele.
+    """
+    substituicoes = substituicoes or {}
+    router_async = APIRouter()
+
+    for rota in router.routes:
+        if not isinstance(rota, APIRoute):
+            continue
+
+        endpoint = substituicoes.get(rota.endpoint) or _envolve(rota.endpoint, rota.response_model)
+        router_async.add_api_route(
+            rota.path,
+            endpoint,
+            methods=list(rota.methods),
+            response_model=rota.response_model,
+            status_code=rota.status_code,
+            response_class=rota.response_class,
+            name=rota.name,
+            tags=rota.tags,
+            dependencies=[Depends(getattr(dependencia.dependency, "equivalente_async", dependencia.dependency)) for dependencia in rota.dependencies],
+        )
+
+    return router_async
+
+
+def _envolve(endpoint: Callable, response_model) -> Callable:
+    assinatura = inspect.signature(endpoint)
+    adaptador = TypeAdapter(response_model) if response_model is not None else None
+
+    def executa(db, kwargs):
+        resultado = endpoint(db=db, **kwargs)
+        # a serializacao precisa acontecer dentro do run_sync: fora dele um lazy load
+        # (ex.: conta.fornecedor) nao consegue mais fazer I/O no driver async
+        if adaptador is None or resultado is None or isinstance(resultado, Response):
+            return resultado
+        return adaptador.validate_python(resultado, from_attributes=True)
+
+    @functools.wraps(endpoint)
+    async def endpoint_async(**kwargs):
+        db: AsyncSession = kwargs.pop("db")
+        return await db.run_sync(executa, kwargs)
+
+    endpoint_async.__signature__ = assinatura.replace(parameters=[
+        parametro.replace(annotation=AsyncSession, default=Depends(get_async_db)) if parametro.name == "db" else parametro
+        for parametro in assinatura.parameters.values()
+    ])
+    return endpoint_async
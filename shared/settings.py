@@ -0,0 +1,68 @@
+import os
+from dataclasses import dataclass
+
+
+def _env_bool(nome: str, padrao: bool) -> bool:
+    valor = os.getenv(nome)
+    if valor is None:
+        return padrao
+    return valor.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_lista(nome: str) -> tuple:
+    return tuple(valor.strip() for valor in os.getenv(nome, "").split(",") if valor.strip())
+
+
+def _env_int(nome: str, padrao: int | None) -> int | None:
+    valor = os.getenv(nome)
+    if valor is None or valor == "":
+        return padrao
+    return int(valor)
+
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    url: str | None = None
+    async_url: str | None = None
+    # "sync" atende cada requisicao no threadpool, "async" usa AsyncSession e handlers async
+    mode: str = "sync"
+    # "queue" usa o pool do SQLAlchemy, "null" abre e fecha conexoes (para uso atras do pgbouncer)
+    pool_mode: str = "queue"
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: int = 30
+    pool_recycle: int = -1
+    pool_pre_ping: bool = False
+    statement_timeout_ms: int | None = None
+    # consultas a partir desse tempo vao para o log de consultas lentas ("off" desliga)
+    slow_query_ms: int | None = 500
+    # leituras (GET) vao para as replicas; sem replicas tudo vai para url
+    replica_urls: tuple = ()
+    # as mesmas replicas com driver async, na mesma ordem; sem elas o modo async le do primario
+    async_replica_urls: tuple = ()
+    # depois de uma escrita, as leituras do mesmo cliente ficam no primario por esse tempo ("off" desliga)
+    read_your_writes_ms: int | None = 2000
+    replica_health_check_s: int = 10
+    # avisa os outros processos das invalidacoes de cache por LISTEN/NOTIFY no primario (so Postgres)
+    cache_invalidation: bool = False
+
+    @classmethod
+    def from_env(cls) -> "DatabaseSettings":
+        return cls(
+            url=os.getenv("SQLALCHEMY_DATABASE_URL"),
+            async_url=os.getenv("SQLALCHEMY_ASYNC_DATABASE_URL"),
+            mode=os.getenv("DATABASE_MODE", cls.mode),
+            pool_mode=os.getenv("DATABASE_POOL_MODE", cls.pool_mode),
+            pool_size=_env_int("DATABASE_POOL_SIZE", cls.pool_size),
+            max_overflow=_env_int("DATABASE_MAX_OVERFLOW", cls.max_overflow),
+            pool_timeout=_env_int("DATABASE_POOL_TIMEOUT", cls.pool_timeout),
+            pool_recycle=_env_int("DATABASE_POOL_RECYCLE", cls.pool_recycle),
+            pool_pre_ping=_env_bool("DATABASE_POOL_PRE_PING", cls.pool_pre_ping),
+            statement_timeout_ms=_env_int("DATABASE_STATEMENT_TIMEOUT_MS", cls.statement_timeout_ms),
+            slow_query_ms=None if os.getenv("DATABASE_SLOW_QUERY_MS") == "off" else _env_int("DATABASE_SLOW_QUERY_MS", cls.slow_query_ms),
+            replica_urls=_env_lista("SQLALCHEMY_REPLICA_URLS"),
+            async_replica_urls=_env_lista("SQLALCHEMY_ASYNC_REPLICA_URLS"),
+            read_your_writes_ms=None if os.getenv("DATABASE_READ_YOUR_WRITES_MS") == "off" else _env_int("DATABASE_READ_YOUR_WRITES_MS", cls.read_your_writes_ms),
+            replica_health_check_s=_env_int("DATABASE_REPLICA_HEALTH_CHECK_S", cls.replica_health_check_s),
+            cache_invalidation=_env_bool("DATABASE_CACHE_INVALIDATION", cls.cache_invalidation),
+        )
@@ -0,0 +1,10 @@
+import pytest
+
+from contas_a_pagar_e_receber.routers.fornecedor_cliente_router import cache_fornecedores
+
+
+@pytest.fixture(autouse=True)
+def limpa_caches():
+    # os testes recriam o banco e reaproveitam ids, entao nada pode sobrar em cache
+    cache_fornecedores.limpa()
+    yield
@@ -0,0 +1,142 @@
+import os
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from contas_a_pagar_e_receber.models.conta_a_pagar_receber_model import ContaPagarReceber
+from contas_a_pagar_e_receber.models.fornecedor_cliente_model import FornecedorCliente
+from contas_a_pagar_e_receber.routers.contas_a_pagar_e_receber_router import _filtra_contas, consulta_aging
+from contas_a_pagar_e_receber.services.resumo_mensal_service import _consulta_resumo_calculado
+from shared.busca_textual import consulta_busca, nome_da_tabela_fts, nome_do_indice_trigram
+from shared.database import Base
+from test.utils import plano_de_execucao
+
+# os testes com Postgres so rodam com TEST_POSTGRES_URL apontando para um banco descartavel
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def conexao(request):
+    if request.param == "sqlite":
+        engine = create_engine("sqlite:///./test.db", connect_args={"check_same_thread": False})
+    elif TEST_POSTGRES_URL:
+        engine = create_engine(TEST_POSTGRES_URL)
+    else:
+        pytest.skip("TEST_POSTGRES_URL nao definido")
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conexao:
+        conexao.execute(insert(FornecedorCliente), [{"nome": f"Fornecedor {i}"} for i in range(20)])
+        # a maior parte ja baixada, como em producao
+        conexao.execute(insert(ContaPagarReceber), [
+            {
+                "descricao": f"Conta {i}",
+                "valor": 100,
+                "tipo": "PAGAR" if i % 3 else "RECEBER",
+                "data_previsao": date(2021, 1, 1) + timedelta(days=i % 1460),
+                "esta_baixada": i % 10 != 0,
+                "fornecedor_cliente_id": 1 + (i // 10) % 20,
+            }
+            for i in range(3000)
+        ])
+        conexao.execute(text("ANALYZE"))
+
+    with engine.connect() as conexao:
+        if conexao.dialect.name == "postgresql":
+            # com poucas linhas o Postgres prefere o seq scan; aqui so interessa se existe indice que atenda
+            conexao.execute(text("SET enable_seqscan = off"))
+        yield conexao
+    engine.dispose()
+
+
+def _assert_usa_indice(plano: str, indice: str) -> None:
+    assert indice in plano, plano
+    # percorrer um indice inteiro ("SCAN ... USING INDEX") e aceitavel quando ele e parcial; ler a tabela nao
+    assert "Seq Scan" not in plano and "SCAN contas_a_pagar_e_receber" not in plano.splitlines(), plano
+
+
+def test_listagem_por_tipo_e_periodo_deve_usar_indice(conexao):
+    consulta = _filtra_contas(select(ContaPagarReceber.id), "PAGAR", None, date(2023, 1, 1), date(2023, 3, 31), None)
+
+    _assert_usa_indice(plano_de_execucao(conexao, consulta.order_by(ContaPagarReceber.id).limit(101)), "ix_contas_a_pagar_e_receber_tipo_data_previsao")
+
+
+def test_listagem_de_contas_em_aberto_deve_usar_indice_parcial(conexao):
+    consulta = _filtra_contas(select(ContaPagarReceber.id, ContaPagarReceber.valor), "PAGAR", False, date(2023, 1, 1), date(2023, 3, 31), None)
+
+    _assert_usa_indice(plano_de_execucao(conexao, consulta.order_by(ContaPagarReceber.id).limit(101)), "ix_contas_a_pagar_e_receber_em_aberto_tipo_data_previsao")
+
+
+def test_contas_de_um_fornecedor_cliente_devem_usar_indice(conexao):
+    consulta = select(ContaPagarReceber.id).where(ContaPagarReceber.fornecedor_cliente_id == 7)
+
+    _assert_usa_indice(plano_de_execucao(conexao, consulta), "ix_contas_a_pagar_e_receber_fornecedor_cliente_id_id")
+
+
+def test_resumo_de_um_ano_deve_usar_intervalo_de_datas(conexao):
+    consulta = _consulta_resumo_calculado(Session(bind=conexao), 2023).statement
+
+    _assert_usa_indice(plano_de_execucao(conexao, consulta), "data_previsao")
+
+
+def test_saldo_em_aberto_por_fornecedor_cliente_deve_usar_indice_parcial(conexao):
+    consulta = select(ContaPagarReceber.fornecedor_cliente_id, func.sum(ContaPagarReceber.valor - func.coalesce(ContaPagarReceber.valor_baixa, 0))) \
+        .where(ContaPagarReceber.esta_baixada == False, ContaPagarReceber.fornecedor_cliente_id == 7) \
+        .group_by(ContaPagarReceber.fornecedor_cliente_id)
+
+    _assert_usa_indice(plano_de_execucao(conexao, consulta), "ix_contas_a_pagar_e_receber_em_aberto_fornecedor_cliente_id")
+
+
+@pytest.mark.parametrize("tipo", [None, "PAGAR"])
+@pytest.mark.parametrize("colunas_do_grupo", [[], [ContaPagarReceber.fornecedor_cliente_id], [ContaPagarReceber.tipo]])
+def test_aging_deve_ler_so_indices_parciais_de_contas_em_aberto(conexao, colunas_do_grupo, tipo):
+    # o aging nao tem indice proprio: os parciais por tipo e por fornecedor levam as colunas que ele soma e agrupa,
+    # e o planejador escolhe entre eles conforme o filtro e o agrupamento
+    consulta = consulta_aging(date(2023, 6, 30), colunas_do_grupo, tipo)
+
+    _assert_usa_indice(plano_de_execucao(conexao, consulta), "ix_contas_a_pagar_e_receber_em_aberto_")
+
+
+def test_busca_por_trecho_da_descricao_deve_usar_indice_de_busca(conexao):
+    consulta = consulta_busca(conexao.dialect.name, ContaPagarReceber.id, ContaPagarReceber.descricao, "nta 12").limit(21)
+    tabela = ContaPagarReceber.__table__
+    indice = nome_da_tabela_fts(tabela) if conexao.dialect.name == "sqlite" else nome_do_indice_trigram(tabela, "descricao")
+
+    _assert_usa_indice(plano_de_execucao(conexao, consulta), indice)
+
+
+@pytest.fixture
+def conexao_postgres_com_volume():
+    if not TEST_POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL nao definido")
+
+    engine = create_engine(TEST_POSTGRES_URL)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conexao:
+        conexao.execute(insert(FornecedorCliente), [{"nome": f"Fornecedor {i}"} for i in range(200)])
+        # 2% em aberto, como numa base em que quase tudo ja foi baixado
+        conexao.execute(text("""
+            INSERT INTO contas_a_pagar_e_receber (descricao, valor, tipo, data_previsao, esta_baixada, fornecedor_cliente_id)
+            SELECT 'Conta ' || i, 100, CASE WHEN i % 3 = 0 THEN 'RECEBER' ELSE 'PAGAR' END,
+                   DATE '2019-01-01' + (i % 1825), i % 50 <> 0, 1 + i % 200
+            FROM generate_series(1, 200000) AS i
+        """))
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conexao:
+        conexao.execute(text("VACUUM ANALYZE contas_a_pagar_e_receber"))
+
+    # sem SET enable_seqscan = off: o planejador tem que preferir o indice parcial por conta propria
+    with engine.connect() as conexao:
+        yield conexao
+    engine.dispose()
+
+
+@pytest.mark.parametrize("tipo", [None, "PAGAR"])
+@pytest.mark.parametrize("colunas_do_grupo", [[], [ContaPagarReceber.fornecedor_cliente_id], [ContaPagarReceber.tipo]])
+def test_aging_no_postgres_deve_escolher_indice_parcial_com_volume(conexao_postgres_com_volume, colunas_do_grupo, tipo):
+    consulta = consulta_aging(date(2023, 6, 30), colunas_do_grupo, tipo)
+
+    _assert_usa_indice(plano_de_execucao(conexao_postgres_com_volume, consulta), "ix_contas_a_pagar_e_receber_em_aberto_")
@@ -0,0 +1,87 @@
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from shared import busca_textual
+from shared.database import Base
+from shared.dependencies import get_db
+
+client = TestClient(app)
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+
+TestingSessionLocal = sessionmaker(autoflush=False, bind=engine, autocommit=False)
+
+def override_get_db():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def usa_banco_de_teste(monkeypatch):
+    # o override e global do app: aplicado por teste, senao vale o do ultimo modulo importado
+    # e o assert_max_queries escuta um engine que as requisicoes nao usam
+    monkeypatch.setitem(app.dependency_overrides, get_db, override_get_db)
+
+
+def _busca(**params):
+    return [(resultado['tipo'], resultado['id'], resultado['texto']) for resultado in client.get("/busca", params=params).json()]
+
+
+def test_deve_buscar_contas_e_fornecedores_por_trecho_do_texto():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    client.post("/fornecedor-cliente", json={"nome": "Aluguel & Cia"})
+    client.post("/fornecedor-cliente", json={"nome": "Casa de musica"})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel da loja', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-30'})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'luz', 'tipo': 'PAGAR', 'valor': 200, 'data_previsao': '2024-07-30'})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'Aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-08-30'})
+
+    # maiusculas e minusculas nao importam, e o texto mais curto com o termo vem antes
+    assert _busca(q='ALUG', tipo='conta') == [('conta', 3, 'Aluguel'), ('conta', 1, 'aluguel da loja')]
+    assert sorted(_busca(q='ALUG')) == [('conta', 1, 'aluguel da loja'), ('conta', 3, 'Aluguel'), ('fornecedor', 1, 'Aluguel & Cia')]
+    assert _busca(q='musi') == [('fornecedor', 2, 'Casa de musica')]
+    assert _busca(q='alug', tipo='fornecedor') == [('fornecedor', 1, 'Aluguel & Cia')]
+    assert _busca(q='"alug" OR') == []
+    assert client.get("/busca", params={'q': 'lu'}).status_code == 422
+
+    # os triggers mantem o indice de busca junto com as escritas
+    client.put("/contas-a-pagar-e-receber/2", json={'descricao': 'energia', 'tipo': 'PAGAR', 'valor': 200, 'data_previsao': '2024-07-30'})
+    client.delete("/contas-a-pagar-e-receber/3")
+    assert _busca(q='alug', tipo='conta') == [('conta', 1, 'aluguel da loja')]
+    assert _busca(q='energ') == [('conta', 2, 'energia')]
+
+
+def test_deve_paginar_a_busca_por_offset():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    response = client.post("/contas-a-pagar-e-receber/bulk", json=[
+        {'descricao': f'parcela {i}', 'tipo': 'PAGAR', 'valor': 10, 'data_previsao': '2024-07-30'} for i in range(5)
+    ])
+    assert response.status_code == 200
+
+    primeira = client.get("/busca", params={'q': 'parcela', 'limit': 3})
+    segunda = client.get("/busca", params={'q': 'parcela', 'limit': 3, 'offset': primeira.headers['X-Next-Offset']})
+
+    ids = [resultado['id'] for resultado in primeira.json() + segunda.json()]
+    assert sorted(ids) == [1, 2, 3, 4, 5]
+    assert 'X-Next-Offset' not in segunda.headers
+
+
+def test_limite_de_candidatos_deve_manter_os_mais_relevantes(monkeypatch):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(busca_textual, "CANDIDATOS_MAXIMOS", 2)
+    for descricao in ('aluguel da loja do centro', 'aluguel da sala comercial', 'aluguel do deposito', 'Aluguel'):
+        client.post("/contas-a-pagar-e-receber", json={'descricao': descricao, 'tipo': 'PAGAR', 'valor': 10, 'data_previsao': '2024-07-30'})
+
+    # o texto mais curto foi gravado por ultimo; o limite vem depois da ordenacao, entao ele nao fica de fora
+    assert _busca(q='alug', tipo='conta')[0] == ('conta', 4, 'Aluguel')
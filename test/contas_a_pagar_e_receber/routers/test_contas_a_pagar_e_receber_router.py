@@ -1,10 +1,23 @@
+import csv
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import Response
 from fastapi.testclient import TestClient
 from main import app
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from contas_a_pagar_e_receber.models.conta_a_pagar_receber_arquivada_model import ContaPagarReceberArquivada
+from contas_a_pagar_e_receber.models.conta_a_pagar_receber_model import ContaPagarReceber
+from contas_a_pagar_e_receber.routers.contas_a_pagar_e_receber_router import resposta_rapida
+from contas_a_pagar_e_receber.services import cota_mensal_service
+from contas_a_pagar_e_receber.services.resumo_mensal_service import verifica_divergencias
 from shared.database import Base
 from shared.dependencies import get_db
+from test.utils import assert_max_queries
 
 client = TestClient(app)
 
@@ -23,7 +36,11 @@ def override_get_db():
     finally:
         db.close()
 
-app.dependency_overrides[get_db] = override_get_db
+@pytest.fixture(autouse=True)
+def usa_banco_de_teste(monkeypatch):
+    # o override e global do app: aplicado por teste, senao vale o do ultimo modulo importado
+    # e o assert_max_queries escuta um engine que as requisicoes nao usam
+    monkeypatch.setitem(app.dependency_overrides, get_db, override_get_db)
 
 def test_deve_listar_contas_a_pagar_e_receber():
     Base.metadata.drop_all(bind=engine)
@@ -130,6 +147,31 @@ def test_deve_remover_conta_a_pagar_e_receber():
 
     assert response_put.status_code == 204
 
+def test_deve_guardar_conta_removida_no_arquivo_sem_devolver_nas_leituras():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    ids = [client.post("/contas-a-pagar-e-receber", json={'descricao': f'conta {i}', 'tipo': 'PAGAR', 'valor': 10, 'data_previsao': '2024-07-30'}).json()['id']
+           for i in range(2)]
+    client.post(f"/contas-a-pagar-e-receber/{ids[1]}/pagamentos", json={'valor': 4})
+
+    assert client.delete(f"/contas-a-pagar-e-receber/{ids[1]}").status_code == 204
+
+    assert client.get(f"/contas-a-pagar-e-receber/{ids[1]}").status_code == 404
+    assert client.get(f"/contas-a-pagar-e-receber/{ids[1]}", params={'incluir_arquivadas': True}).status_code == 404
+    assert [conta['id'] for conta in client.get("/contas-a-pagar-e-receber", params={'incluir_arquivadas': True}).json()] == [ids[0]]
+
+    # o id da conta removida nao e reaproveitado
+    nova = client.post("/contas-a-pagar-e-receber", json={'descricao': 'conta 2', 'tipo': 'PAGAR', 'valor': 10, 'data_previsao': '2024-07-30'})
+    assert nova.json()['id'] > ids[1]
+
+    with TestingSessionLocal() as db:
+        arquivada = db.get(ContaPagarReceberArquivada, ids[1])
+        assert arquivada.excluida_em is not None
+        assert arquivada.valor_baixa == 4
+        assert verifica_divergencias(db) == []
+
+
 def test_deve_retornar_nao_encontrado_para_id_nao_existente():
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
@@ -187,4 +229,492 @@ def test_deve_retornar_erro_ao_inserir_conta_com_fornecedor_invalido():
 
     response = client.post("/contas-a-pagar-e-receber", json=nova_conta)
     assert response.status_code == 422
-    assert response.json()['detail'] == 'Esse fornecedor não existe'
\ No newline at end of file
+    assert response.json()['detail'] == 'Esse fornecedor não existe'
+
+def test_deve_paginar_contas_a_pagar_e_receber_pelo_cursor():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    for i in range(5):
+        client.post("/contas-a-pagar-e-receber", json={'descricao': f'conta {i}', 'tipo': 'PAGAR', 'valor': 10, 'data_previsao': '2024-07-30'})
+
+    response = client.get('/contas-a-pagar-e-receber', params={'limit': 2})
+    assert response.status_code == 200
+    assert [conta['id'] for conta in response.json()] == [1, 2]
+    assert response.headers['X-Next-Cursor'] == '2'
+
+    response = client.get('/contas-a-pagar-e-receber', params={'limit': 2, 'after': 4})
+    assert [conta['id'] for conta in response.json()] == [5]
+    assert 'X-Next-Cursor' not in response.headers
+
+
+def test_deve_filtrar_contas_a_pagar_e_receber():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    client.post("/fornecedor-cliente", json={"nome": "Casa de musica"})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-30'})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'salario', 'tipo': 'RECEBER', 'valor': 5000, 'data_previsao': '2024-08-05'})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'guitarra', 'tipo': 'PAGAR', 'valor': 999, 'data_previsao': '2024-09-10', 'fornecedor_cliente_id': 1})
+    client.post("/contas-a-pagar-e-receber/1/baixar")
+
+    def ids(**params):
+        return [conta['id'] for conta in client.get('/contas-a-pagar-e-receber', params=params).json()]
+
+    assert ids(tipo='RECEBER') == [2]
+    assert ids(esta_baixada=True) == [1]
+    assert ids(esta_baixada=False) == [2, 3]
+    assert ids(data_previsao_inicio='2024-08-01', data_previsao_fim='2024-08-31') == [2]
+    assert ids(fornecedor_cliente_id=1) == [3]
+    assert ids(tipo='PAGAR', esta_baixada=False) == [3]
+
+
+def test_deve_exportar_contas_a_pagar_e_receber_em_ndjson():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-30'})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'salario', 'tipo': 'RECEBER', 'valor': 5000, 'data_previsao': '2024-08-05'})
+
+    response = client.get('/contas-a-pagar-e-receber/export', params={'formato': 'ndjson'})
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/x-ndjson'
+
+    linhas = [json.loads(linha) for linha in response.text.splitlines()]
+    assert linhas == [
+        {'id': 1, 'descricao': 'aluguel', 'valor': 1000.0, 'tipo': 'PAGAR', 'data_previsao': '2024-07-30', 'data_baixa': None, 'valor_baixa': None, 'esta_baixada': False, 'fornecedor_cliente_id': None},
+        {'id': 2, 'descricao': 'salario', 'valor': 5000.0, 'tipo': 'RECEBER', 'data_previsao': '2024-08-05', 'data_baixa': None, 'valor_baixa': None, 'esta_baixada': False, 'fornecedor_cliente_id': None},
+    ]
+
+
+def test_deve_exportar_contas_a_pagar_e_receber_em_csv_com_filtro():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-30'})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'salario', 'tipo': 'RECEBER', 'valor': 5000, 'data_previsao': '2024-08-05'})
+
+    response = client.get('/contas-a-pagar-e-receber/export', params={'formato': 'csv', 'tipo': 'RECEBER'})
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/csv')
+    linhas = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(linhas) == 1
+    assert linhas[0]['id'] == '2'
+    assert linhas[0]['descricao'] == 'salario'
+    assert float(linhas[0]['valor']) == 5000
+    assert linhas[0]['data_previsao'] == '2024-08-05'
+    assert linhas[0]['esta_baixada'] == 'False'
+
+
+def test_deve_calcular_previsao_de_gastos_por_mes():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-01'})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'luz', 'tipo': 'PAGAR', 'valor': 200, 'data_previsao': '2024-07-15'})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'agua', 'tipo': 'PAGAR', 'valor': 50, 'data_previsao': '2024-08-10'})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'salario', 'tipo': 'RECEBER', 'valor': 5000, 'data_previsao': '2024-07-05'})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2025-01-01'})
+
+    response = client.get('/contas-a-pagar-e-receber/previsao-gastos-do-mes', params={'ano': 2024})
+    assert response.status_code == 200
+    assert response.json() == [{'mes': 7, 'valor_total': 1200}, {'mes': 8, 'valor_total': 50}]
+
+    response = client.get('/contas-a-pagar-e-receber/previsao-gastos-do-mes', params={'ano': 2024, 'tipo': 'RECEBER'})
+    assert response.json() == [{'mes': 7, 'valor_total': 5000}]
+
+    response = client.get('/contas-a-pagar-e-receber/previsao-gastos-do-mes', params={'ano': 2024, 'fluxo_liquido': True})
+    assert response.json() == [{'mes': 7, 'valor_total': 3800}, {'mes': 8, 'valor_total': -50}]
+
+
+def test_deve_respeitar_limite_de_contas_por_mes_com_requisicoes_concorrentes():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    def cria_conta(i):
+        return client.post("/contas-a-pagar-e-receber", json={'descricao': f'conta {i}', 'tipo': 'PAGAR', 'valor': 10, 'data_previsao': '2024-07-30'}).status_code
+
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        status = list(executor.map(cria_conta, range(300)))
+
+    assert status.count(201) == 100
+    assert status.count(422) == 200
+
+    with TestingSessionLocal() as db:
+        assert db.query(ContaPagarReceber).count() == 100
+
+
+def test_deve_liberar_vaga_do_mes_ao_remover_conta(monkeypatch):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(cota_mensal_service, 'LIMITE_CONTAS_POR_MES', 2)
+
+    for i in range(2):
+        client.post("/contas-a-pagar-e-receber", json={'descricao': f'conta {i}', 'tipo': 'PAGAR', 'valor': 10, 'data_previsao': '2024-07-30'})
+
+    response = client.post("/contas-a-pagar-e-receber", json={'descricao': 'conta 3', 'tipo': 'PAGAR', 'valor': 10, 'data_previsao': '2024-07-30'})
+    assert response.status_code == 422
+    assert response.json()['detail'] == 'Voce nao pode mais cadastrar contas'
+
+    client.delete("/contas-a-pagar-e-receber/1")
+
+    response = client.post("/contas-a-pagar-e-receber", json={'descricao': 'conta 3', 'tipo': 'PAGAR', 'valor': 10, 'data_previsao': '2024-07-30'})
+    assert response.status_code == 201
+
+
+def test_deve_criar_contas_a_pagar_e_receber_em_lote(monkeypatch):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(cota_mensal_service, 'LIMITE_CONTAS_POR_MES', 2)
+    client.post("/fornecedor-cliente", json={"nome": "Casa de musica"})
+
+    response = client.post("/contas-a-pagar-e-receber/bulk", json=[
+        {'descricao': 'guitarra', 'tipo': 'PAGAR', 'valor': 999, 'data_previsao': '2024-07-01', 'fornecedor_cliente_id': 1},
+        {'descricao': 'baixo', 'tipo': 'PAGAR', 'valor': 500, 'data_previsao': '2024-07-02', 'fornecedor_cliente_id': 1001},
+        {'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-03'},
+        {'descricao': 'luz', 'tipo': 'PAGAR', 'valor': 200, 'data_previsao': '2024-07-04'},
+        {'descricao': 'salario', 'tipo': 'RECEBER', 'valor': 5000, 'data_previsao': '2024-08-05'},
+    ])
+
+    assert response.status_code == 200
+    resultados = response.json()
+    assert [resultado['sucesso'] for resultado in resultados] == [True, False, True, False, True]
+    assert resultados[0]['conta']['fornecedor'] == {'id': 1, 'nome': 'Casa de musica'}
+    assert resultados[1]['erro'] == 'Esse fornecedor não existe'
+    assert resultados[3]['erro'] == 'Voce nao pode mais cadastrar contas'
+    assert [resultado['conta']['id'] for resultado in resultados if resultado['sucesso']] == [1, 2, 3]
+
+    response = client.get('/contas-a-pagar-e-receber/previsao-gastos-do-mes', params={'ano': 2024, 'fluxo_liquido': True})
+    assert response.json() == [{'mes': 7, 'valor_total': -1999}, {'mes': 8, 'valor_total': 5000}]
+
+
+def test_deve_baixar_contas_a_pagar_e_receber_em_lote():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-30'})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'luz', 'tipo': 'PAGAR', 'valor': 200, 'data_previsao': '2024-07-10'})
+
+    response = client.post("/contas-a-pagar-e-receber/baixar/bulk", json=[1, 100, 2])
+
+    assert response.status_code == 200
+    resultados = response.json()
+    assert [resultado['sucesso'] for resultado in resultados] == [True, False, True]
+    assert resultados[0]['conta']['esta_baixada'] is True
+    assert resultados[0]['conta']['valor_baixa'] == 1000
+    assert resultados[1]['erro'] == 'conta a pagar e receber not found'
+    assert client.get('/contas-a-pagar-e-receber', params={'esta_baixada': False}).json() == []
+
+
+def test_nao_deve_carregar_fornecedor_uma_vez_por_conta():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    for i in range(5):
+        client.post("/fornecedor-cliente", json={"nome": f"Fornecedor {i}"})
+    for i in range(20):
+        client.post("/contas-a-pagar-e-receber", json={'descricao': f'conta {i}', 'tipo': 'PAGAR', 'valor': 10, 'data_previsao': '2024-07-30', 'fornecedor_cliente_id': 1 + i % 5})
+
+    # versoes do ETag, contas e fornecedores: o numero nao cresce com a quantidade de contas
+    with assert_max_queries(engine, 3):
+        response = client.get('/contas-a-pagar-e-receber')
+    assert len(response.json()) == 20
+    assert response.json()[3]['fornecedor'] == {'id': 4, 'nome': 'Fornecedor 3'}
+
+    with assert_max_queries(engine, 2):
+        response = client.get('/fornecedor-cliente/2/contas-a-pagar-e-receber')
+    assert len(response.json()) == 4
+
+    with assert_max_queries(engine, 1):
+        response = client.get('/contas-a-pagar-e-receber/7')
+    assert response.json()['fornecedor'] == {'id': 2, 'nome': 'Fornecedor 1'}
+
+
+def test_deve_responder_304_quando_contas_nao_mudaram():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-30'})
+
+    response = client.get('/contas-a-pagar-e-receber')
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    with assert_max_queries(engine, 1):
+        response = client.get('/contas-a-pagar-e-receber', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert response.content == b''
+
+    assert client.get('/contas-a-pagar-e-receber', params={'limit': 1}).headers['ETag'] != etag
+
+    client.post("/fornecedor-cliente", json={"nome": "Casa de musica"})
+    response = client.get('/contas-a-pagar-e-receber', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    client.post("/contas-a-pagar-e-receber/1/baixar")
+    assert client.get('/contas-a-pagar-e-receber', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_deve_responder_304_na_previsao_de_gastos_quando_contas_nao_mudaram():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-30'})
+
+    etag = client.get('/contas-a-pagar-e-receber/previsao-gastos-do-mes', params={'ano': 2024}).headers['ETag']
+    assert client.get('/contas-a-pagar-e-receber/previsao-gastos-do-mes', params={'ano': 2024}, headers={'If-None-Match': etag}).status_code == 304
+
+    client.post("/fornecedor-cliente", json={"nome": "Casa de musica"})
+    assert client.get('/contas-a-pagar-e-receber/previsao-gastos-do-mes', params={'ano': 2024}, headers={'If-None-Match': etag}).status_code == 304
+
+    client.delete("/contas-a-pagar-e-receber/1")
+    assert client.get('/contas-a-pagar-e-receber/previsao-gastos-do-mes', params={'ano': 2024}, headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_resposta_rapida_deve_ter_o_mesmo_conteudo_da_resposta_padrao():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    client.post("/fornecedor-cliente", json={"nome": "Casa de musica"})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'guitarra', 'tipo': 'PAGAR', 'valor': 999, 'data_previsao': '2024-07-30', 'fornecedor_cliente_id': 1})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-30'})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'salario', 'tipo': 'RECEBER', 'valor': 5000, 'data_previsao': '2024-08-05'})
+    client.post("/contas-a-pagar-e-receber/2/baixar")
+
+    padrao = client.get('/contas-a-pagar-e-receber', params={'limit': 2})
+    rapida = client.get('/contas-a-pagar-e-receber', params={'limit': 2, 'rapido': True})
+
+    assert rapida.status_code == 200
+    assert rapida.headers['content-type'] == 'application/json'
+    assert rapida.json() == padrao.json()
+    assert rapida.headers['X-Next-Cursor'] == padrao.headers['X-Next-Cursor']
+    assert rapida.headers['ETag'] != padrao.headers['ETag']
+
+    padrao = client.get('/fornecedor-cliente/1/contas-a-pagar-e-receber')
+    rapida = client.get('/fornecedor-cliente/1/contas-a-pagar-e-receber', params={'rapido': True})
+    assert rapida.json() == padrao.json()
+
+    assert 'rapido' not in str(client.get('/openapi.json').json()['paths']['/contas-a-pagar-e-receber'])
+
+
+def test_resposta_rapida_deve_manter_headers_repetidos():
+    # o FastAPI injeta a Response sem content-length
+    response = Response()
+    del response.headers["content-length"]
+    response.headers["X-Next-Cursor"] = "2"
+    response.set_cookie("primeiro", "1")
+    response.set_cookie("segundo", "2")
+
+    rapida = resposta_rapida([], response)
+
+    cookies = [valor for nome, valor in rapida.raw_headers if nome == b"set-cookie"]
+    assert len(cookies) == 2
+    assert rapida.headers["X-Next-Cursor"] == "2"
+    assert rapida.body == b"[]"
+
+
+def test_deve_paginar_contas_de_um_fornecedor_cliente():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    client.post("/fornecedor-cliente", json={"nome": "Fornecedor 1"})
+    client.post("/fornecedor-cliente", json={"nome": "Fornecedor 2"})
+    for i in range(5):
+        client.post("/contas-a-pagar-e-receber", json={'descricao': f'conta {i}', 'tipo': 'PAGAR', 'valor': 10, 'data_previsao': '2024-07-30', 'fornecedor_cliente_id': 1 + i % 2})
+
+    primeira_pagina = client.get('/fornecedor-cliente/1/contas-a-pagar-e-receber', params={'limit': 2})
+    assert [conta['id'] for conta in primeira_pagina.json()] == [1, 3]
+    assert primeira_pagina.headers['X-Next-Cursor'] == '3'
+
+    segunda_pagina = client.get('/fornecedor-cliente/1/contas-a-pagar-e-receber', params={'limit': 2, 'after': 3})
+    assert [conta['id'] for conta in segunda_pagina.json()] == [5]
+    assert 'X-Next-Cursor' not in segunda_pagina.headers
+
+    response = client.get('/fornecedor-cliente/99/contas-a-pagar-e-receber')
+    assert response.status_code == 404
+    assert response.json() == {'message': 'OOPS! fornecedor cliente not found'}
+
+
+def test_deve_resumir_contas_por_fornecedor_cliente():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    client.post("/fornecedor-cliente", json={"nome": "Fornecedor 1"})
+    client.post("/fornecedor-cliente", json={"nome": "Fornecedor 2"})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-30', 'fornecedor_cliente_id': 1})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'luz', 'tipo': 'PAGAR', 'valor': 200, 'data_previsao': '2024-07-10', 'fornecedor_cliente_id': 1})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'venda', 'tipo': 'RECEBER', 'valor': 300, 'data_previsao': '2023-01-10', 'fornecedor_cliente_id': 1})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'agua', 'tipo': 'PAGAR', 'valor': 50, 'data_previsao': '2024-07-10', 'fornecedor_cliente_id': 2})
+    client.post("/contas-a-pagar-e-receber/2/baixar")
+    # pagamento parcial: 400 saem do aberto e entram no pago, a conta continua em aberto
+    client.post("/contas-a-pagar-e-receber/1/pagamentos", json={'valor': 400})
+
+    response = client.get('/fornecedor-cliente/1/contas-a-pagar-e-receber/resumo', params={'ano': 2024})
+    assert response.status_code == 200
+    assert response.json() == {
+        'fornecedor_cliente_id': 1,
+        'meses': [
+            {'ano': 2024, 'mes': 7, 'tipo': 'PAGAR', 'quantidade_em_aberto': 1, 'valor_em_aberto': 600,
+             'quantidade_baixada': 1, 'valor_baixado': 600},
+        ],
+    }
+    saldos = client.get("/contas-a-pagar-e-receber/saldos/por-fornecedor").json()
+    assert [saldo['saldo'] for saldo in saldos if saldo['fornecedor_cliente_id'] == 1] == [600]
+
+    with assert_max_queries(engine, 2):
+        response = client.get('/fornecedor-cliente/contas-a-pagar-e-receber/resumo', params={'ids': [2, 1, 99]})
+    assert response.status_code == 200
+    resumos = response.json()
+    assert [resumo['fornecedor_cliente_id'] for resumo in resumos] == [1, 2]
+    assert [(mes['ano'], mes['mes'], mes['tipo']) for mes in resumos[0]['meses']] == [(2023, 1, 'RECEBER'), (2024, 7, 'PAGAR')]
+    assert resumos[1]['meses'] == [{'ano': 2024, 'mes': 7, 'tipo': 'PAGAR', 'quantidade_em_aberto': 1, 'valor_em_aberto': 50,
+                                    'quantidade_baixada': 0, 'valor_baixado': 0}]
+
+    assert client.get('/fornecedor-cliente/99/contas-a-pagar-e-receber/resumo').status_code == 404
+
+
+def test_deve_calcular_aging_das_contas_em_aberto(monkeypatch):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(cota_mensal_service, 'LIMITE_CONTAS_POR_MES', 100)
+
+    client.post("/fornecedor-cliente", json={"nome": "Fornecedor 1"})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'hoje', 'tipo': 'PAGAR', 'valor': 100, 'data_previsao': '2024-07-31', 'fornecedor_cliente_id': 1})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': '30 dias', 'tipo': 'PAGAR', 'valor': 200, 'data_previsao': '2024-07-01'})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': '31 dias', 'tipo': 'RECEBER', 'valor': 300, 'data_previsao': '2024-06-30'})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': '90 dias', 'tipo': 'PAGAR', 'valor': 400, 'data_previsao': '2024-05-02', 'fornecedor_cliente_id': 1})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': '91 dias', 'tipo': 'PAGAR', 'valor': 500, 'data_previsao': '2024-05-01', 'fornecedor_cliente_id': 1})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'a vencer', 'tipo': 'PAGAR', 'valor': 600, 'data_previsao': '2024-08-01'})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'baixada', 'tipo': 'PAGAR', 'valor': 700, 'data_previsao': '2024-07-01'})
+    client.post("/contas-a-pagar-e-receber/7/baixar")
+    client.post("/contas-a-pagar-e-receber/5/pagamentos", json={'valor': 50})
+
+    response = client.get("/contas-a-pagar-e-receber/relatorios/aging", params={'data_base': '2024-07-31'})
+    assert response.status_code == 200
+    assert response.json() == [{
+        'fornecedor_cliente_id': None,
+        'tipo': None,
+        'faixas': [
+            {'faixa': '0-30', 'quantidade': 2, 'saldo': 300},
+            {'faixa': '31-60', 'quantidade': 1, 'saldo': 300},
+            {'faixa': '61-90', 'quantidade': 1, 'saldo': 400},
+            {'faixa': '90+', 'quantidade': 1, 'saldo': 450},
+        ],
+        'saldo_total': 1450,
+    }]
+
+    response = client.get("/contas-a-pagar-e-receber/relatorios/aging", params={'data_base': '2024-07-31', 'agrupar_por': ['fornecedor', 'tipo'], 'tipo': 'PAGAR'})
+    linhas = response.json()
+    assert [(linha['fornecedor_cliente_id'], linha['tipo'], linha['saldo_total']) for linha in linhas] == [(None, 'PAGAR', 200), (1, 'PAGAR', 950)]
+    assert [faixa['quantidade'] for faixa in linhas[1]['faixas']] == [1, 0, 1, 1]
+
+
+def test_deve_repetir_a_resposta_de_uma_criacao_com_a_mesma_idempotency_key(monkeypatch):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(cota_mensal_service, 'LIMITE_CONTAS_POR_MES', 2)
+    conta = {'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-30'}
+
+    primeira = client.post("/contas-a-pagar-e-receber", json=conta, headers={'Idempotency-Key': 'criar-aluguel'})
+    repetida = client.post("/contas-a-pagar-e-receber", json=conta, headers={'Idempotency-Key': 'criar-aluguel'})
+
+    assert primeira.status_code == repetida.status_code == 201
+    assert repetida.json() == primeira.json()
+    assert repetida.headers['Idempotent-Replayed'] == 'true'
+    assert repetida.headers['ETag'] == primeira.headers['ETag']
+    # a repeticao nao gasta outra vaga do mes
+    assert client.post("/contas-a-pagar-e-receber", json=conta).status_code == 201
+
+    response = client.post("/contas-a-pagar-e-receber", json={**conta, 'valor': 2000}, headers={'Idempotency-Key': 'criar-aluguel'})
+    assert response.status_code == 422
+    assert response.json()['detail'] == 'Essa Idempotency-Key ja foi usada em outra requisicao'
+
+    with TestingSessionLocal() as db:
+        assert db.query(ContaPagarReceber).count() == 2
+
+
+def test_deve_criar_uma_conta_so_com_retentativas_concorrentes():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    def cria_com_a_mesma_chave(_):
+        response = client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-30'},
+                               headers={'Idempotency-Key': 'mesma-chave'})
+        return response.status_code, response.json()['id']
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        respostas = list(executor.map(cria_com_a_mesma_chave, range(32)))
+
+    assert set(respostas) == {(201, 1)}
+    with TestingSessionLocal() as db:
+        assert db.query(ContaPagarReceber).count() == 1
+
+
+def test_deve_repetir_baixas_com_a_mesma_idempotency_key():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-30'})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'luz', 'tipo': 'PAGAR', 'valor': 200, 'data_previsao': '2024-07-30'})
+
+    primeira = client.post("/contas-a-pagar-e-receber/1/baixar", headers={'Idempotency-Key': 'baixar-1'})
+    repetida = client.post("/contas-a-pagar-e-receber/1/baixar", headers={'Idempotency-Key': 'baixar-1'})
+    assert repetida.json() == primeira.json()
+    assert repetida.headers['ETag'] == primeira.headers['ETag']
+    # a mesma chave em outra conta e outra requisicao
+    assert client.post("/contas-a-pagar-e-receber/2/baixar", headers={'Idempotency-Key': 'baixar-1'}).status_code == 422
+
+    primeiro_lote = client.post("/contas-a-pagar-e-receber/baixar/bulk", json=[2, 3], headers={'Idempotency-Key': 'lote'})
+    repetido = client.post("/contas-a-pagar-e-receber/baixar/bulk", json=[2, 3], headers={'Idempotency-Key': 'lote'})
+    assert repetido.json() == primeiro_lote.json()
+    assert repetido.headers['Idempotent-Replayed'] == 'true'
+    assert [pagamento['valor'] for pagamento in client.get("/contas-a-pagar-e-receber/2/pagamentos").json()] == [200]
+
+
+def test_deve_recusar_escritas_com_if_match_desatualizado():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-30'})
+    etag = client.get("/contas-a-pagar-e-receber/1").headers['ETag']
+    assert etag == '"1"'
+
+    response = client.put("/contas-a-pagar-e-receber/1", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1200, 'data_previsao': '2024-07-30'},
+                          headers={'If-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"2"'
+
+    response = client.put("/contas-a-pagar-e-receber/1", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 900, 'data_previsao': '2024-07-30'},
+                          headers={'If-Match': etag})
+    assert response.status_code == 409
+    assert response.json() == {'message': 'OOPS! conta a pagar e receber was modified by another request'}
+
+    assert client.post("/contas-a-pagar-e-receber/1/baixar", headers={'If-Match': etag}).status_code == 409
+    response = client.post("/contas-a-pagar-e-receber/1/baixar", headers={'If-Match': '"2"'})
+    assert response.status_code == 200
+    assert response.json()['valor_baixa'] == 1200
+    assert response.headers['ETag'] == '"3"'
+
+
+def test_escritas_concorrentes_na_mesma_conta_nao_devem_se_sobrescrever():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-30'})
+
+    def atualiza(valor):
+        return client.put("/contas-a-pagar-e-receber/1", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': valor, 'data_previsao': '2024-07-30'},
+                          headers={'If-Match': '"1"'}).status_code
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        status = list(executor.map(atualiza, range(2000, 2064)))
+
+    # todas partiram da versao 1: so uma pode gravar
+    assert status.count(200) == 1
+    assert status.count(409) == 63
+
+    def paga(_):
+        return client.post("/contas-a-pagar-e-receber/1/pagamentos", json={'valor': 100}).status_code
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        status = list(executor.map(paga, range(64)))
+
+    assert set(status) <= {201, 409, 422}
+    pagamentos = client.get("/contas-a-pagar-e-receber/1/pagamentos").json()
+    conta = client.get("/contas-a-pagar-e-receber/1").json()
+    assert len(pagamentos) == status.count(201)
+    assert conta['valor_baixa'] == sum(pagamento['valor'] for pagamento in pagamentos) <= conta['valor']
+    with TestingSessionLocal() as db:
+        assert verifica_divergencias(db) == []
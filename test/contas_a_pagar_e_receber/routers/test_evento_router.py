@@ -0,0 +1,182 @@
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from anyio import to_thread
+from fastapi.testclient import TestClient
+from main import app
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+from contas_a_pagar_e_receber.models.versao_tabela_model import VersaoTabela
+from contas_a_pagar_e_receber.routers import evento_router
+from contas_a_pagar_e_receber.services import evento_service, versao_tabela_service
+from shared.database import Base
+from shared.dependencies import get_db, get_db_primario
+
+client = TestClient(app)
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+
+TestingSessionLocal = sessionmaker(autoflush=False, bind=engine, autocommit=False)
+
+def override_get_db():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def test_deve_registrar_um_evento_por_escrita_na_ordem_de_commit():
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_db_primario] = override_get_db
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    client.post("/fornecedor-cliente", json={"nome": "Imobiliaria"})
+    conta = client.post("/contas-a-pagar-e-receber", json={'descricao': 'Aluguel', 'tipo': 'PAGAR', 'valor': 10, 'data_previsao': '2024-07-30', 'fornecedor_cliente_id': 1}).json()
+    client.put(f"/contas-a-pagar-e-receber/{conta['id']}", json={'descricao': 'Aluguel', 'tipo': 'PAGAR', 'valor': 12, 'data_previsao': '2024-07-30'})
+    client.post(f"/contas-a-pagar-e-receber/{conta['id']}/baixar")
+    client.delete(f"/contas-a-pagar-e-receber/{conta['id']}")
+    # escritas recusadas nao geram evento
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'Aluguel', 'tipo': 'PAGAR', 'valor': 10, 'data_previsao': '2024-07-30', 'fornecedor_cliente_id': 99})
+    client.put("/fornecedor-cliente/1", json={"nome": "Imobiliaria Centro"})
+
+    response = client.get("/eventos")
+    eventos = response.json()
+    assert [(evento['entidade'], evento['operacao']) for evento in eventos] == [
+        ('fornecedor_cliente', 'criacao'),
+        ('conta_a_pagar_e_receber', 'criacao'),
+        ('conta_a_pagar_e_receber', 'atualizacao'),
+        ('conta_a_pagar_e_receber', 'baixa'),
+        ('conta_a_pagar_e_receber', 'exclusao'),
+        ('fornecedor_cliente', 'atualizacao'),
+    ]
+    assert eventos[2]['dados']['valor'] == 12
+    assert eventos[2]['dados']['fornecedor_cliente_id'] is None
+    assert eventos[3]['dados']['esta_baixada'] is True
+    assert eventos[5]['dados'] == {'id': 1, 'nome': 'Imobiliaria Centro', 'versao': 2}
+    assert response.headers['X-Next-Cursor'] == str(eventos[-1]['id'])
+
+    response = client.get("/eventos", params={'after': eventos[1]['id'], 'limit': 2, 'entidade': 'conta_a_pagar_e_receber'})
+    assert [evento['id'] for evento in response.json()] == [eventos[2]['id'], eventos[3]['id']]
+
+    response = client.get("/eventos", params={'after': eventos[-1]['id']})
+    assert response.json() == []
+    assert response.headers['X-Next-Cursor'] == str(eventos[-1]['id'])
+
+
+def test_deve_responder_o_long_poll_assim_que_uma_escrita_e_confirmada():
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_db_primario] = override_get_db
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    def cria_fornecedor():
+        time.sleep(0.3)
+        client.post("/fornecedor-cliente", json={"nome": "Padaria"})
+
+    escrita = threading.Thread(target=cria_fornecedor)
+    inicio = time.monotonic()
+    escrita.start()
+    response = client.get("/eventos", params={'espera': 10})
+    escrita.join()
+
+    assert time.monotonic() - inicio < 5
+    assert [evento['dados']['nome'] for evento in response.json()] == ['Padaria']
+
+    inicio = time.monotonic()
+    response = client.get("/eventos", params={'after': response.headers['X-Next-Cursor'], 'espera': 0.2})
+    assert response.json() == []
+    assert time.monotonic() - inicio >= 0.2
+
+
+def test_deve_entregar_evento_de_transacao_que_registrou_antes_e_confirmou_depois():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    with TestingSessionLocal() as lenta, TestingSessionLocal() as rapida, TestingSessionLocal() as consumidor:
+        evento_service.registra_evento(lenta, evento_service.FORNECEDOR, evento_service.CRIACAO, 1)
+        evento_service.registra_evento(rapida, evento_service.FORNECEDOR, evento_service.CRIACAO, 2)
+        rapida.commit()
+
+        eventos = evento_service.busca_eventos(consumidor, None, 100)
+        assert [evento.entidade_id for evento in eventos] == [2]
+        cursor = eventos[-1].id
+        consumidor.rollback()
+
+        lenta.commit()
+        # o id vem no commit, entao o evento confirmado depois fica depois do cursor
+        assert [evento.entidade_id for evento in evento_service.busca_eventos(consumidor, cursor, 100)] == [1]
+        assert consumidor.get(VersaoTabela, versao_tabela_service.EVENTOS).versao == 2
+
+
+def test_long_poll_nao_deve_segurar_worker_do_threadpool_enquanto_espera():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    async def cenario():
+        to_thread.current_default_thread_limiter().total_tokens = 2
+        sessoes = [TestingSessionLocal() for _ in range(10)]
+        esperas = [asyncio.create_task(evento_service.aguarda_eventos(db, None, 10, 1)) for db in sessoes]
+        await asyncio.sleep(0.1)
+        # com 10 consumidores parados e 2 workers, uma rota sincrona ainda e atendida na hora
+        inicio = time.monotonic()
+        assert await run_in_threadpool(lambda: "livre") == "livre"
+        decorrido = time.monotonic() - inicio
+        assert await asyncio.gather(*esperas) == [[]] * 10
+        for db in sessoes:
+            db.close()
+        return decorrido
+
+    assert asyncio.run(cenario()) < 0.5
+
+
+def test_deve_enviar_eventos_por_sse_a_partir_do_cursor():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_db_primario] = override_get_db
+
+    for nome in ("Padaria", "Mercado", "Farmacia"):
+        client.post("/fornecedor-cliente", json={"nome": nome})
+
+    async def primeira_mensagem():
+        stream = evento_router._gera_stream(TestingSessionLocal(), 1, None)
+        try:
+            return await anext(stream)
+        finally:
+            await stream.aclose()
+
+    mensagens = asyncio.run(primeira_mensagem()).strip().split("\n\n")
+
+    assert [mensagem.split("\n")[:2] for mensagem in mensagens] == [
+        ['id: 2', 'event: fornecedor_cliente.criacao'],
+        ['id: 3', 'event: fornecedor_cliente.criacao'],
+    ]
+    assert json.loads(mensagens[0].split("\n")[2].removeprefix("data: "))['dados']['nome'] == 'Mercado'
+
+
+def test_commit_em_outra_thread_deve_acordar_quem_espera_sem_consultar_de_novo():
+    async def cenario():
+        geracao = evento_service._geracao
+        espera = asyncio.create_task(evento_service._espera_nova_geracao(geracao, 10))
+        await asyncio.sleep(0.05)
+        assert len(evento_service._aguardando) == 1
+
+        inicio = time.monotonic()
+        sessao = SimpleNamespace(info={"eventos_pendentes": True})
+        await asyncio.to_thread(evento_service._acorda_consumidores, sessao)
+        await espera
+        return time.monotonic() - inicio
+
+    assert asyncio.run(cenario()) < 1
+    assert evento_service._aguardando == set()
@@ -0,0 +1,147 @@
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from contas_a_pagar_e_receber.models.fornecedor_cliente_model import FornecedorCliente
+from contas_a_pagar_e_receber.models.versao_tabela_model import VersaoTabela
+from contas_a_pagar_e_receber.routers.fornecedor_cliente_router import cache_fornecedores
+from contas_a_pagar_e_receber.services import versao_tabela_service
+from shared.database import Base
+from shared.dependencies import get_db
+from test.utils import assert_max_queries
+
+client = TestClient(app)
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+
+TestingSessionLocal = sessionmaker(autoflush=False, bind=engine, autocommit=False)
+
+def override_get_db():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def usa_banco_de_teste(monkeypatch):
+    # o override e global do app: aplicado por teste, senao vale o do ultimo modulo importado
+    # e o assert_max_queries escuta um engine que as requisicoes nao usam
+    monkeypatch.setitem(app.dependency_overrides, get_db, override_get_db)
+
+
+def test_deve_servir_fornecedor_cliente_do_cache():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    client.post("/fornecedor-cliente", json={"nome": "Casa de musica"})
+
+    assert client.get("/fornecedor-cliente/1").json() == {"id": 1, "nome": "Casa de musica"}
+
+    with assert_max_queries(engine, 0):
+        assert client.get("/fornecedor-cliente/1").json() == {"id": 1, "nome": "Casa de musica"}
+
+    acertos = cache_fornecedores.acertos
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'guitarra', 'tipo': 'PAGAR', 'valor': 999, 'data_previsao': '2024-07-30', 'fornecedor_cliente_id': 1})
+    assert cache_fornecedores.acertos == acertos + 1
+    assert 'cache_hits_total{cache="fornecedor_cliente"}' in client.get("/metrics").text
+
+
+def test_deve_responder_422_quando_o_cache_tem_fornecedor_cliente_ja_excluido(monkeypatch):
+    # o SQLite so confere chaves estrangeiras com o PRAGMA, ligado em cada conexao
+    engine_com_fk = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+    event.listen(engine_com_fk, "connect", lambda conexao, _: conexao.execute("PRAGMA foreign_keys = ON"))
+    SessionComFk = sessionmaker(autoflush=False, bind=engine_com_fk, autocommit=False)
+
+    def override_get_db_com_fk():
+        db = SessionComFk()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    monkeypatch.setitem(app.dependency_overrides, get_db, override_get_db_com_fk)
+    Base.metadata.drop_all(bind=engine_com_fk)
+    Base.metadata.create_all(bind=engine_com_fk)
+    client.post("/fornecedor-cliente", json={"nome": "Casa de musica"})
+    client.get("/fornecedor-cliente/1")
+
+    # exclusao feita por outro worker: o cache deste processo nao fica sabendo
+    with SessionComFk() as db:
+        db.query(FornecedorCliente).filter(FornecedorCliente.id == 1).delete()
+        db.commit()
+
+    response = client.post("/contas-a-pagar-e-receber", json={'descricao': 'guitarra', 'tipo': 'PAGAR', 'valor': 999, 'data_previsao': '2024-07-30', 'fornecedor_cliente_id': 1})
+    assert response.status_code == 422
+    assert response.json() == {"detail": "Esse fornecedor não existe"}
+    assert client.get("/contas-a-pagar-e-receber").json() == []
+    engine_com_fk.dispose()
+
+
+def test_deve_invalidar_cache_ao_atualizar_e_remover_fornecedor_cliente():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    client.post("/fornecedor-cliente", json={"nome": "Casa de musica"})
+    client.get("/fornecedor-cliente/1")
+
+    client.put("/fornecedor-cliente/1", json={"nome": "Loja de musica"})
+    assert client.get("/fornecedor-cliente/1").json() == {"id": 1, "nome": "Loja de musica"}
+
+    client.delete("/fornecedor-cliente/1")
+    assert client.get("/fornecedor-cliente/1").status_code == 404
+
+    response = client.post("/contas-a-pagar-e-receber", json={'descricao': 'guitarra', 'tipo': 'PAGAR', 'valor': 999, 'data_previsao': '2024-07-30', 'fornecedor_cliente_id': 1})
+    assert response.status_code == 422
+
+
+def test_deve_responder_304_quando_fornecedores_nao_mudaram():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    client.post("/fornecedor-cliente", json={"nome": "Casa de musica"})
+
+    etag = client.get("/fornecedor-cliente").headers["ETag"]
+    assert client.get("/fornecedor-cliente", headers={"If-None-Match": etag}).status_code == 304
+
+    client.put("/fornecedor-cliente/1", json={"nome": "Loja de musica"})
+    response = client.get("/fornecedor-cliente", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json() == [{"id": 1, "nome": "Loja de musica"}]
+
+
+def test_deve_incrementar_a_versao_da_tabela_no_commit():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    with TestingSessionLocal() as db, TestingSessionLocal() as leitura:
+        versao_tabela_service.incrementa_versao(db, versao_tabela_service.FORNECEDORES)
+        db.rollback()
+        assert versao_tabela_service.obtem_versoes(leitura, [versao_tabela_service.FORNECEDORES]) == {"fornecedor_cliente": 0}
+
+        db.add(FornecedorCliente(nome="Casa de musica"))
+        versao_tabela_service.incrementa_versao(db, versao_tabela_service.FORNECEDORES)
+        db.flush()
+        # a linha de versao so e tocada no commit, entao fica travada so durante a confirmacao
+        assert db.query(VersaoTabela).count() == 0
+        db.commit()
+        assert versao_tabela_service.obtem_versoes(leitura, [versao_tabela_service.FORNECEDORES]) == {"fornecedor_cliente": 1}
+
+
+def test_deve_recusar_atualizacao_de_fornecedor_cliente_com_versao_antiga():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    client.post("/fornecedor-cliente", json={"nome": "Casa de musica"})
+    etag = client.get("/fornecedor-cliente/1").headers['ETag']
+
+    response = client.put("/fornecedor-cliente/1", json={"nome": "Casa de som"}, headers={'If-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"2"'
+
+    response = client.put("/fornecedor-cliente/1", json={"nome": "Casa de discos"}, headers={'If-Match': etag})
+    assert response.status_code == 409
+    assert response.json() == {'message': 'OOPS! fornecedor cliente was modified by another request'}
+    assert client.get("/fornecedor-cliente/1").json()['nome'] == 'Casa de som'
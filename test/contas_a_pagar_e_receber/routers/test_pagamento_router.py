@@ -0,0 +1,119 @@
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from contas_a_pagar_e_receber.models.pagamento_model import Pagamento
+from contas_a_pagar_e_receber.services.resumo_mensal_service import verifica_divergencias
+from shared.database import Base
+from shared.dependencies import get_db
+
+client = TestClient(app)
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+
+TestingSessionLocal = sessionmaker(autoflush=False, bind=engine, autocommit=False)
+
+def override_get_db():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def usa_banco_de_teste(monkeypatch):
+    # o override e global do app: aplicado por teste, senao vale o do ultimo modulo importado
+    # e o assert_max_queries escuta um engine que as requisicoes nao usam
+    monkeypatch.setitem(app.dependency_overrides, get_db, override_get_db)
+
+
+def test_deve_registrar_pagamentos_parciais_ate_baixar_a_conta():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-30'})
+
+    response = client.post("/contas-a-pagar-e-receber/1/pagamentos", json={'valor': 400, 'data_pagamento': '2024-07-01'})
+    assert response.status_code == 201
+    assert response.json() == {'id': 1, 'conta_a_pagar_e_receber_id': 1, 'valor': 400, 'data_pagamento': '2024-07-01'}
+
+    conta = client.get("/contas-a-pagar-e-receber/1").json()
+    assert conta['valor_baixa'] == 400
+    assert conta['esta_baixada'] is False
+    assert conta['data_baixa'] == '2024-07-01'
+
+    response = client.post("/contas-a-pagar-e-receber/1/pagamentos", json={'valor': 601})
+    assert response.status_code == 422
+    assert response.json()['detail'] == "Esse pagamento ultrapassa o saldo da conta"
+
+    client.post("/contas-a-pagar-e-receber/1/pagamentos", json={'valor': 600, 'data_pagamento': '2024-07-30'})
+
+    conta = client.get("/contas-a-pagar-e-receber/1").json()
+    assert conta['valor_baixa'] == 1000
+    assert conta['esta_baixada'] is True
+    assert [pagamento['valor'] for pagamento in client.get("/contas-a-pagar-e-receber/1/pagamentos").json()] == [400, 600]
+
+    with TestingSessionLocal() as db:
+        assert verifica_divergencias(db) == []
+
+
+def test_baixar_deve_lancar_o_saldo_restante_como_pagamento():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-30'})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'luz', 'tipo': 'PAGAR', 'valor': 200, 'data_previsao': '2024-07-30'})
+    client.post("/contas-a-pagar-e-receber/1/pagamentos", json={'valor': 250})
+
+    assert client.post("/contas-a-pagar-e-receber/1/baixar").json()['valor_baixa'] == 1000
+    assert client.post("/contas-a-pagar-e-receber/1/baixar").json()['valor_baixa'] == 1000
+    client.post("/contas-a-pagar-e-receber/baixar/bulk", json=[1, 2])
+
+    assert [pagamento['valor'] for pagamento in client.get("/contas-a-pagar-e-receber/1/pagamentos").json()] == [250, 750]
+    assert [pagamento['valor'] for pagamento in client.get("/contas-a-pagar-e-receber/2/pagamentos").json()] == [200]
+
+    client.delete("/contas-a-pagar-e-receber/1")
+    with TestingSessionLocal() as db:
+        assert db.query(Pagamento).filter(Pagamento.conta_a_pagar_e_receber_id == 1).count() == 0
+    assert client.get("/contas-a-pagar-e-receber/1/pagamentos").status_code == 404
+
+
+def test_deve_reabrir_conta_quando_o_valor_aumenta_depois_da_baixa():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-30'})
+    client.post("/contas-a-pagar-e-receber/1/baixar")
+
+    response = client.put("/contas-a-pagar-e-receber/1", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1500, 'data_previsao': '2024-07-30'})
+
+    assert response.json()['esta_baixada'] is False
+    assert client.post("/contas-a-pagar-e-receber/1/pagamentos", json={'valor': 500}).status_code == 201
+    assert client.get("/contas-a-pagar-e-receber/1").json()['esta_baixada'] is True
+
+
+def test_deve_calcular_saldos_em_aberto_por_fornecedor_e_por_mes():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    client.post("/fornecedor-cliente", json={"nome": "Fornecedor 1"})
+    client.post("/fornecedor-cliente", json={"nome": "Fornecedor 2"})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-30', 'fornecedor_cliente_id': 1})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'luz', 'tipo': 'PAGAR', 'valor': 200, 'data_previsao': '2024-08-10', 'fornecedor_cliente_id': 1})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'agua', 'tipo': 'PAGAR', 'valor': 50, 'data_previsao': '2024-08-10', 'fornecedor_cliente_id': 2})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'venda', 'tipo': 'RECEBER', 'valor': 300, 'data_previsao': '2024-08-10'})
+    client.post("/contas-a-pagar-e-receber/1/pagamentos", json={'valor': 100})
+    client.post("/contas-a-pagar-e-receber/3/baixar")
+
+    assert client.get("/contas-a-pagar-e-receber/saldos/por-fornecedor").json() == [
+        {'fornecedor_cliente_id': 1, 'quantidade': 2, 'saldo': 1100},
+    ]
+    assert client.get("/contas-a-pagar-e-receber/saldos/por-mes", params={'ano': 2024}).json() == [
+        {'ano': 2024, 'mes': 7, 'tipo': 'PAGAR', 'quantidade': 1, 'saldo': 900},
+        {'ano': 2024, 'mes': 8, 'tipo': 'PAGAR', 'quantidade': 1, 'saldo': 200},
+    ]
+    assert client.get("/contas-a-pagar-e-receber/saldos/por-mes", params={'tipo': 'RECEBER'}).json() == [
+        {'ano': 2024, 'mes': 8, 'tipo': 'RECEBER', 'quantidade': 1, 'saldo': 300},
+    ]
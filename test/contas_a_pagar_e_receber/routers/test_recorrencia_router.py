@@ -0,0 +1,88 @@
+from fastapi.testclient import TestClient
+from main import app
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from contas_a_pagar_e_receber.services import cota_mensal_service
+from shared.database import Base
+from shared.dependencies import get_db, get_db_primario
+
+client = TestClient(app)
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+
+TestingSessionLocal = sessionmaker(autoflush=False, bind=engine, autocommit=False)
+
+def override_get_db():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def test_deve_criar_atualizar_e_remover_regra_de_recorrencia():
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_db_primario] = override_get_db
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    client.post("/fornecedor-cliente", json={"nome": "Imobiliaria"})
+
+    response = client.post("/recorrencias", json={'descricao': 'Aluguel', 'valor': 1500, 'tipo': 'PAGAR', 'fornecedor_cliente_id': 1,
+                                                  'frequencia': 'MENSAL', 'data_inicio': '2024-01-05'})
+    assert response.status_code == 201
+    assert response.json() == {'id': 1, 'descricao': 'Aluguel', 'valor': 1500, 'tipo': 'PAGAR', 'fornecedor': {'id': 1, 'nome': 'Imobiliaria'},
+                               'frequencia': 'MENSAL', 'intervalo': 1, 'data_inicio': '2024-01-05', 'data_fim': None}
+
+    response = client.put("/recorrencias/1", json={'descricao': 'Aluguel', 'valor': 1600, 'tipo': 'PAGAR', 'frequencia': 'MENSAL',
+                                                   'data_inicio': '2024-01-05', 'data_fim': '2024-12-31'})
+    assert response.json()['valor'] == 1600
+    assert response.json()['fornecedor'] is None
+    assert [regra['data_fim'] for regra in client.get("/recorrencias").json()] == ['2024-12-31']
+
+    response = client.post("/recorrencias", json={'descricao': 'Aluguel', 'valor': 1500, 'tipo': 'PAGAR', 'frequencia': 'MENSAL',
+                                                  'data_inicio': '2024-01-05', 'data_fim': '2023-01-05'})
+    assert response.status_code == 422
+    response = client.post("/recorrencias", json={'descricao': 'Aluguel', 'valor': 1500, 'tipo': 'PAGAR', 'frequencia': 'MENSAL',
+                                                  'data_inicio': '2024-01-05', 'fornecedor_cliente_id': 99})
+    assert response.json()['detail'] == 'Esse fornecedor não existe'
+
+    assert client.delete("/recorrencias/1").status_code == 204
+    assert client.get("/recorrencias/1").status_code == 404
+    assert [evento['operacao'] for evento in client.get("/eventos", params={'entidade': 'regra_recorrencia'}).json()] == ['criacao', 'atualizacao', 'exclusao']
+
+
+def test_deve_projetar_fluxo_de_caixa_com_regras_e_contas_sem_usar_a_cota(monkeypatch):
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_db_primario] = override_get_db
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(cota_mensal_service, 'LIMITE_CONTAS_POR_MES', 1)
+
+    client.post("/recorrencias", json={'descricao': 'Aluguel', 'valor': 1500, 'tipo': 'PAGAR', 'frequencia': 'MENSAL', 'data_inicio': '2024-01-31'})
+    client.post("/recorrencias", json={'descricao': 'Salario', 'valor': 3000, 'tipo': 'RECEBER', 'frequencia': 'SEMANAL', 'intervalo': 2, 'data_inicio': '2024-02-02'})
+    assert client.post("/contas-a-pagar-e-receber", json={'descricao': 'Luz', 'tipo': 'PAGAR', 'valor': 200, 'data_previsao': '2024-02-29'}).status_code == 201
+
+    response = client.get("/contas-a-pagar-e-receber/projecao-fluxo-de-caixa",
+                          params={'data_inicio': '2024-02-01', 'data_fim': '2024-03-31', 'saldo_inicial': 100})
+    assert response.status_code == 200
+    dias = response.json()
+    assert len(dias) == 60
+    movimentos = {dia['data']: (dia['entradas'], dia['saidas']) for dia in dias if dia['entradas'] or dia['saidas']}
+    assert movimentos == {
+        '2024-02-02': (3000, 0),
+        '2024-02-16': (3000, 0),
+        '2024-02-29': (0, 1700),
+        '2024-03-01': (3000, 0),
+        '2024-03-15': (3000, 0),
+        '2024-03-29': (3000, 0),
+        '2024-03-31': (0, 1500),
+    }
+    assert dias[-1]['saldo'] == 100 + 15000 - 3200
+
+    response = client.get("/contas-a-pagar-e-receber/projecao-fluxo-de-caixa", params={'data_inicio': '2024-02-01', 'data_fim': '2034-03-31'})
+    assert response.status_code == 422
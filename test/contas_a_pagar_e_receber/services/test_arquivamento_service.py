@@ -0,0 +1,100 @@
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from main import app
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from contas_a_pagar_e_receber.models.conta_a_pagar_receber_model import ContaPagarReceber
+from contas_a_pagar_e_receber.models.pagamento_arquivado_model import PagamentoArquivado
+from contas_a_pagar_e_receber.services import arquivamento_service
+from contas_a_pagar_e_receber.services.cota_mensal_service import reconstroi_cota_mensal
+from contas_a_pagar_e_receber.services.resumo_mensal_service import verifica_divergencias
+from contas_a_pagar_e_receber.models.cota_mensal_model import CotaMensal
+from shared.database import Base
+from shared.dependencies import get_db
+
+client = TestClient(app)
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+
+TestingSessionLocal = sessionmaker(autoflush=False, bind=engine, autocommit=False)
+
+def override_get_db():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def test_deve_arquivar_contas_baixadas_antigas(monkeypatch):
+    app.dependency_overrides[get_db] = override_get_db
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(arquivamento_service, "TAMANHO_DO_LOTE", 2)
+
+    def cria_conta(data_previsao, baixar):
+        conta = client.post("/contas-a-pagar-e-receber", json={'descricao': 'Aluguel', 'tipo': 'PAGAR', 'valor': 10, 'data_previsao': data_previsao}).json()
+        if baixar:
+            client.post(f"/contas-a-pagar-e-receber/{conta['id']}/baixar")
+        return conta['id']
+
+    antigas = [cria_conta('2023-01-10', True) for _ in range(3)]
+    em_aberto = cria_conta('2023-01-10', False)
+    recente = cria_conta('2024-06-10', True)
+
+    with TestingSessionLocal() as db:
+        assert arquivamento_service.arquiva_contas_baixadas(db, timedelta(days=365), hoje=date(2024, 7, 1)) == 3
+        assert db.query(ContaPagarReceber.id).order_by(ContaPagarReceber.id).all() == [(em_aberto,), (recente,)]
+        assert db.query(PagamentoArquivado).count() == 3
+        # arquivar nao muda o resumo nem a cota do mes
+        assert verifica_divergencias(db) == []
+        reconstroi_cota_mensal(db)
+        assert db.get(CotaMensal, (2023, 1)).quantidade == 4
+
+    assert [conta['id'] for conta in client.get("/contas-a-pagar-e-receber").json()] == [em_aberto, recente]
+    assert [conta['id'] for conta in client.get("/contas-a-pagar-e-receber", params={'incluir_arquivadas': True, 'limit': 2}).json()] == antigas[:2]
+    assert [conta['id'] for conta in client.get("/contas-a-pagar-e-receber", params={'incluir_arquivadas': True, 'after': antigas[1]}).json()] == [antigas[2], em_aberto, recente]
+
+    assert client.get(f"/contas-a-pagar-e-receber/{antigas[0]}").status_code == 404
+    arquivada = client.get(f"/contas-a-pagar-e-receber/{antigas[0]}", params={'incluir_arquivadas': True})
+    assert arquivada.status_code == 200
+    assert arquivada.json()['esta_baixada'] is True
+    pagamentos = client.get(f"/contas-a-pagar-e-receber/{antigas[0]}/pagamentos", params={'incluir_arquivadas': True}).json()
+    assert [pagamento['valor'] for pagamento in pagamentos] == [10]
+
+    exportadas = client.get("/contas-a-pagar-e-receber/export", params={'incluir_arquivadas': True}).text.splitlines()
+    assert len(exportadas) == 5
+
+
+def test_arquivar_nao_deve_mudar_os_totais_por_fornecedor():
+    app.dependency_overrides[get_db] = override_get_db
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    client.post("/fornecedor-cliente", json={'nome': 'Imobiliaria'})
+    for valor in (100, 200):
+        client.post("/contas-a-pagar-e-receber", json={'descricao': 'Aluguel', 'tipo': 'PAGAR', 'valor': valor,
+                                                       'data_previsao': '2023-01-10', 'fornecedor_cliente_id': 1})
+    client.post("/contas-a-pagar-e-receber/1/baixar")
+    client.post("/contas-a-pagar-e-receber/2/pagamentos", json={'valor': 50})
+
+    def totais():
+        return (client.get("/fornecedor-cliente/1/contas-a-pagar-e-receber/resumo").json(),
+                client.get("/fornecedor-cliente/contas-a-pagar-e-receber/resumo", params={'ids': [1], 'ano': 2023}).json(),
+                client.get("/contas-a-pagar-e-receber/saldos/por-fornecedor").json(),
+                client.get("/contas-a-pagar-e-receber/saldos/por-mes", params={'fornecedor_cliente_id': 1}).json())
+
+    antes = totais()
+    assert antes[0]['meses'] == [{'ano': 2023, 'mes': 1, 'tipo': 'PAGAR', 'quantidade_em_aberto': 1, 'valor_em_aberto': 150,
+                                  'quantidade_baixada': 1, 'valor_baixado': 150}]
+
+    with TestingSessionLocal() as db:
+        assert arquivamento_service.arquiva_contas_baixadas(db, timedelta(days=365), hoje=date(2024, 7, 1)) == 1
+
+    assert totais() == antes
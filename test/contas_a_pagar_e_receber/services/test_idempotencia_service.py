@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from contas_a_pagar_e_receber.models.resposta_idempotente_model import RespostaIdempotente
+from contas_a_pagar_e_receber.services import idempotencia_service
+from shared.database import Base
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+
+TestingSessionLocal = sessionmaker(autoflush=False, bind=engine, autocommit=False)
+
+
+def test_deve_ignorar_e_remover_respostas_expiradas(monkeypatch):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    requisicao = idempotencia_service.requisicao_idempotente("chave", "criar_conta", {"valor": 10})
+
+    with TestingSessionLocal() as db:
+        idempotencia_service.guarda_resposta(db, requisicao, 201, {"id": 1})
+        idempotencia_service.guarda_resposta(db, idempotencia_service.requisicao_idempotente("outra", "criar_conta", {}), 201, {"id": 2})
+        db.commit()
+        assert idempotencia_service.resposta_guardada(db, requisicao).body == b'{"id": 1}'
+
+    depois_do_ttl = idempotencia_service._agora() + idempotencia_service.TTL_RESPOSTAS + timedelta(seconds=1)
+    monkeypatch.setattr(idempotencia_service, "_agora", lambda: depois_do_ttl)
+    with TestingSessionLocal() as db:
+        assert idempotencia_service.resposta_guardada(db, requisicao) is None
+        idempotencia_service.guarda_resposta(db, requisicao, 201, {"id": 3})
+        db.commit()
+
+        assert idempotencia_service.remove_expiradas(db) == 1
+        assert db.query(RespostaIdempotente.chave).all() == [("chave",)]
@@ -0,0 +1,78 @@
+import calendar
+import random
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from contas_a_pagar_e_receber.models.conta_a_pagar_receber_model import ContaPagarReceber
+from contas_a_pagar_e_receber.models.regra_recorrencia_model import RegraRecorrencia
+from contas_a_pagar_e_receber.services import projecao_service
+from shared.database import Base
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+
+TestingSessionLocal = sessionmaker(autoflush=False, bind=engine, autocommit=False)
+
+
+def _ocorrencias(regra: RegraRecorrencia, fim: date):
+    # expansao ingenua, uma data por vez, para conferir a projecao
+    ocorrencia, vez = regra.data_inicio, 0
+    while ocorrencia <= fim and (regra.data_fim is None or ocorrencia <= regra.data_fim):
+        yield ocorrencia
+        vez += 1
+        if regra.frequencia in projecao_service.PASSO_EM_DIAS:
+            ocorrencia = regra.data_inicio + timedelta(days=vez * regra.intervalo * projecao_service.PASSO_EM_DIAS[regra.frequencia])
+        else:
+            ano, mes = divmod(regra.data_inicio.month - 1 + vez * regra.intervalo * projecao_service.PASSO_EM_MESES[regra.frequencia], 12)
+            ano += regra.data_inicio.year
+            ocorrencia = date(ano, mes + 1, min(regra.data_inicio.day, calendar.monthrange(ano, mes + 1)[1]))
+
+
+def test_deve_projetar_o_mesmo_que_expandir_cada_ocorrencia():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    aleatorio = random.Random(42)
+    inicio, fim = date(2024, 1, 15), date(2026, 3, 10)
+
+    regras = []
+    for _ in range(300):
+        data_inicio = date(2023, 1, 1) + timedelta(days=aleatorio.randrange(1300))
+        regras.append(RegraRecorrencia(
+            descricao="regra",
+            valor=aleatorio.randrange(1, 1000),
+            tipo=aleatorio.choice(["PAGAR", "RECEBER"]),
+            frequencia=aleatorio.choice(["DIARIA", "SEMANAL", "MENSAL", "ANUAL"]),
+            intervalo=aleatorio.choice([1, 1, 2, 3]),
+            data_inicio=data_inicio,
+            data_fim=aleatorio.choice([None, data_inicio + timedelta(days=aleatorio.randrange(900))]),
+        ))
+    regras.append(RegraRecorrencia(descricao="fim de mes", valor=5, tipo="PAGAR", frequencia="MENSAL", intervalo=1, data_inicio=date(2024, 1, 31)))
+
+    esperado = {True: Counter(), False: Counter()}
+    for regra in regras:
+        for ocorrencia in _ocorrencias(regra, fim):
+            if ocorrencia >= inicio:
+                esperado[regra.tipo == "RECEBER"][ocorrencia] += regra.valor
+
+    with TestingSessionLocal() as db:
+        db.add_all(regras)
+        db.add(ContaPagarReceber(descricao="luz", valor=100, valor_baixa=40, tipo="PAGAR", data_previsao=date(2024, 2, 29), esta_baixada=False))
+        db.add(ContaPagarReceber(descricao="paga", valor=70, valor_baixa=70, tipo="PAGAR", data_previsao=date(2024, 2, 29), esta_baixada=True))
+        db.commit()
+        esperado[False][date(2024, 2, 29)] += 60
+
+        projecao = projecao_service.projeta_fluxo_de_caixa(db, inicio, fim, Decimal(1000))
+
+    assert [dia.data for dia in projecao] == [inicio + timedelta(days=posicao) for posicao in range((fim - inicio).days + 1)]
+    assert {dia.data: dia.entradas for dia in projecao if dia.entradas} == dict(esperado[True])
+    assert {dia.data: dia.saidas for dia in projecao if dia.saidas} == dict(esperado[False])
+    assert projecao[-1].saldo == 1000 + sum(esperado[True].values()) - sum(esperado[False].values())
+    # 31/01 mensal cai no ultimo dia dos meses curtos
+    assert projecao[(date(2024, 2, 29) - inicio).days].saidas >= 65
@@ -0,0 +1,139 @@
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from contas_a_pagar_e_receber.models.resumo_mensal_model import ResumoMensal
+from contas_a_pagar_e_receber.services.resumo_mensal_service import reconstroi_resumo_mensal, registra_contas, verifica_divergencias
+from shared.database import Base
+from shared.dependencies import get_db
+
+client = TestClient(app)
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+
+TestingSessionLocal = sessionmaker(autoflush=False, bind=engine, autocommit=False)
+
+def override_get_db():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def usa_banco_de_teste(monkeypatch):
+    # o override e global do app: aplicado por teste, senao vale o do ultimo modulo importado
+    # e o assert_max_queries escuta um engine que as requisicoes nao usam
+    monkeypatch.setitem(app.dependency_overrides, get_db, override_get_db)
+
+
+def _resumo():
+    with TestingSessionLocal() as db:
+        return {(r.ano, r.mes, r.tipo): (r.quantidade, float(r.valor_total), float(r.valor_baixa_total)) for r in db.query(ResumoMensal)}
+
+
+def test_deve_manter_resumo_mensal_atualizado_nas_escritas():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-30'})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'luz', 'tipo': 'PAGAR', 'valor': 200, 'data_previsao': '2024-07-10'})
+    assert _resumo() == {(2024, 7, 'PAGAR'): (2, 1200, 0)}
+
+    client.put("/contas-a-pagar-e-receber/2", json={'descricao': 'luz', 'tipo': 'RECEBER', 'valor': 300, 'data_previsao': '2024-07-10'})
+    assert _resumo() == {(2024, 7, 'PAGAR'): (1, 1000, 0), (2024, 7, 'RECEBER'): (1, 300, 0)}
+
+    client.post("/contas-a-pagar-e-receber/1/baixar")
+    assert _resumo() == {(2024, 7, 'PAGAR'): (1, 1000, 1000), (2024, 7, 'RECEBER'): (1, 300, 0)}
+
+    client.delete("/contas-a-pagar-e-receber/1")
+    assert _resumo() == {(2024, 7, 'PAGAR'): (0, 0, 0), (2024, 7, 'RECEBER'): (1, 300, 0)}
+
+    with TestingSessionLocal() as db:
+        assert verifica_divergencias(db) == []
+
+
+def test_deve_detectar_e_corrigir_divergencias_no_resumo_mensal():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-30'})
+
+    with TestingSessionLocal() as db:
+        db.query(ResumoMensal).update({ResumoMensal.quantidade: 5})
+        db.commit()
+
+        assert len(verifica_divergencias(db)) == 1
+
+        reconstroi_resumo_mensal(db)
+        assert verifica_divergencias(db) == []
+
+    assert _resumo() == {(2024, 7, 'PAGAR'): (1, 1000, 0)}
+
+
+def test_deve_reconstruir_resumo_mensal_de_um_unico_ano():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2023-12-31'})
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'luz', 'tipo': 'PAGAR', 'valor': 200, 'data_previsao': '2024-01-01'})
+
+    with TestingSessionLocal() as db:
+        db.query(ResumoMensal).update({ResumoMensal.quantidade: 5})
+        db.commit()
+
+        assert verifica_divergencias(db, 2024) == ["(2024, 1, 'PAGAR') quantidade: esperado 1, armazenado 5"]
+
+        reconstroi_resumo_mensal(db, 2024)
+        assert verifica_divergencias(db, 2024) == []
+
+    assert _resumo() == {(2023, 12, 'PAGAR'): (5, 1000, 0), (2024, 1, 'PAGAR'): (1, 200, 0)}
+
+
+def test_deve_aplicar_os_deltas_do_resumo_mensal_em_ordem_de_chave():
+    class SessaoQueRegistra:
+        def __init__(self):
+            self.parametros = []
+
+        def get_bind(self):
+            return engine
+
+        def execute(self, comando, parametros):
+            self.parametros += parametros
+
+    contas = [
+        SimpleNamespace(data_previsao=date(2024, 8, 1), tipo='RECEBER', valor=10, valor_baixa=None),
+        SimpleNamespace(data_previsao=date(2024, 7, 1), tipo='RECEBER', valor=10, valor_baixa=None),
+        SimpleNamespace(data_previsao=date(2023, 12, 1), tipo='PAGAR', valor=10, valor_baixa=None),
+        SimpleNamespace(data_previsao=date(2024, 7, 1), tipo='PAGAR', valor=10, valor_baixa=None),
+    ]
+    db = SessaoQueRegistra()
+
+    registra_contas(db, contas)
+
+    assert [(p["ano"], p["mes"], p["tipo"]) for p in db.parametros] == [
+        (2023, 12, 'PAGAR'), (2024, 7, 'PAGAR'), (2024, 7, 'RECEBER'), (2024, 8, 'RECEBER'),
+    ]
+
+
+def test_deve_mudar_o_etag_da_previsao_ao_reconstruir_resumo_mensal():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    client.post("/contas-a-pagar-e-receber", json={'descricao': 'aluguel', 'tipo': 'PAGAR', 'valor': 1000, 'data_previsao': '2024-07-30'})
+    etag = client.get('/contas-a-pagar-e-receber/previsao-gastos-do-mes', params={'ano': 2024}).headers['ETag']
+
+    with TestingSessionLocal() as db:
+        reconstroi_resumo_mensal(db)
+
+    response = client.get('/contas-a-pagar-e-receber/previsao-gastos-do-mes', params={'ano': 2024}, headers={'If-None-Match': etag})
+    assert response.status_code == 200
@@ -0,0 +1,113 @@
+import os
+import time
+
+import pytest
+from sqlalchemy import create_engine
+
+from shared.cache import BackendInvalidacao, BackendInvalidacaoLocal, BackendInvalidacaoPostgres, CacheLRU
+
+# os testes com Postgres so rodam com TEST_POSTGRES_URL apontando para um banco descartavel
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def test_deve_carregar_apenas_na_primeira_leitura():
+    cache = CacheLRU("teste_leitura")
+    carregamentos = []
+
+    def carrega():
+        carregamentos.append(1)
+        return "valor"
+
+    assert cache.obtem(1, carrega) == "valor"
+    assert cache.obtem(1, carrega) == "valor"
+    assert len(carregamentos) == 1
+    assert (cache.acertos, cache.falhas) == (1, 1)
+
+
+def test_nao_deve_guardar_valores_ausentes():
+    cache = CacheLRU("teste_ausentes")
+
+    assert cache.obtem(1, lambda: None) is None
+    assert cache.obtem(1, lambda: "criado depois") == "criado depois"
+
+
+def test_deve_descartar_o_item_menos_usado_recentemente():
+    cache = CacheLRU("teste_lru", tamanho_maximo=2)
+    cache.obtem(1, lambda: "um")
+    cache.obtem(2, lambda: "dois")
+    cache.obtem(1, lambda: "um")
+    cache.obtem(3, lambda: "tres")
+
+    assert cache.obtem(1, lambda: "recarregado") == "um"
+    assert cache.obtem(2, lambda: "recarregado") == "recarregado"
+
+
+def test_deve_expirar_itens_apos_o_ttl():
+    relogio = Relogio()
+    cache = CacheLRU("teste_ttl", ttl_segundos=10, relogio=relogio)
+    cache.obtem(1, lambda: "antigo")
+
+    relogio.agora = 9
+    assert cache.obtem(1, lambda: "novo") == "antigo"
+
+    relogio.agora = 11
+    assert cache.obtem(1, lambda: "novo") == "novo"
+
+
+def test_deve_propagar_invalidacao_entre_workers_pelo_backend():
+    backend = BackendInvalidacaoLocal()
+    worker_a = CacheLRU("teste_backend", backend=backend)
+    worker_b = CacheLRU("teste_backend", backend=backend)
+    worker_a.obtem(1, lambda: "antigo")
+    worker_b.obtem(1, lambda: "antigo")
+
+    worker_a.invalida(1)
+
+    assert worker_a.obtem(1, lambda: "novo") == "novo"
+    assert worker_b.obtem(1, lambda: "novo") == "novo"
+
+
+@pytest.mark.skipif(not TEST_POSTGRES_URL, reason="TEST_POSTGRES_URL nao definido")
+def test_deve_propagar_invalidacao_entre_processos_pelo_postgres():
+    engine = create_engine(TEST_POSTGRES_URL)
+    # um backend por worker, cada um com a propria conexao de escuta
+    worker_a = CacheLRU("teste_backend_postgres", backend=BackendInvalidacaoPostgres(engine, intervalo_s=0.05))
+    worker_b = CacheLRU("teste_backend_postgres", backend=BackendInvalidacaoPostgres(engine, intervalo_s=0.05))
+    worker_b.obtem(1, lambda: "antigo")
+    time.sleep(0.5)
+
+    worker_a.invalida(1)
+
+    limite = time.monotonic() + 5
+    while worker_b.obtem(1, lambda: "novo") == "antigo" and time.monotonic() < limite:
+        time.sleep(0.05)
+    assert worker_b.obtem(1, lambda: "novo") == "novo"
+    engine.dispose()
+
+
+def test_backend_sem_publica_deve_falhar_ao_ser_criado():
+    class SoAssina(BackendInvalidacao):
+        def assina(self, canal, callback):
+            pass
+
+    with pytest.raises(TypeError):
+        SoAssina()
+
+
+def test_nao_deve_guardar_valor_carregado_antes_de_uma_invalidacao():
+    cache = CacheLRU("teste_corrida")
+
+    def carrega_enquanto_outro_worker_invalida():
+        cache.invalida(1)
+        return "antigo"
+
+    assert cache.obtem(1, carrega_enquanto_outro_worker_invalida) == "antigo"
+    assert cache.obtem(1, lambda: "novo") == "novo"
@@ -0,0 +1,79 @@
+import logging
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from main import app
+from shared.database import Base
+from shared.dependencies import get_db
+from shared.instrumentacao import instrumenta_consultas
+from shared.metricas import Registro
+
+client = TestClient(app)
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+instrumenta_consultas(engine, limite_consulta_lenta_ms=0)
+
+TestingSessionLocal = sessionmaker(autoflush=False, bind=engine, autocommit=False)
+
+def override_get_db():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _valor(metricas: str, prefixo: str) -> float:
+    linha = next(linha for linha in metricas.splitlines() if linha.startswith(prefixo))
+    return float(linha.rsplit(" ", 1)[1])
+
+
+def test_deve_renderizar_histogramas_no_formato_do_prometheus():
+    registro = Registro()
+    registro.observa("latencia_seconds", 0.02, (0.01, 0.05, 0.1), rota="/x")
+    registro.observa("latencia_seconds", 0.5, (0.01, 0.05, 0.1), rota="/x")
+
+    assert registro.renderiza().splitlines() == [
+        "# TYPE latencia_seconds histogram",
+        'latencia_seconds_bucket{le="0.01",rota="/x"} 0',
+        'latencia_seconds_bucket{le="0.05",rota="/x"} 1',
+        'latencia_seconds_bucket{le="0.1",rota="/x"} 1',
+        'latencia_seconds_bucket{le="+Inf",rota="/x"} 2',
+        'latencia_seconds_sum{rota="/x"} 0.52',
+        'latencia_seconds_count{rota="/x"} 2',
+    ]
+
+
+def test_deve_medir_latencia_consultas_e_tamanho_da_resposta_por_rota(caplog):
+    app.dependency_overrides[get_db] = override_get_db
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    rotulos = '{metodo="GET",rota="/fornecedor-cliente/{id_fornecedor_cliente}"}'
+
+    antes = client.get("/metrics").text
+    with caplog.at_level(logging.WARNING, logger="contas.consultas_lentas"):
+        response = client.get("/fornecedor-cliente/1")
+    depois = client.get("/metrics").text
+
+    assert response.status_code == 404
+    assert 'http_request_duration_seconds_count{metodo="GET",rota="/fornecedor-cliente/{id_fornecedor_cliente}",status="404"}' in depois
+    contagem_anterior = _valor(antes, "http_request_db_queries_count" + rotulos) if "http_request_db_queries_count" + rotulos in antes else 0
+    soma_anterior = _valor(antes, "http_request_db_queries_sum" + rotulos) if "http_request_db_queries_sum" + rotulos in antes else 0
+    assert _valor(depois, "http_request_db_queries_count" + rotulos) == contagem_anterior + 1
+    assert _valor(depois, "http_request_db_queries_sum" + rotulos) == soma_anterior + 1
+    assert "http_response_size_bytes_sum" + rotulos in depois
+    assert any("/fornecedor-cliente/{id_fornecedor_cliente}" in registro.getMessage() for registro in caplog.records)
+
+
+def test_consultas_fora_de_requisicao_vao_para_o_log_sem_rota(caplog):
+    with caplog.at_level(logging.WARNING, logger="contas.consultas_lentas"):
+        with engine.connect() as conexao:
+            conexao.execute(text("select 1"))
+
+    assert "na rota -: select 1" in caplog.text
@@ -0,0 +1,143 @@
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from contas_a_pagar_e_receber.models.fornecedor_cliente_model import FornecedorCliente
+from contas_a_pagar_e_receber.routers import fornecedor_cliente_router
+from main import app
+from shared import dependencies
+from shared.database import Base
+from shared.dependencies import get_db, get_db_primario
+from shared.replicas import RoteadorDeLeitura
+
+
+def _cria_engine(caminho):
+    return create_engine(f"sqlite:///{caminho}", connect_args={"check_same_thread": False})
+
+
+def _usa_roteador(roteador: RoteadorDeLeitura):
+    TestingSessionLocal = sessionmaker(autoflush=False, autocommit=False)
+
+    def override_get_db(request: Request, response: Response):
+        db = TestingSessionLocal(bind=roteador.engine_para(request, response))
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+
+
+def _nomes(client):
+    return [fornecedor["nome"] for fornecedor in client.get("/fornecedor-cliente").json()]
+
+
+def _bancos(tmp_path):
+    primario, replica = _cria_engine(tmp_path / "primario.db"), _cria_engine(tmp_path / "replica.db")
+    for engine in (primario, replica):
+        Base.metadata.create_all(bind=engine)
+    # a replica "atrasada" tem outro conteudo, entao a resposta mostra de onde veio a leitura
+    with replica.begin() as conexao:
+        conexao.execute(insert(FornecedorCliente), [{"nome": "Da replica"}])
+    return primario, replica
+
+
+def test_deve_ler_da_replica_e_escrever_no_primario(tmp_path):
+    primario, replica = _bancos(tmp_path)
+    _usa_roteador(RoteadorDeLeitura(primario, [replica]))
+    client = TestClient(app)
+
+    assert client.post("/fornecedor-cliente", json={"nome": "Do primario"}).status_code == 201
+
+    assert _nomes(client) == ["Da replica"]
+    with primario.connect() as conexao:
+        assert conexao.execute(FornecedorCliente.__table__.select()).all()[0].nome == "Do primario"
+
+
+def test_deve_ler_do_primario_logo_depois_de_uma_escrita(tmp_path):
+    primario, replica = _bancos(tmp_path)
+    _usa_roteador(RoteadorDeLeitura(primario, [replica], janela_leitura_s=60))
+    client = TestClient(app)
+
+    assert _nomes(client) == ["Da replica"]
+    client.post("/fornecedor-cliente", json={"nome": "Do primario"})
+
+    assert _nomes(client) == ["Do primario"]
+    # outro cliente, sem o cookie da escrita, continua na replica
+    assert _nomes(TestClient(app)) == ["Da replica"]
+
+
+def test_deve_tirar_da_rotacao_a_replica_que_falha(tmp_path):
+    primario, replica = _bancos(tmp_path)
+    fora_do_ar = _cria_engine(tmp_path / "fora-do-ar" / "replica.db")
+    roteador = RoteadorDeLeitura(primario, [fora_do_ar, replica], intervalo_verificacao_s=3600)
+    _usa_roteador(roteador)
+    client = TestClient(app, raise_server_exceptions=False)
+
+    # a leitura que cai na replica fora do ar falha uma vez e a tira da rotacao
+    status = [client.get("/fornecedor-cliente").status_code for _ in range(2)]
+    assert sorted(status) == [200, 500]
+    assert [_nomes(client) for _ in range(4)] == [["Da replica"]] * 4
+
+    # volta para a rotacao na verificacao seguinte a recuperacao
+    (tmp_path / "fora-do-ar").mkdir()
+    Base.metadata.create_all(bind=fora_do_ar)
+    roteador.verifica_replicas()
+    assert sorted(_nomes(client) for _ in range(2)) == [[], ["Da replica"]]
+
+
+def test_deve_ler_do_primario_sem_replica_saudavel(tmp_path):
+    primario, _ = _bancos(tmp_path)
+    roteador = RoteadorDeLeitura(primario, [_cria_engine(tmp_path / "fora-do-ar" / "replica.db")])
+    _usa_roteador(roteador)
+    client = TestClient(app)
+    client.post("/fornecedor-cliente", json={"nome": "Do primario"})
+
+    roteador.verifica_replicas()
+
+    assert _nomes(client) == ["Do primario"]
+
+
+def test_eventos_devem_ser_lidos_sempre_do_primario(tmp_path, monkeypatch):
+    primario, replica = _bancos(tmp_path)
+    roteador = RoteadorDeLeitura(primario, [replica])
+    _usa_roteador(roteador)
+    monkeypatch.setattr(dependencies, "roteador", roteador)
+    monkeypatch.delitem(app.dependency_overrides, get_db_primario, raising=False)
+    client = TestClient(app)
+
+    client.post("/fornecedor-cliente", json={"nome": "Do primario"})
+
+    assert _nomes(client) == ["Da replica"]
+    assert [evento["dados"]["nome"] for evento in client.get("/eventos").json()] == ["Do primario"]
+
+
+def test_modo_assincrono_deve_usar_o_mesmo_roteamento(tmp_path, monkeypatch):
+    primario, replica = _bancos(tmp_path)
+    roteador = RoteadorDeLeitura(primario, [replica], janela_leitura_s=60)
+    roteador.usa_engines_async(create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primario.db'}"),
+                               [create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")])
+    monkeypatch.setattr(dependencies, "roteador", roteador)
+    app_async = FastAPI()
+    app_async.include_router(fornecedor_cliente_router.async_router)
+    client = TestClient(app_async)
+
+    assert _nomes(client) == ["Da replica"]
+    assert client.post("/fornecedor-cliente", json={"nome": "Do primario"}).status_code == 201
+    # o cookie da escrita tambem vale no modo assincrono
+    assert _nomes(client) == ["Do primario"]
+    assert _nomes(TestClient(app_async)) == ["Da replica"]
+
+
+@pytest.fixture(autouse=True)
+def restaura_get_db():
+    # os outros modulos de teste registram o proprio override de get_db ao serem importados
+    anterior = app.dependency_overrides.get(get_db)
+    yield
+    if anterior is None:
+        app.dependency_overrides.pop(get_db, None)
+    else:
+        app.dependency_overrides[get_db] = anterior
@@ -0,0 +1,90 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from contas_a_pagar_e_receber.routers import busca_router, contas_a_pagar_e_receber_router, evento_router, fornecedor_cliente_router, fornecedor_cliente_vs_contas_router, pagamento_router, recorrencia_router
+from shared.database import Base
+from shared.dependencies import get_async_db, get_async_db_primario
+from shared.exceptions import NaoModificado, NotFound
+from shared.exceptions_handler import nao_modificado_exception_handler, not_found_exception_handler
+
+app = FastAPI()
+for modulo_router in (contas_a_pagar_e_receber_router, fornecedor_cliente_router, fornecedor_cliente_vs_contas_router, pagamento_router, busca_router, evento_router, recorrencia_router):
+    app.include_router(modulo_router.async_router)
+app.add_exception_handler(NotFound, not_found_exception_handler)
+app.add_exception_handler(NaoModificado, nao_modificado_exception_handler)
+
+client = TestClient(app)
+
+engine = create_engine(
+    "sqlite:///./test.db", connect_args={"check_same_thread": False}
+)
+
+TestingAsyncSessionLocal = async_sessionmaker(autoflush=False, bind=create_async_engine("sqlite+aiosqlite:///./test.db"), autocommit=False)
+
+async def override_get_async_db():
+    db = TestingAsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+app.dependency_overrides[get_async_db] = override_get_async_db
+app.dependency_overrides[get_async_db_primario] = override_get_async_db
+
+
+def test_deve_expor_as_mesmas_rotas_no_modo_assincrono():
+    rotas_sincronas = {(rota.path, tuple(sorted(rota.methods))) for modulo in (contas_a_pagar_e_receber_router, fornecedor_cliente_router, fornecedor_cliente_vs_contas_router, pagamento_router, busca_router, evento_router, recorrencia_router) for rota in modulo.router.routes}
+    rotas_assincronas = {(rota.path, tuple(sorted(rota.methods))) for rota in app.routes if hasattr(rota, 'methods') and rota.path.startswith(('/contas', '/fornecedor', '/busca', '/eventos', '/recorrencias'))}
+
+    assert rotas_assincronas == rotas_sincronas
+
+
+def test_deve_executar_crud_de_contas_no_modo_assincrono():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    client.post("/fornecedor-cliente", json={"nome": "Casa de musica"})
+    response = client.post("/contas-a-pagar-e-receber", json={'descricao': 'guitarra', 'tipo': 'PAGAR', 'valor': 999, 'data_previsao': '2024-07-30', 'fornecedor_cliente_id': 1})
+    assert response.status_code == 201
+    assert response.json()['fornecedor'] == {'id': 1, 'nome': 'Casa de musica'}
+
+    response = client.put("/contas-a-pagar-e-receber/1", json={'descricao': 'guitarra', 'tipo': 'PAGAR', 'valor': 1200, 'data_previsao': '2024-07-30', 'fornecedor_cliente_id': 1})
+    assert response.json()['valor'] == 1200
+
+    response = client.post("/contas-a-pagar-e-receber/1/baixar")
+    assert response.json()['esta_baixada'] is True
+
+    response = client.get("/contas-a-pagar-e-receber", params={'limit': 10})
+    assert [conta['id'] for conta in response.json()] == [1]
+    response = client.get("/contas-a-pagar-e-receber", params={'limit': 10}, headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+
+    response = client.get("/fornecedor-cliente/1/contas-a-pagar-e-receber")
+    assert [conta['id'] for conta in response.json()] == [1]
+
+    response = client.get("/contas-a-pagar-e-receber/previsao-gastos-do-mes", params={'ano': 2024})
+    assert response.json() == [{'mes': 7, 'valor_total': 1200}]
+
+    response = client.get("/contas-a-pagar-e-receber/export")
+    assert [json.loads(linha)['id'] for linha in response.text.splitlines()] == [1]
+
+    assert client.delete("/contas-a-pagar-e-receber/1").status_code == 204
+    assert client.get("/contas-a-pagar-e-receber/1").status_code == 404
+
+    response = client.get("/eventos", params={'entidade': 'conta_a_pagar_e_receber', 'espera': 1})
+    assert [evento['operacao'] for evento in response.json()] == ['criacao', 'atualizacao', 'baixa', 'exclusao']
+    response = client.get("/eventos", params={'after': response.headers['X-Next-Cursor'], 'espera': 0.1})
+    assert response.json() == []
+
+
+def test_deve_retornar_erro_de_fornecedor_invalido_no_modo_assincrono():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    response = client.post("/contas-a-pagar-e-receber", json={'descricao': 'guitarra', 'tipo': 'PAGAR', 'valor': 999, 'data_previsao': '2024-07-30', 'fornecedor_cliente_id': 1001})
+    assert response.status_code == 422
+    assert response.json()['detail'] == 'Esse fornecedor não existe'
@@ -0,0 +1,43 @@
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from sqlalchemy import event
+
+
+@contextmanager
+def registra_queries(engine) -> Iterator[List[str]]:
+    queries: List[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@contextmanager
+def assert_max_queries(engine, maximo: int) -> Iterator[List[str]]:
+    with registra_queries(engine) as queries:
+        yield queries
+
+    assert len(queries) <= maximo, f"esperava no maximo {maximo} queries, executou {len(queries)}:\n" + "\n".join(queries)
+
+
+def plano_de_execucao(conexao, consulta) -> str:
+    # roda a consulta com os mesmos parametros, mas prefixada com EXPLAIN
+    prefixo = "EXPLAIN QUERY PLAN " if conexao.dialect.name == "sqlite" else "EXPLAIN "
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        return prefixo + statement, parameters
+
+    event.listen(conexao, "before_cursor_execute", before_cursor_execute, retval=True)
+    try:
+        # direto do cursor: os processadores de resultado das colunas da consulta nao valem para o EXPLAIN
+        linhas = conexao.execute(consulta).cursor.fetchall()
+    finally:
+        event.remove(conexao, "before_cursor_execute", before_cursor_execute)
+
+    return "\n".join(str(linha[-1]) for linha in linhas)